@@ -8,6 +8,7 @@ rename-safe / split-safe phase.
 
 from __future__ import annotations
 
+import asyncio
 from typing import Any, Dict, Optional
 
 from fastapi import FastAPI, Header, HTTPException, Query
@@ -249,23 +250,25 @@ def register_follow_graph_routes(app: FastAPI) -> None:
             except Exception:
                 viewer_user_id = None
 
-        # Count following / followers via service_role (avoid client-side RLS)
-        following_count = await _sb_count(
-            "/rest/v1/myprofile_links",
-            params={
-                "select": "owner_user_id",
-                "viewer_user_id": f"eq.{uid}",
-                "limit": "1",
-            },
-        )
-
-        follower_count = await _sb_count(
-            "/rest/v1/myprofile_links",
-            params={
-                "select": "viewer_user_id",
-                "owner_user_id": f"eq.{uid}",
-                "limit": "1",
-            },
+        # Count following / followers via service_role (avoid client-side RLS).
+        # The two counts are independent, so run them concurrently.
+        following_count, follower_count = await asyncio.gather(
+            _sb_count(
+                "/rest/v1/myprofile_links",
+                params={
+                    "select": "owner_user_id",
+                    "viewer_user_id": f"eq.{uid}",
+                    "limit": "1",
+                },
+            ),
+            _sb_count(
+                "/rest/v1/myprofile_links",
+                params={
+                    "select": "viewer_user_id",
+                    "owner_user_id": f"eq.{uid}",
+                    "limit": "1",
+                },
+            ),
         )
 
         is_following = False
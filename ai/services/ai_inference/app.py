@@ -180,6 +180,8 @@ from api_relationship_compat import register_relationship_compat_routes
 from api_retired_legacy_compat import register_retired_legacy_compat_routes
 from api_today_question import register_today_question_routes, run_today_question_push_once
 from supabase_client import aclose_async_client, sb_get as _shared_sb_get, sb_post as _shared_sb_post
+from observability import aclose_slack_client
+from redis_cache import aclose_redis_client
 from api_report_distribution_settings import register_report_distribution_settings_routes
 from prompt_templates import render_prompt_template, list_prompt_templates
 from astor_self_structure_persona import build_persona_context_payload
@@ -1570,6 +1572,22 @@ async def _close_shared_supabase_client() -> None:
         logger.warning("shared supabase client shutdown failed: %s", exc)
 
 
+@app.on_event("shutdown")
+async def _close_shared_slack_client() -> None:
+    try:
+        await aclose_slack_client()
+    except Exception as exc:
+        logger.warning("shared slack client shutdown failed: %s", exc)
+
+
+@app.on_event("shutdown")
+async def _close_shared_redis_client() -> None:
+    try:
+        await aclose_redis_client()
+    except Exception as exc:
+        logger.warning("shared redis client shutdown failed: %s", exc)
+
+
 # ---------- Entrypoint ----------
 if __name__ == "__main__":
     import sys
@@ -1587,9 +1605,9 @@ if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app:app", host=HOST, port=PORT, log_level="info")
 
+_JA_CHAR_RE = re.compile(r"[\u3040-\u30ff\u4e00-\u9fff]")
+
+
 def detect_lang(text: str) -> str:
     """簡易な言語推定: 日本語(ひらがな/カタカナ/漢字)があれば 'ja'、なければ 'en'。"""
-    for ch in text:
-        if '\u3040' <= ch <= '\u30ff' or '\u4e00' <= ch <= '\u9fff':
-            return 'ja'
-    return 'en'
+    return 'ja' if _JA_CHAR_RE.search(text) else 'en'
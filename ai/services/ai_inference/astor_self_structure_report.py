@@ -1068,7 +1068,7 @@ def _build_myprofile_monthly_report_fallback(
 
     def PL(key: str, default: List[str]) -> List[str]:
         v = phrases.get(key)
-        if isinstance(v, list):
+        if isinstance(v, (list, tuple)):
             return [str(x) for x in v if str(x).strip()]
         return list(default)
 
@@ -1338,7 +1338,7 @@ def _build_myprofile_monthly_report_fallback(
 
     # 5. 領域別
     lines.append(P("sec5_title", "5. 領域別メモ（仕事/対人/孤独/挑戦/評価など、見えている範囲で）"))
-    domains = phrases.get("sec5_domains") if isinstance(phrases.get("sec5_domains"), list) else ["仕事", "対人", "孤独", "挑戦", "評価"]
+    domains = phrases.get("sec5_domains") if isinstance(phrases.get("sec5_domains"), (list, tuple)) else ["仕事", "対人", "孤独", "挑戦", "評価"]
     for domain in domains:
         d = str(domain)
         hints = bucket.get(d) or []
@@ -338,8 +338,9 @@ _SCHED_MAX_SIZE = max(
 
 
 def _digest_token(token: str) -> str:
-    # Do not keep token in memory as a key; store only sha256 digest.
-    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+    # Do not keep token in memory as a key; store only a digest.
+    # Process-local key, so blake2b-128 (faster than sha256) is plenty.
+    return hashlib.blake2b(token.encode("utf-8"), digest_size=16).hexdigest()
 
 
 def _build_schedule_key(token: str, method: str, path_key: str) -> str:
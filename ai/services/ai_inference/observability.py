@@ -30,7 +30,6 @@ Slack（Incoming Webhook）
 from __future__ import annotations
 
 import asyncio
-import hashlib
 import json
 import logging
 import os
@@ -43,15 +42,22 @@ from typing import Any, Dict, Optional
 import httpx
 
 
+def _env_bool(name: str, default: bool = False) -> bool:
+    raw = (os.getenv(name) or "").strip().lower()
+    if not raw:
+        return bool(default)
+    return raw in ("1", "true", "yes", "on")
+
+
 # ----------------------------
 # JSON logging
 # ----------------------------
 
-OBS_LOG_JSON = (os.getenv("OBS_LOG_JSON", "true").strip().lower() != "false")
+OBS_LOG_JSON = _env_bool("OBS_LOG_JSON", True)
 # Render log alert helpers
 # - Render のログアラートは JSON のフィールド抽出が難しいことがあるため、
 #   安定したプレーン文字列（ALERT::KEY ...）も出せるようにする。
-OBS_RENDER_ALERT_MARKERS_ENABLED = (os.getenv("OBS_RENDER_ALERT_MARKERS_ENABLED", "true").strip().lower() != "false")
+OBS_RENDER_ALERT_MARKERS_ENABLED = _env_bool("OBS_RENDER_ALERT_MARKERS_ENABLED", True)
 OBS_RENDER_ALERT_PREFIX = (os.getenv("OBS_RENDER_ALERT_PREFIX", "ALERT::") or "ALERT::").strip() or "ALERT::"
 try:
     OBS_RENDER_ALERT_KV_MAX_LEN = int(os.getenv("OBS_RENDER_ALERT_KV_MAX_LEN", "200") or "200")
@@ -101,6 +107,9 @@ def log_event(logger: logging.Logger, event: str, *, level: str = "info", **fiel
 
 
 
+_NEWLINE_TABLE = str.maketrans({"\n": " ", "\r": " "})
+
+
 def _compact_kv(fields: Dict[str, Any]) -> str:
     """Compact key/value rendering for alert marker lines.
 
@@ -115,10 +124,10 @@ def _compact_kv(fields: Dict[str, Any]) -> str:
             s = str(v)
         except Exception:
             s = repr(v)
-        s = s.replace("\n", " ").replace("\r", " ").strip()
+        s = s.translate(_NEWLINE_TABLE).strip()
         if OBS_RENDER_ALERT_KV_MAX_LEN > 0 and len(s) > OBS_RENDER_ALERT_KV_MAX_LEN:
             s = s[: max(0, OBS_RENDER_ALERT_KV_MAX_LEN - 3)] + "..."
-        parts.append(f"{k}={s}")
+        parts.append((k if isinstance(k, str) else str(k)) + "=" + s)
     return " ".join(parts)
 
 
@@ -160,9 +169,7 @@ def log_alert(
 # ----------------------------
 
 SLACK_WEBHOOK_URL = (os.getenv("SLACK_WEBHOOK_URL") or "").strip()
-SLACK_NOTIFY_ENABLED = (
-    (os.getenv("SLACK_NOTIFY_ENABLED") or "").strip().lower() in ("1", "true", "yes")
-) or bool(SLACK_WEBHOOK_URL)
+SLACK_NOTIFY_ENABLED = _env_bool("SLACK_NOTIFY_ENABLED", False) or bool(SLACK_WEBHOOK_URL)
 
 try:
     SLACK_TIMEOUT_SECONDS = float(os.getenv("SLACK_TIMEOUT_SECONDS", "3.0") or "3.0")
@@ -174,11 +181,9 @@ try:
 except Exception:
     SLACK_RATE_LIMIT_SECONDS = 60.0
 
-SLACK_NOTIFY_ON_CRON_ERRORS = (os.getenv("SLACK_NOTIFY_ON_CRON_ERRORS", "true").strip().lower() != "false")
-SLACK_NOTIFY_ON_CRON_FAILURE = (os.getenv("SLACK_NOTIFY_ON_CRON_FAILURE", "true").strip().lower() != "false")
-SLACK_INCLUDE_ERROR_SAMPLES = (
-    os.getenv("SLACK_INCLUDE_ERROR_SAMPLES", "false").strip().lower() in ("1", "true", "yes")
-)
+SLACK_NOTIFY_ON_CRON_ERRORS = _env_bool("SLACK_NOTIFY_ON_CRON_ERRORS", True)
+SLACK_NOTIFY_ON_CRON_FAILURE = _env_bool("SLACK_NOTIFY_ON_CRON_FAILURE", True)
+SLACK_INCLUDE_ERROR_SAMPLES = _env_bool("SLACK_INCLUDE_ERROR_SAMPLES", False)
 
 
 @dataclass
@@ -189,24 +194,67 @@ class SlackSendResult:
 
 
 _last_sent_at: Dict[str, float] = {}
-_last_sent_lock = asyncio.Lock()
+
+# Slack は同一ホストへ繰り返し送るだけなので、AsyncClient を使い回して
+# TLS ハンドシェイク / DNS 解決 / コネクションプール初期化を毎回やり直さない。
+_slack_client: Optional[httpx.AsyncClient] = None
+_slack_client_lock = asyncio.Lock()
+
+
+async def _get_slack_client() -> httpx.AsyncClient:
+    """Return the shared Slack AsyncClient (lazily created)."""
+    global _slack_client
+    if _slack_client is not None:
+        return _slack_client
+
+    async with _slack_client_lock:
+        if _slack_client is None:
+            _slack_client = httpx.AsyncClient(
+                timeout=SLACK_TIMEOUT_SECONDS,
+                limits=httpx.Limits(max_keepalive_connections=4, max_connections=8),
+            )
+        return _slack_client
+
+
+async def aclose_slack_client() -> None:
+    """Close the shared Slack AsyncClient (optional)."""
+    global _slack_client
+    if _slack_client is None:
+        return
+    try:
+        await _slack_client.aclose()
+    finally:
+        _slack_client = None
 
 
 def _hash_key(s: str) -> str:
-    return hashlib.sha256((s or "").encode("utf-8")).hexdigest()[:16]
+    # レート制限キーはこのプロセス内の _last_sent_at でしか使わないため、
+    # 暗号学的ハッシュは不要。str の組み込み hash（SipHash）で十分。
+    return format(hash(s or "") & 0xFFFFFFFFFFFFFFFF, "016x")
+
 
+def _rate_limit_allow(key: str) -> bool:
+    """Simple in-process rate limit by key.
 
-async def _rate_limit_allow(key: str) -> bool:
-    """Simple in-process rate limit by key."""
+    Synchronous on purpose: the read-modify-write below has no await point, so
+    it cannot interleave with another task on the same event loop.
+    """
     if SLACK_RATE_LIMIT_SECONDS <= 0:
         return True
     now = time.monotonic()
-    async with _last_sent_lock:
-        last = _last_sent_at.get(key)
-        if last is not None and (now - last) < SLACK_RATE_LIMIT_SECONDS:
-            return False
-        _last_sent_at[key] = now
-        return True
+    last = _last_sent_at.get(key)
+    if last is not None and (now - last) < SLACK_RATE_LIMIT_SECONDS:
+        return False
+    _last_sent_at[key] = now
+    return True
+
+
+_SLACK_JSON_HEADERS = {"content-type": "application/json; charset=utf-8"}
+
+
+def _build_slack_body(text: str) -> bytes:
+    """Serialize the fixed ``{"text": ...}`` envelope without a payload dict."""
+    return b'{"text":' + json.dumps(text, ensure_ascii=False).encode("utf-8") + b"}"
 
 
 def _truncate(s: str, max_len: int = 1200) -> str:
@@ -228,20 +276,24 @@ async def send_slack_webhook(
         return SlackSendResult(sent=False, skipped=True, reason="disabled")
 
     k = _hash_key(key or title or text[:80] or "slack")
-    allowed = await _rate_limit_allow(k)
-    if not allowed:
+    if not _rate_limit_allow(k):
         return SlackSendResult(sent=False, skipped=True, reason="rate_limited")
 
     body_text = text
     if title:
         body_text = f"*{title}*\n{body_text}"
 
-    payload = {"text": _truncate(body_text, 3500)}
+    content = _build_slack_body(_truncate(body_text, 3500))
     t = float(timeout_seconds or SLACK_TIMEOUT_SECONDS)
 
     try:
-        async with httpx.AsyncClient(timeout=t) as client:
-            resp = await client.post(SLACK_WEBHOOK_URL, json=payload)
+        client = await _get_slack_client()
+        resp = await client.post(
+            SLACK_WEBHOOK_URL,
+            content=content,
+            headers=_SLACK_JSON_HEADERS,
+            timeout=httpx.Timeout(t),
+        )
         if 200 <= resp.status_code < 300:
             return SlackSendResult(sent=True, skipped=False, reason="ok")
         return SlackSendResult(sent=False, skipped=False, reason=f"http_{resp.status_code}")
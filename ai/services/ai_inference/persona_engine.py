@@ -9,18 +9,18 @@ ASTOR から再利用しやすいように切り出すためのスケルトン
 """
 
 from __future__ import annotations
+import re
 from typing import Any, Optional
 
 # from .app import InputPayload  # 実際のパスに合わせて調整すること
 
+_JA_CHAR_RE = re.compile(r"[\u3040-\u30ff\u4e00-\u9fff]")
+
 def detect_lang(text: str) -> str:
   """
   既存 app.py の detect_lang と同じ実装をここに移動して使う想定。
   """
-  for ch in text:
-      if '\u3040' <= ch <= '\u30ff' or '\u4e00' <= ch <= '\u9fff':
-          return 'ja'
-  return 'en'
+  return 'ja' if _JA_CHAR_RE.search(text) else 'en'
 
 
 def contains_date_like_adv(text: str) -> bool:
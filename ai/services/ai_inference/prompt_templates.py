@@ -25,14 +25,22 @@ POST /mymodel/infer
 
 from __future__ import annotations
 
+import sys
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
 
 
 class TemplateError(ValueError):
     """Template rendering error (bad vars / unknown template)."""
 
 
+def _clean(v: Any) -> str:
+    """str(v or "").strip() without the redundant str() call for str inputs."""
+    if isinstance(v, str):
+        return v.strip()
+    return str(v or "").strip()
+
+
 @dataclass(frozen=True)
 class TemplateInfo:
     template_id: str
@@ -57,19 +65,39 @@ _TEMPLATES: Dict[str, TemplateInfo] = {
 }
 
 
+# 必須変数の検証用。キー集合との差集合で O(1) 判定できるよう frozenset で持つ。
+_REQUIRED_VARS: Dict[str, FrozenSet[str]] = {
+    tid: frozenset(sys.intern(v) for v in info.required_vars) for tid, info in _TEMPLATES.items()
+}
+
+
+# list_prompt_templates() 用。レジストリは不変なので import 時に一度だけ組み立てる。
+_PROMPT_TEMPLATE_LIST: Tuple[Dict[str, Any], ...] = tuple(
+    {
+        "template_id": info.template_id,
+        "description": info.description,
+        "required_vars": tuple(info.required_vars),
+        "optional_vars": tuple(info.optional_vars),
+    }
+    for _tid, info in sorted(_TEMPLATES.items(), key=lambda kv: kv[0])
+)
+
+
 def list_prompt_templates() -> List[Dict[str, Any]]:
-    """Return template metadata list for debug/inspection."""
-    out: List[Dict[str, Any]] = []
-    for tid, info in sorted(_TEMPLATES.items(), key=lambda kv: kv[0]):
-        out.append(
-            {
-                "template_id": info.template_id,
-                "description": info.description,
-                "required_vars": list(info.required_vars),
-                "optional_vars": list(info.optional_vars),
-            }
-        )
-    return out
+    """Return template metadata list for debug/inspection.
+
+    The list is precomputed at import time; each call returns fresh dicts so
+    callers may mutate the result without affecting the shared cache.
+    """
+    return [
+        {
+            "template_id": item["template_id"],
+            "description": item["description"],
+            "required_vars": list(item["required_vars"]),
+            "optional_vars": list(item["optional_vars"]),
+        }
+        for item in _PROMPT_TEMPLATE_LIST
+    ]
 
 
 def render_prompt_template(template_id: str, template_vars: Optional[Dict[str, Any]] = None, *, target: str = "self") -> str:
@@ -84,82 +112,102 @@ def render_prompt_template(template_id: str, template_vars: Optional[Dict[str, A
     target:
         self | external (used only for a small label in some templates)
     """
-    tid = str(template_id or "").strip()
+    tid = _clean(template_id)
     if not tid:
         raise TemplateError("template_id is required")
 
     vars_ = template_vars or {}
 
-    if tid == "myprofile_qna_v1":
-        return _tpl_myprofile_qna_v1(vars_, target=target)
-
-    if tid == "myprofile_monthly_report_v1":
-        return _tpl_myprofile_monthly_report_v1(vars_, target=target)
+    renderer = _RENDERERS.get(tid)
+    required = _REQUIRED_VARS.get(tid)
+    if renderer is None or required is None:
+        raise TemplateError(f"Unknown template_id: {tid}")
+    missing = required - vars_.keys()
+    if missing:
+        raise TemplateError(f"template_vars.{sorted(missing)[0]} is required")
 
-    raise TemplateError(f"Unknown template_id: {tid}")
+    return renderer(vars_, target=target)
 
 
 def _tpl_myprofile_qna_v1(vars_: Dict[str, Any], *, target: str) -> str:
-    q = str(vars_.get("question") or "").strip()
+    q = _clean(vars_.get("question"))
     if not q:
         raise TemplateError("template_vars.question is required")
 
     # NOTE: /mymodel/infer 側で contains_date_like を弾くので、日付関連語は書かない。
     lines = []
     lines.append("【MyProfile 一問一答】")
-    lines.append(f"【対象】{str(target or 'self')}")
+    lines.append(f"【対象】{target or 'self'}")
     lines.append("【質問】")
     lines.append(q)
     return "\n".join(lines).strip()
 
 
+# 月次レポート指示文の固定部分。呼び出しごとに list.append で組み立てず、
+# import 時に確定させたタプルを連結するだけにする。
+_MONTHLY_REPORT_SECTIONS: Tuple[str, ...] = (
+    "",
+    "【要点（答え）】",
+    "・（この期間の自己モデルの核を1行）",
+    "・（崩れやすい引き金/条件を1行）",
+    "・（安定しやすい条件/整え方を1行）",
+    "",
+    "1. いまの自己モデル（仮説・1〜4行）",
+    "2. 主要な反応パターン（刺激→認知→感情→行動）",
+    "3. 安定条件 / 崩れ条件（それぞれ箇条書き）",
+    "4. 思考のクセ・判断のクセ（あれば）",
+    "5. 領域別メモ（仕事/対人/孤独/挑戦/評価など、見えている範囲で）",
+    "6. 次の観測ポイント（3つ。行動に落ちる形で）",
+)
+_MONTHLY_REPORT_WITH_PREV_HEAD: Tuple[str, ...] = (
+    "7. 前回との差分（変化点 / 更新点 / 揺れ方の違い）",
+    "8. 感情構造との接続（MyWebに譲る前提で、短く1〜2行）",
+    "",
+    "前回レポート（参考。コピーせず、差分観測の材料として扱ってください）：",
+    "<<PREVIOUS_REPORT_START>>",
+)
+_MONTHLY_REPORT_WITH_PREV_TAIL: Tuple[str, ...] = ("<<PREVIOUS_REPORT_END>>",)
+_MONTHLY_REPORT_NO_PREV: Tuple[str, ...] = (
+    "7. 比較メモ（前回レポートがまだ無い場合は1〜2行）",
+    "8. 感情構造との接続（MyWebに譲る前提で、短く1〜2行）",
+)
+_MONTHLY_REPORT_NOTES: Tuple[str, ...] = (
+    "",
+    "【追加の注意】",
+    "・『あなたは〜な人』のような人格の断定表現は禁止。",
+    "・専門用語は避け、アプリのユーザーが読んで理解できる言葉で。",
+    "・一貫して『観測→仮説』の順で書く。",
+)
+
+
 def _tpl_myprofile_monthly_report_v1(vars_: Dict[str, Any], *, target: str) -> str:
     # 互換用。/mymodel/infer が is_myprofile_monthly_report_instruction() で検出するための
     # マーカー文字列を含める。実際の生成は astor_myprofile_report に移譲される。
-    range_label = str(vars_.get("range_label") or "").strip()
-    prev = str(vars_.get("prev_report_text") or "").strip()
-    has_prev = bool(prev)
+    range_label = _clean(vars_.get("range_label"))
+    prev = _clean(vars_.get("prev_report_text"))
 
     # range_label は UI 表示用の文字列なので、ここでは必須にしない。
     # ただし入っている場合はタイトル用に先頭に置く。
     if not range_label:
         range_label = "（期間ラベル未指定）"
 
-    lines: List[str] = []
-    lines.append("【自己構造分析レポート（月次）】")
-    lines.append("")
-    lines.append(f"対象: {str(target or 'self')}")
-    lines.append(f"期間: {range_label}")
-    lines.append("")
-    lines.append("【要点（答え）】")
-    lines.append("・（この期間の自己モデルの核を1行）")
-    lines.append("・（崩れやすい引き金/条件を1行）")
-    lines.append("・（安定しやすい条件/整え方を1行）")
-    lines.append("")
-    lines.append("1. いまの自己モデル（仮説・1〜4行）")
-    lines.append("2. 主要な反応パターン（刺激→認知→感情→行動）")
-    lines.append("3. 安定条件 / 崩れ条件（それぞれ箇条書き）")
-    lines.append("4. 思考のクセ・判断のクセ（あれば）")
-    lines.append("5. 領域別メモ（仕事/対人/孤独/挑戦/評価など、見えている範囲で）")
-    lines.append("6. 次の観測ポイント（3つ。行動に落ちる形で）")
-
-    if has_prev:
-        lines.append("7. 前回との差分（変化点 / 更新点 / 揺れ方の違い）")
-        lines.append("8. 感情構造との接続（MyWebに譲る前提で、短く1〜2行）")
-        lines.append("")
-        lines.append("前回レポート（参考。コピーせず、差分観測の材料として扱ってください）：")
-        lines.append("<<PREVIOUS_REPORT_START>>")
+    head = (
+        "【自己構造分析レポート（月次）】",
+        "",
+        f"対象: {target or 'self'}",
+        f"期間: {range_label}",
+    )
+    if prev:
         # 長すぎるとリクエストが重くなるので上限
-        lines.append(prev[:8000])
-        lines.append("<<PREVIOUS_REPORT_END>>")
+        comparison = _MONTHLY_REPORT_WITH_PREV_HEAD + (prev[:8000],) + _MONTHLY_REPORT_WITH_PREV_TAIL
     else:
-        lines.append("7. 比較メモ（前回レポートがまだ無い場合は1〜2行）")
-        lines.append("8. 感情構造との接続（MyWebに譲る前提で、短く1〜2行）")
+        comparison = _MONTHLY_REPORT_NO_PREV
 
-    lines.append("")
-    lines.append("【追加の注意】")
-    lines.append("・『あなたは〜な人』のような人格の断定表現は禁止。")
-    lines.append("・専門用語は避け、アプリのユーザーが読んで理解できる言葉で。")
-    lines.append("・一貫して『観測→仮説』の順で書く。")
+    return "\n".join(head + _MONTHLY_REPORT_SECTIONS + comparison + _MONTHLY_REPORT_NOTES).strip()
 
-    return "\n".join(lines).strip()
+
+# template_id -> 描画関数。render_prompt_template は if 連鎖を辿らず一度引くだけにする。
+_RENDERERS: Dict[str, Callable[..., str]] = {
+    "myprofile_qna_v1": _tpl_myprofile_qna_v1,
+    "myprofile_monthly_report_v1": _tpl_myprofile_monthly_report_v1,
+}
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""redis_cache.py
+
+Optional shared L2 cache (Redis) behind the process-local caches
+----------------------------------------------------------------
+
+Why this exists
+  - The tier cache (subscription_store) and the auth token cache
+    (supabase_auth_token_cache) are process-local. With several uvicorn workers
+    or instances, each one pays its own Supabase round-trip on first touch.
+  - When ``COCOLON_REDIS_URL`` is set (and the ``redis`` package is installed),
+    entries are also written to Redis so other workers can pick them up.
+
+Policy
+  - Strictly best-effort: every error is swallowed (logged at debug) and treated
+    as a miss, so Redis trouble never fails a request. Short socket timeouts
+    keep a slow Redis from stalling the request path.
+  - Writes / deletes are fire-and-forget tasks so sync callers (cache setters)
+    do not have to await them.
+  - Never store raw tokens here; callers pass digests only.
+
+ENV
+- COCOLON_REDIS_URL (default: unset = disabled)
+- COCOLON_REDIS_TIMEOUT_SECONDS (default: 0.2)
+- COCOLON_REDIS_KEY_PREFIX (default: "cocolon:")
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+from typing import Any, Optional
+
+try:  # optional dependency
+    import redis.asyncio as _redis_asyncio
+except ImportError:  # pragma: no cover - redis 未導入環境では L2 を使わない
+    _redis_asyncio = None
+
+logger = logging.getLogger("redis_cache")
+
+REDIS_URL = (os.getenv("COCOLON_REDIS_URL") or "").strip()
+_KEY_PREFIX = os.getenv("COCOLON_REDIS_KEY_PREFIX", "cocolon:")
+try:
+    _TIMEOUT = max(0.01, float(os.getenv("COCOLON_REDIS_TIMEOUT_SECONDS", "0.2") or "0.2"))
+except Exception:
+    _TIMEOUT = 0.2
+
+_client: Any = None
+# threading.Lock rather than asyncio.Lock: it is never held across an await and
+# does not bind to whichever event loop first touched the module.
+_client_lock = threading.Lock()
+
+# Strong refs to fire-and-forget writes (the event loop only keeps weak ones).
+_pending: "set[asyncio.Task[None]]" = set()
+
+
+def l2_enabled() -> bool:
+    return bool(REDIS_URL) and _redis_asyncio is not None
+
+
+def _get_client() -> Any:
+    """Return the shared client. Synchronous: from_url does no I/O (connects lazily)."""
+    global _client
+    client = _client
+    if client is not None:
+        return client
+    with _client_lock:
+        if _client is None:
+            _client = _redis_asyncio.from_url(
+                REDIS_URL,
+                decode_responses=True,
+                socket_timeout=_TIMEOUT,
+                socket_connect_timeout=_TIMEOUT,
+            )
+        return _client
+
+
+async def l2_get(key: str) -> Optional[str]:
+    """Return the cached string, or None on miss / disabled / any error."""
+    if not l2_enabled():
+        return None
+    try:
+        client = _get_client()
+        return await client.get(_KEY_PREFIX + key)
+    except Exception as exc:
+        logger.debug("redis get failed: %s", exc)
+        return None
+
+
+async def _l2_setex(key: str, ttl_seconds: int, value: str) -> None:
+    try:
+        client = _get_client()
+        await client.setex(_KEY_PREFIX + key, ttl_seconds, value)
+    except Exception as exc:
+        logger.debug("redis setex failed: %s", exc)
+
+
+async def _l2_delete(key: str) -> None:
+    try:
+        client = _get_client()
+        await client.delete(_KEY_PREFIX + key)
+    except Exception as exc:
+        logger.debug("redis delete failed: %s", exc)
+
+
+def _spawn(coro: Any) -> None:
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        coro.close()  # no loop (sync caller): skip the shared write
+        return
+    task = loop.create_task(coro)
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
+
+
+def l2_set_soon(key: str, ttl_seconds: float, value: str) -> None:
+    """Schedule SETEX in the background (no-op when disabled)."""
+    ttl = int(ttl_seconds)
+    if not l2_enabled() or ttl <= 0:
+        return
+    _spawn(_l2_setex(key, ttl, value))
+
+
+def l2_delete_soon(key: str) -> None:
+    """Schedule DEL in the background (no-op when disabled)."""
+    if not l2_enabled():
+        return
+    _spawn(_l2_delete(key))
+
+
+async def aclose_redis_client() -> None:
+    """Close the shared Redis client (optional)."""
+    global _client
+    if _client is None:
+        return
+    try:
+        close = getattr(_client, "aclose", None) or _client.close  # redis-py < 5 has close()
+        await close()
+    finally:
+        _client = None
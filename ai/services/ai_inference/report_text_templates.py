@@ -20,8 +20,9 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import lru_cache
 from datetime import datetime, timezone, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 
 
 class ReportTextTemplateError(ValueError):
@@ -49,6 +50,8 @@ _KEY_TO_JP: Dict[str, str] = {
     "anger": "怒り",
     "calm": "平穏",
 }
+# (key, 日本語ラベル) を事前に組にしておき、描画ループでの辞書引きを省く。
+_EMOTION_KEYS_JP: Tuple[Tuple[str, str], ...] = tuple((k, _KEY_TO_JP.get(k, k)) for k in _EMOTION_KEYS)
 
 
 _TEMPLATES: Dict[str, ReportTextTemplateInfo] = {
@@ -94,35 +97,60 @@ _TEMPLATES: Dict[str, ReportTextTemplateInfo] = {
 }
 
 
+# list_report_text_templates() 用。レジストリは不変なので import 時に一度だけ組み立てる。
+_TEMPLATES_LIST: Tuple[Dict[str, Any], ...] = tuple(
+    {
+        "template_id": info.template_id,
+        "description": info.description,
+        "required_vars": tuple(info.required_vars),
+        "optional_vars": tuple(info.optional_vars),
+    }
+    for _tid, info in sorted(_TEMPLATES.items(), key=lambda kv: kv[0])
+)
+
+
 def list_report_text_templates() -> List[Dict[str, Any]]:
-    out: List[Dict[str, Any]] = []
-    for tid, info in sorted(_TEMPLATES.items(), key=lambda kv: kv[0]):
-        out.append(
-            {
-                "template_id": info.template_id,
-                "description": info.description,
-                "required_vars": list(info.required_vars),
-                "optional_vars": list(info.optional_vars),
-            }
-        )
-    return out
+    return [
+        {
+            "template_id": item["template_id"],
+            "description": item["description"],
+            "required_vars": list(item["required_vars"]),
+            "optional_vars": list(item["optional_vars"]),
+        }
+        for item in _TEMPLATES_LIST
+    ]
+
+
+_fromisoformat = datetime.fromisoformat
 
+# 期間境界（日/週/月）の ISO 文字列はユーザー間で大半が共通なので、
+# パース結果と整形済みの期間行をプロセス内で再利用する。datetime は不変なので共有してよい。
+_ISO_CACHE_SIZE = 4096
 
+
+@lru_cache(maxsize=_ISO_CACHE_SIZE)
 def _parse_iso_to_dt_utc(iso_z: str) -> Optional[datetime]:
-    s = str(iso_z or "").strip()
+    s = iso_z.strip() if isinstance(iso_z, str) else str(iso_z or "").strip()
     if not s:
         return None
     try:
-        if s.endswith("Z"):
-            s = s[:-1] + "+00:00"
-        dt = datetime.fromisoformat(s)
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        return dt.astimezone(timezone.utc)
+        # Python 3.11+ の fromisoformat は末尾 Z をそのまま解釈できるので、まず直接渡す。
+        dt = _fromisoformat(s)
+    except ValueError:
+        if not s.endswith("Z"):
+            return None
+        try:
+            dt = _fromisoformat(s[:-1] + "+00:00")
+        except Exception:
+            return None
     except Exception:
         return None
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
 
 
+@lru_cache(maxsize=_ISO_CACHE_SIZE)
 def _format_range_jst(period_start_iso: str, period_end_iso: str) -> Optional[str]:
     s_dt = _parse_iso_to_dt_utc(period_start_iso)
     e_dt = _parse_iso_to_dt_utc(period_end_iso)
@@ -134,6 +162,12 @@ def _format_range_jst(period_start_iso: str, period_end_iso: str) -> Optional[st
     return f"対象期間（JST）: {s.year}/{s.month}/{s.day} 00:00 〜 {e.year}/{e.month}/{e.day} 23:59"
 
 
+def clear_report_text_caches() -> None:
+    """Drop memoized ISO parse / range label results (tests, TZ changes)."""
+    _parse_iso_to_dt_utc.cache_clear()
+    _format_range_jst.cache_clear()
+
+
 def _dominant_label(metrics: Dict[str, Any]) -> str:
     try:
         dom = metrics.get("dominantKey") or None
@@ -144,21 +178,36 @@ def _dominant_label(metrics: Dict[str, Any]) -> str:
 
     totals = metrics.get("totals") if isinstance(metrics, dict) else None
     if isinstance(totals, dict):
-        best_k: Optional[str] = None
+        best_jp: Optional[str] = None
         best_v = 0
-        for k in _EMOTION_KEYS:
-            try:
-                v = int(totals.get(k, 0))
-            except Exception:
-                v = 0
+        for k, jp in _EMOTION_KEYS_JP:
+            v = totals.get(k, 0)
+            # 通常は int なので try ブロックを張らずに済ませる。
+            if not isinstance(v, int):
+                try:
+                    v = int(v)
+                except Exception:
+                    continue
             if v > best_v:
                 best_v = v
-                best_k = k
-        if best_k and best_v > 0:
-            return _KEY_TO_JP.get(best_k, best_k)
+                best_jp = jp
+        if best_jp and best_v > 0:
+            return best_jp
     return "—"
 
 
+class _RenderVars(NamedTuple):
+    """Normalized MyWeb render inputs (coerced once in render_myweb_report_text)."""
+
+    report_type: str
+    title: str
+    period_start_iso: str
+    period_end_iso: str
+    metrics: Dict[str, Any]
+    astor_text: Optional[str]
+    lang: str
+
+
 def render_myweb_report_text(
     template_id: str,
     *,
@@ -177,15 +226,16 @@ def render_myweb_report_text(
     if rt not in ("daily", "weekly", "monthly"):
         rt = "daily"
 
-    vars_: Dict[str, Any] = {
-        "report_type": rt,
-        "title": str(title or "").strip(),
-        "period_start_iso": str(period_start_iso or "").strip(),
-        "period_end_iso": str(period_end_iso or "").strip(),
-        "metrics": metrics or {},
-        "astor_text": (str(astor_text).strip() if astor_text else None),
-        "lang": str(lang or "ja").strip().lower() or "ja",
-    }
+    # 入力の正規化はここで一度だけ行い、各テンプレは属性を読むだけにする。
+    vars_ = _RenderVars(
+        report_type=rt,
+        title=str(title or "").strip(),
+        period_start_iso=str(period_start_iso or "").strip(),
+        period_end_iso=str(period_end_iso or "").strip(),
+        metrics=metrics if isinstance(metrics, dict) else {},
+        astor_text=(str(astor_text).strip() or None) if astor_text else None,
+        lang=str(lang or "ja").strip().lower() or "ja",
+    )
 
     try:
         if tid == "myweb_report_text_ja_compact_v1":
@@ -200,84 +250,63 @@ def render_myweb_report_text(
             return str(title or "").strip()
 
 
-def _tpl_myweb_report_text_ja_v1(vars_: Dict[str, Any]) -> str:
-    title = str(vars_.get("title") or "").strip()
-    ps = str(vars_.get("period_start_iso") or "").strip()
-    pe = str(vars_.get("period_end_iso") or "").strip()
-    metrics = vars_.get("metrics") or {}
-    astor_text = str(vars_.get("astor_text") or "").strip() or None
-
-    lines: List[str] = []
-    if title:
-        lines.append(title)
-        lines.append("")
-
-    range_line = _format_range_jst(ps, pe)
-    if range_line:
-        lines.append(range_line)
-        lines.append("")
-
-    lines.append("【感情の重み付け合計】")
+def _int_totals(metrics: Any) -> Tuple[int, ...]:
+    """Per-emotion totals as ints, in _EMOTION_KEYS_JP order."""
     totals = metrics.get("totals") if isinstance(metrics, dict) else None
     totals = totals if isinstance(totals, dict) else {}
-    for k in _EMOTION_KEYS:
-        try:
-            v = int(totals.get(k, 0))
-        except Exception:
-            v = 0
-        lines.append(f"- {_KEY_TO_JP.get(k, k)}: {v}")
+    out = []
+    for k, _jp in _EMOTION_KEYS_JP:
+        v = totals.get(k, 0)
+        if not isinstance(v, int):
+            try:
+                v = int(v)
+            except Exception:
+                v = 0
+        out.append(v)
+    return tuple(out)
 
-    lines.append("")
-    lines.append(f"中心に出ている傾向: {_dominant_label(metrics if isinstance(metrics, dict) else {})}")
 
-    if astor_text:
-        lines.append("")
-        lines.append("【ASTOR 構造洞察（補足）】")
-        lines.append(astor_text)
+# テンプレの固定部分（見出し・感情ラベル）は import 時に format 文字列へ畳み込み、
+# 描画時は数値と傾向ラベルを流し込むだけにする。
+_V1_TOTALS_FMT = (
+    "【感情の重み付け合計】\n"
+    + "\n".join(f"- {jp}: {{}}" for _k, jp in _EMOTION_KEYS_JP)
+    + "\n\n中心に出ている傾向: {}"
+)
+_V1_ASTOR_HEADER = "【ASTOR 構造洞察（補足）】\n"
+_COMPACT_SUMMARY_FMT = "傾向: {} / 合計: " + " ".join(f"{jp}{{}}" for _k, jp in _EMOTION_KEYS_JP)
 
-    return "\n".join(lines).strip()
 
+def _tpl_myweb_report_text_ja_v1(vars_: _RenderVars) -> str:
+    metrics = vars_.metrics
+    astor_text = vars_.astor_text
 
-def _tpl_myweb_report_text_ja_compact_v1(vars_: Dict[str, Any]) -> str:
-    title = str(vars_.get("title") or "").strip()
-    ps = str(vars_.get("period_start_iso") or "").strip()
-    pe = str(vars_.get("period_end_iso") or "").strip()
-    metrics = vars_.get("metrics") or {}
-    astor_text = str(vars_.get("astor_text") or "").strip() or None
+    body = _V1_TOTALS_FMT.format(*_int_totals(metrics), _dominant_label(metrics))
+    range_line = _format_range_jst(vars_.period_start_iso, vars_.period_end_iso)
+    astor_block = _V1_ASTOR_HEADER + astor_text if astor_text else ""
+    # 各ブロックは空行区切り。空ブロック（title / range / ASTOR なし）は filter で落とす
+    return "\n\n".join(filter(None, (vars_.title, range_line, body, astor_block)))
 
-    totals = metrics.get("totals") if isinstance(metrics, dict) else None
-    totals = totals if isinstance(totals, dict) else {}
 
-    # 1行サマリ
-    parts: List[str] = []
-    parts.append(f"傾向: {_dominant_label(metrics if isinstance(metrics, dict) else {})}")
-    # 例: 合計: 喜10 悲2 不安0 ...
-    sums = []
-    for k in _EMOTION_KEYS:
-        try:
-            v = int(totals.get(k, 0))
-        except Exception:
-            v = 0
-        jp = _KEY_TO_JP.get(k, k)
-        sums.append(f"{jp}{v}")
-    parts.append("合計: " + " ".join(sums))
-
-    lines: List[str] = []
-    if title:
-        lines.append(title)
-    range_line = _format_range_jst(ps, pe)
-    if range_line:
-        lines.append(range_line)
-    lines.append(" / ".join(parts))
+def _tpl_myweb_report_text_ja_compact_v1(vars_: _RenderVars) -> str:
+    metrics = vars_.metrics
+    astor_text = vars_.astor_text
+
+    # 1行サマリ（例: 傾向: 喜び / 合計: 喜び10 悲しみ2 不安0 ...）
+    summary = _COMPACT_SUMMARY_FMT.format(_dominant_label(metrics), *_int_totals(metrics))
 
+    astor_line = ""
     if astor_text:
-        # compact: 1行だけ添える
-        short = astor_text.replace("\n", " ").strip()
-        if len(short) > 120:
-            short = short[:120] + "…"
-        lines.append(f"ASTOR: {short}")
+        # compact: 1行だけ添える。astor_text は strip 済みなので、先に 120 字で切ってから
+        # 改行を置換しても結果は同じ（長い ASTOR 本文全体をコピーしない）
+        short = astor_text[:120].replace("\n", " ")
+        if len(astor_text) > 120:
+            short += "…"
+        astor_line = f"ASTOR: {short}"
 
-    return "\n".join([x for x in lines if str(x or "").strip()]).strip()
+    # 空要素（title / range / ASTOR なし）は filter で一度に落とす
+    range_line = _format_range_jst(vars_.period_start_iso, vars_.period_end_iso)
+    return "\n".join(filter(None, (vars_.title, range_line, summary, astor_line))).strip()
 
 
 def apply_myprofile_report_text_template(
@@ -305,14 +334,18 @@ def apply_myprofile_report_text_template(
     if tid == "myprofile_report_text_wrap_ja_v1":
         # 先頭の見出しだけ整えて包む（内部の章立ては raw_text のまま）
         # 例: ASTORは先頭に "【自己構造分析レポート（月次）】" を付けるので、二重を避ける
+        # 先頭からの pop(0) は O(n) なので、インデックスを進めて最後に一度だけスライスする
         body_lines = text.splitlines()
+        n = len(body_lines)
+        i = 0
         # drop leading empty
-        while body_lines and not str(body_lines[0]).strip():
-            body_lines.pop(0)
-        if body_lines and str(body_lines[0]).strip().startswith("【自己構造分析レポート"):
-            body_lines.pop(0)
-            while body_lines and not str(body_lines[0]).strip():
-                body_lines.pop(0)
+        while i < n and not body_lines[i].strip():
+            i += 1
+        if i < n and body_lines[i].strip().startswith("【自己構造分析レポート"):
+            i += 1
+            while i < n and not body_lines[i].strip():
+                i += 1
+        body_lines = body_lines[i:]
 
         header = "【自己構造分析レポート】"
         if title and "月次" in str(title):
@@ -26,7 +26,8 @@ from __future__ import annotations
 
 import copy
 from dataclasses import dataclass
-from typing import Any, Dict, List
+from types import MappingProxyType
+from typing import Any, Dict, List, Tuple
 
 
 DEFAULT_MYPROFILE_SECTION_TEXT_TEMPLATE_ID = "myprofile_sections_ja_v1"
@@ -185,11 +186,15 @@ _TEMPLATE_INFOS: Dict[str, MyProfileSectionTemplateInfo] = {
 }
 
 
+# list_myprofile_section_text_templates() 用。レジストリは不変なので import 時に一度だけ組み立てる。
+_SECTION_TEMPLATE_LIST: Tuple[Dict[str, str], ...] = tuple(
+    {"template_id": info.template_id, "description": info.description}
+    for _tid, info in sorted(_TEMPLATE_INFOS.items(), key=lambda kv: kv[0])
+)
+
+
 def list_myprofile_section_text_templates() -> List[Dict[str, Any]]:
-    out: List[Dict[str, Any]] = []
-    for tid, info in sorted(_TEMPLATE_INFOS.items(), key=lambda kv: kv[0]):
-        out.append({"template_id": info.template_id, "description": info.description})
-    return out
+    return [dict(item) for item in _SECTION_TEMPLATE_LIST]
 
 
 def _deep_merge(dst: Dict[str, Any], src: Dict[str, Any]) -> Dict[str, Any]:
@@ -201,19 +206,45 @@ def _deep_merge(dst: Dict[str, Any], src: Dict[str, Any]) -> Dict[str, Any]:
     return dst
 
 
-def get_myprofile_section_phrases(template_id: str) -> Dict[str, Any]:
-    """Return phrases dict for template_id. Always returns a fully-populated dict."""
-    tid = str(template_id or "").strip() or DEFAULT_MYPROFILE_SECTION_TEXT_TEMPLATE_ID
+def _freeze(v: Any) -> Any:
+    if isinstance(v, list):
+        return tuple(_freeze(x) for x in v)
+    if isinstance(v, dict):
+        return MappingProxyType({k: _freeze(x) for k, x in v.items()})
+    return v
 
+
+def _build_merged_phrases(template_id: str) -> Dict[str, Any]:
     base = copy.deepcopy(_MYPROFILE_SECTION_TEMPLATES[DEFAULT_MYPROFILE_SECTION_TEXT_TEMPLATE_ID])
-    if tid != DEFAULT_MYPROFILE_SECTION_TEXT_TEMPLATE_ID and tid in _MYPROFILE_SECTION_TEMPLATES:
-        _deep_merge(base, copy.deepcopy(_MYPROFILE_SECTION_TEMPLATES[tid]))
-    return base
+    if template_id != DEFAULT_MYPROFILE_SECTION_TEXT_TEMPLATE_ID:
+        _deep_merge(base, copy.deepcopy(_MYPROFILE_SECTION_TEMPLATES[template_id]))
+    return {k: _freeze(v) for k, v in base.items()}
+
+
+# default との deep merge は import 時に一度だけ行い、ネストした値は
+# tuple / MappingProxyType に凍結しておく（呼び出し側は読むだけなので共有できる）。
+_MERGED_PHRASES: Dict[str, Dict[str, Any]] = {
+    tid: _build_merged_phrases(tid) for tid in _MYPROFILE_SECTION_TEMPLATES
+}
+
+
+def get_myprofile_section_phrases(template_id: str) -> Dict[str, Any]:
+    """Return phrases dict for template_id. Always returns a fully-populated dict.
+
+    The dict itself is a fresh shallow copy; list-valued phrases are tuples.
+    """
+    tid = str(template_id or "").strip() or DEFAULT_MYPROFILE_SECTION_TEXT_TEMPLATE_ID
+    merged = _MERGED_PHRASES.get(tid) or _MERGED_PHRASES[DEFAULT_MYPROFILE_SECTION_TEXT_TEMPLATE_ID]
+    return dict(merged)
 
 
 def safe_format(template: str, **kwargs: Any) -> str:
     """Safe str.format: never throws."""
+    t = template or ""
+    # 固定文（プレースホルダ無し）が大半なので、format のパースを省く。
+    if isinstance(t, str) and "{" not in t and "}" not in t:
+        return t
     try:
-        return str(template or "").format(**kwargs)
+        return str(t).format(**kwargs)
     except Exception:
-        return str(template or "")
+        return str(t)
@@ -11,12 +11,32 @@ from __future__ import annotations
 
 import json
 import logging
+import re
+import threading
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+
+try:  # optional: bytes を直接パースでき、stdlib json より速い
+    import orjson as _orjson
+except ImportError:  # pragma: no cover - orjson 未導入環境は stdlib json
+    _orjson = None
 
 logger = logging.getLogger("mymodel.structure_dict")
 
 _STRUCTURE_CACHE: Optional[Dict[str, Any]] = None
+# 初回ロードが並行した場合でも JSON のパース / 索引構築を 1 回に抑える
+_LOAD_LOCK = threading.Lock()
+
+# _find_matching_entries 用の索引（辞書ロード後に一度だけ構築）。
+# (entries, [(term_jp, term_en_lower, entry), ...], JP 語の alternation, EN 語の alternation)
+_TermIndex = Tuple[Dict[str, Any], List[Tuple[str, str, Any]], Optional[Pattern[str]], Optional[Pattern[str]]]
+_TERM_INDEX: Optional[_TermIndex] = None
+
+# 定義質問の判定パターン。1 回の走査で済むよう alternation に束ねて事前コンパイルする。
+_DEFINITION_PATTERNS_JA = ("とは？", "とは何", "とはなに", "って何", "ってなに", "ってなんですか")
+_DEFINITION_PATTERNS_EN = ("what is ", "what's ", "explain ", "definition of ")
+_DEFINITION_JA_RE = re.compile("|".join(map(re.escape, _DEFINITION_PATTERNS_JA)))
+_DEFINITION_EN_RE = re.compile("|".join(map(re.escape, _DEFINITION_PATTERNS_EN)))
 
 
 def _candidate_paths() -> list[Path]:
@@ -37,6 +57,12 @@ def _candidate_paths() -> list[Path]:
     return candidates
 
 
+def _load_json_file(p: Path) -> Any:
+    if _orjson is not None:
+        return _orjson.loads(p.read_bytes())
+    return json.loads(p.read_text(encoding="utf-8"))
+
+
 def load_structure_dict() -> Dict[str, Any]:
     """
     Mash構造辞書(JSON)を読み込んで返す。
@@ -48,10 +74,22 @@ def load_structure_dict() -> Dict[str, Any]:
     if _STRUCTURE_CACHE is not None:
         return _STRUCTURE_CACHE
 
+    with _LOAD_LOCK:
+        if _STRUCTURE_CACHE is not None:
+            return _STRUCTURE_CACHE
+
+        entries = _read_structure_entries()
+        # 照合用の索引もここで作っておき、最初のリクエストで組み立てずに済むようにする
+        _get_term_index(entries)
+        _STRUCTURE_CACHE = entries
+        return _STRUCTURE_CACHE
+
+
+def _read_structure_entries() -> Dict[str, Any]:
     for p in _candidate_paths():
         if p.exists():
             try:
-                raw = json.loads(p.read_text(encoding="utf-8"))
+                raw = _load_json_file(p)
                 if isinstance(raw, dict) and "entries" in raw and isinstance(raw["entries"], dict):
                     entries = raw["entries"]
                 elif isinstance(raw, dict):
@@ -59,32 +97,63 @@ def load_structure_dict() -> Dict[str, Any]:
                 else:
                     logger.warning("structure_dictionary.json is not a dict: %r", type(raw))
                     entries = {}
-                _STRUCTURE_CACHE = entries
                 logger.info("Loaded structure_dictionary.json from %s (entries=%d)", p, len(entries))
-                return _STRUCTURE_CACHE
+                return entries
             except Exception as e:
                 logger.warning("Failed to load structure_dictionary.json at %s: %s", p, e)
 
     logger.info("structure_dictionary.json not found; proceeding without structure dict.")
-    _STRUCTURE_CACHE = {}
-    return _STRUCTURE_CACHE
+    return {}
 
 
-def _is_definition_query(instr: str, lang: str) -> bool:
+def _is_definition_query(stripped: str, lower: str, lang: str) -> bool:
     """
     「◯◯とは？」「◯◯って何？」のような“定義を聞いている”照会かどうかをざっくり判定。
+    stripped / lower は build_structure_answer 側で一度だけ作ったものを受け取る。
     """
-    t = instr.strip()
     if lang == "ja":
-        patterns = ["とは？", "とは何", "とはなに", "って何", "ってなに", "ってなんですか"]
-        return any(p in t for p in patterns)
-    else:
-        lower = t.lower()
-        patterns_en = ["what is ", "what's ", "explain ", "definition of "]
-        return any(p in lower for p in patterns_en)
+        return _DEFINITION_JA_RE.search(stripped) is not None
+    return _DEFINITION_EN_RE.search(lower) is not None
+
+
+def _compile_alternation(terms: List[str]) -> Optional[Pattern[str]]:
+    uniq = sorted({t for t in terms if t}, key=len, reverse=True)
+    if not uniq:
+        return None
+    return re.compile("|".join(map(re.escape, uniq)))
+
 
+def _get_term_index(entries: Dict[str, Any]) -> _TermIndex:
+    """entries から照合用の索引を作る（entries が変わらない限り再利用）。"""
+    global _TERM_INDEX
+    idx = _TERM_INDEX
+    if idx is not None and idx[0] is entries:
+        return idx
 
-def _find_matching_entries(instr: str, lang: str) -> Dict[str, Any]:
+    terms: List[Tuple[str, str, Any]] = []
+    skipped = 0
+    for key, entry in entries.items():
+        if not isinstance(entry, dict):
+            # 壊れたエントリ 1 件で辞書全体が使えなくならないよう、索引から外すだけにする
+            skipped += 1
+            continue
+        term_jp = str(entry.get("term_jp") or key).strip()
+        term_en = str(entry.get("term_en") or "").strip().lower()
+        terms.append((term_jp, term_en, entry))
+    if skipped:
+        logger.warning("structure_dictionary.json: skipped %d malformed entries (not an object)", skipped)
+
+    idx = (
+        entries,
+        terms,
+        _compile_alternation([t[0] for t in terms]),
+        _compile_alternation([t[1] for t in terms]),
+    )
+    _TERM_INDEX = idx
+    return idx
+
+
+def _find_matching_entries(text: str, lower: str, lang: str) -> Dict[str, Any]:
     """
     照会文に含まれている構造語（日本語/英語ラベル）を辞書から探す。
     戻り値は {term_jp: entry, ...}
@@ -93,20 +162,18 @@ def _find_matching_entries(instr: str, lang: str) -> Dict[str, Any]:
     if not entries:
         return {}
 
-    text = instr
-    lower = instr.lower()
-    hits: Dict[str, Any] = {}
+    _, terms, jp_re, en_re = _get_term_index(entries)
 
-    for key, entry in entries.items():
-        term_jp = str(entry.get("term_jp") or key).strip()
-        term_en = str(entry.get("term_en") or "").strip()
+    # どの構造語も含まれていない照会（大半）は、alternation 1 回の走査で打ち切る。
+    if not ((jp_re is not None and jp_re.search(text)) or (en_re is not None and en_re.search(lower))):
+        return {}
 
+    hits: Dict[str, Any] = {}
+    for term_jp, term_en, entry in terms:
         if term_jp and term_jp in text:
             hits[term_jp] = entry
-            continue
-        if term_en and term_en.lower() in lower:
+        elif term_en and term_en in lower:
             hits[term_jp] = entry
-            continue
 
     return hits
 
@@ -116,10 +183,12 @@ def build_structure_answer(instr: str, lang: str = "ja") -> Optional[str]:
     照会文が「定義質問」で、かつ構造語がヒットした場合に、
     Mash構造辞書をもとにした説明文を返す。該当しなければ None。
     """
-    if not _is_definition_query(instr, lang):
+    stripped = instr.strip()
+    lower = stripped.lower()
+    if not _is_definition_query(stripped, lower, lang):
         return None
 
-    hits = _find_matching_entries(instr, lang)
+    hits = _find_matching_entries(stripped, lower, lang)
     if not hits:
         return None
 
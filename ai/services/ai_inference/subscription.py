@@ -21,7 +21,7 @@ Design notes:
 from __future__ import annotations
 
 from enum import Enum
-from typing import Dict, Iterable, List, Optional, Tuple, Union
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple, Union
 
 
 class SubscriptionTier(str, Enum):
@@ -61,6 +61,11 @@ TIER_ALLOWED_MYPROFILE_MODES: Dict[SubscriptionTier, Tuple[MyProfileMode, ...]]
     SubscriptionTier.PREMIUM: (MyProfileMode.LIGHT, MyProfileMode.STANDARD, MyProfileMode.STRUCTURAL),
 }
 
+# Derived from TIER_ALLOWED_MYPROFILE_MODES: (tier, mode) membership is a single hash lookup.
+_ALLOWED_TIER_MODE_PAIRS: FrozenSet[Tuple[SubscriptionTier, MyProfileMode]] = frozenset(
+    (tier, mode) for tier, modes in TIER_ALLOWED_MYPROFILE_MODES.items() for mode in modes
+)
+
 
 # --- Normalization helpers ---
 _TIER_ALIASES: Dict[str, SubscriptionTier] = {
@@ -117,7 +122,14 @@ def normalize_subscription_tier(tier: TierLike, *, default: SubscriptionTier = S
 
     if tier is None:
         return default
-    if isinstance(tier, SubscriptionTier):
+    if type(tier) is SubscriptionTier:
+        return tier
+    # Fast path: already-clean alias strings ("free", "Plus", ...) skip str()/strip().
+    if type(tier) is str:
+        hit = _TIER_ALIASES.get(tier)
+        if hit is not None:
+            return hit
+    elif isinstance(tier, SubscriptionTier):
         return tier
     s = str(tier).strip()
     if not s:
@@ -135,7 +147,13 @@ def normalize_myprofile_mode(mode: ModeLike, *, default: MyProfileMode = MyProfi
 
     if mode is None:
         return default
-    if isinstance(mode, MyProfileMode):
+    if type(mode) is MyProfileMode:
+        return mode
+    if type(mode) is str:
+        hit = _MODE_ALIASES.get(mode)
+        if hit is not None:
+            return hit
+    elif isinstance(mode, MyProfileMode):
         return mode
     s = str(mode).strip()
     if not s:
@@ -167,10 +185,7 @@ def allowed_self_structure_modes_for_tier(tier: TierLike) -> List[MyProfileMode]
 def is_myprofile_mode_allowed(tier: TierLike, mode: ModeLike) -> bool:
     """True if tier allows the mode."""
 
-    t = normalize_subscription_tier(tier)
-    m = normalize_myprofile_mode(mode)
-    allowed = TIER_ALLOWED_MYPROFILE_MODES.get(t, (MyProfileMode.LIGHT,))
-    return m in allowed
+    return (normalize_subscription_tier(tier), normalize_myprofile_mode(mode)) in _ALLOWED_TIER_MODE_PAIRS
 
 
 
@@ -183,9 +198,9 @@ def is_self_structure_mode_allowed(tier: TierLike, mode: ModeLike) -> bool:
 def assert_myprofile_mode_allowed(tier: TierLike, mode: ModeLike) -> None:
     """Raise ValueError if tier does not allow the mode."""
 
-    if not is_myprofile_mode_allowed(tier, mode):
-        t = normalize_subscription_tier(tier)
-        m = normalize_myprofile_mode(mode)
+    t = normalize_subscription_tier(tier)
+    m = normalize_myprofile_mode(mode)
+    if (t, m) not in _ALLOWED_TIER_MODE_PAIRS:
         allowed = ",".join([x.value for x in allowed_myprofile_modes_for_tier(t)])
         raise ValueError(f"MyProfile mode '{m.value}' is not allowed for tier '{t.value}'. Allowed: {allowed}")
 
@@ -37,14 +37,31 @@ alter table public.profiles
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
+import threading
 import time
-from typing import Any, Dict, Optional, Tuple
+import uuid
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
 
 import httpx
 
+try:  # optional: parses resp.content bytes directly, faster than stdlib json
+    import orjson as _orjson
+except ImportError:  # pragma: no cover - fall back to httpx's stdlib json
+    _orjson = None
+
+from redis_cache import l2_delete_soon, l2_enabled, l2_get, l2_set_soon
 from subscription import SubscriptionTier, TierLike, normalize_subscription_tier
+from supabase_auth_token_cache import (
+    lookup_cached_user_id,
+    remember_verified_user_id,
+    resolve_user_id_verified_cached,
+    token_verification_enabled,
+)
 
 # Shared Supabase HTTP client (connection pooled)
 from supabase_client import (
@@ -57,6 +74,13 @@ from supabase_client import (
 
 logger = logging.getLogger("subscription_store")
 
+
+def _resp_json(resp: httpx.Response) -> Any:
+    """resp.json(), parsed with orjson when available. Raises on invalid JSON."""
+    if _orjson is not None:
+        return _orjson.loads(resp.content)
+    return resp.json()
+
 SUPABASE_URL = os.getenv("SUPABASE_URL", "").rstrip("/")
 SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY", "")
 
@@ -70,36 +94,153 @@ TIER_COLUMN = os.getenv("COCOLON_SUBSCRIPTION_TIER_COLUMN", "subscription_tier")
 # - Process-local (not shared across instances).
 TIER_CACHE_TTL_SECONDS = int(os.getenv("COCOLON_SUBSCRIPTION_TIER_CACHE_TTL_SECONDS", "60") or "60")
 TIER_CACHE_MAX_ITEMS = int(os.getenv("COCOLON_SUBSCRIPTION_TIER_CACHE_MAX_ITEMS", "5000") or "5000")
-_tier_cache: Dict[str, Tuple[float, SubscriptionTier]] = {}
+# Failed lookups (network / 5xx) cache the fail-closed default only briefly, so a
+# Supabase incident does not turn every request into another doomed round-trip.
+TIER_CACHE_NEGATIVE_TTL_SECONDS = int(os.getenv("COCOLON_SUBSCRIPTION_TIER_NEGATIVE_TTL_SECONDS", "10") or "10")
+# Stale-while-revalidate: for this many seconds past the TTL an entry is still
+# served, while a background task refreshes it (0 disables the stale window).
+# Off by default (fail-closed): a downgrade made outside set_subscription_tier_for_user
+# (e.g. a store webhook that misses invalidate_tier_cache) keeps paid access for up
+# to TTL + this window, so only enable it where that extra entitlement is acceptable.
+TIER_CACHE_STALE_SECONDS = int(os.getenv("COCOLON_SUBSCRIPTION_TIER_CACHE_STALE_SECONDS", "0") or "0")
+# LRU: uid -> (fresh_until, stale_until, tier, etag), deadlines on time.monotonic(). Evicts the
+# least recently used entry when full (same pattern as supabase_auth_token_cache) instead of
+# dropping the whole cache. etag is the profile response's ETag (if any), used by refreshes.
+_tier_cache_lock = threading.Lock()
+_tier_cache: "OrderedDict[str, Tuple[float, float, SubscriptionTier, Optional[str]]]" = OrderedDict()
 
 
 def _tier_cache_get(user_id: str) -> Optional[SubscriptionTier]:
-    if int(TIER_CACHE_TTL_SECONDS) <= 0:
-        return None
     uid = str(user_id or "").strip()
     if not uid:
         return None
-    now = time.time()
-    ent = _tier_cache.get(uid)
-    if not ent:
-        return None
-    exp, tier = ent
-    if exp <= now:
-        _tier_cache.pop(uid, None)
+    return _tier_cache_lookup(uid)
+
+
+def _tier_cache_lookup(uid: str) -> Optional[SubscriptionTier]:
+    """Cache probe for an already-normalized uid."""
+    if TIER_CACHE_TTL_SECONDS <= 0:
         return None
+    now = time.monotonic()
+    with _tier_cache_lock:
+        ent = _tier_cache.get(uid)
+        if not ent:
+            return None
+        fresh_until, stale_until, tier, _etag = ent
+        if stale_until <= now:
+            del _tier_cache[uid]
+            return None
+        _tier_cache.move_to_end(uid)
+    if fresh_until <= now:
+        _schedule_tier_refresh(uid)
     return tier
 
 
-def _tier_cache_set(user_id: str, tier: SubscriptionTier) -> None:
-    if int(TIER_CACHE_TTL_SECONDS) <= 0:
+def _tier_cache_set(
+    user_id: str,
+    tier: SubscriptionTier,
+    *,
+    ttl: Optional[float] = None,
+    etag: Optional[str] = None,
+    share: bool = True,
+) -> None:
+    """Cache a tier. An explicit ``ttl`` (negative caching) gets no stale window.
+
+    Normal-TTL entries are also written to the optional Redis L2 (``share``)
+    so other workers can skip Supabase; negative entries stay process-local.
+    """
+    if TIER_CACHE_TTL_SECONDS <= 0:
         return
     uid = str(user_id or "").strip()
     if not uid:
         return
-    # Simple bound to avoid unbounded memory (safe for MVP).
-    if int(TIER_CACHE_MAX_ITEMS) > 0 and len(_tier_cache) >= int(TIER_CACHE_MAX_ITEMS):
-        _tier_cache.clear()
-    _tier_cache[uid] = (time.time() + float(int(TIER_CACHE_TTL_SECONDS)), tier)
+    if ttl is None:
+        ttl_s = float(TIER_CACHE_TTL_SECONDS)
+        stale_s = float(max(0, TIER_CACHE_STALE_SECONDS))
+    else:
+        ttl_s = float(ttl)
+        stale_s = 0.0
+    if ttl_s <= 0:
+        return
+    fresh_until = time.monotonic() + ttl_s
+    max_items = TIER_CACHE_MAX_ITEMS
+    with _tier_cache_lock:
+        _tier_cache[uid] = (fresh_until, fresh_until + stale_s, tier, etag)
+        _tier_cache.move_to_end(uid)
+        if max_items > 0:
+            while len(_tier_cache) > max_items:
+                _tier_cache.popitem(last=False)
+    if share and ttl is None:
+        l2_set_soon(_tier_l2_key(uid), ttl_s, tier.value)
+
+
+def _tier_l2_key(uid: str) -> str:
+    return f"tier:{uid}"
+
+
+async def _tier_l2_get(uid: str) -> Optional[SubscriptionTier]:
+    raw = await l2_get(_tier_l2_key(uid))
+    if not raw:
+        return None
+    return normalize_subscription_tier(raw)
+
+
+# Strong refs to background refresh tasks (the event loop only keeps weak ones).
+_tier_refresh_tasks: "set[asyncio.Task[None]]" = set()
+# uids with a refresh scheduled or running (one refresh per uid at a time).
+_tier_refreshing: "set[str]" = set()
+
+
+def _schedule_tier_refresh(uid: str) -> None:
+    if uid in _tier_refreshing:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return  # no loop (sync caller): serve the stale value without refreshing
+    _tier_refreshing.add(uid)
+    task = loop.create_task(_refresh_tier(uid))
+    _tier_refresh_tasks.add(task)
+    task.add_done_callback(_tier_refresh_tasks.discard)
+
+
+async def _refresh_tier(uid: str) -> None:
+    try:
+        with _tier_cache_lock:
+            ent = _tier_cache.get(uid)
+        etag = ent[3] if ent else None
+        row, new_etag = await _fetch_profile_row(uid, if_none_match=etag)
+    except _ProfileFetchError:
+        return  # keep serving the stale entry until it expires
+    finally:
+        _tier_refreshing.discard(uid)
+
+    if row is _NOT_MODIFIED:
+        # Unchanged since the cached response: extend the entry without re-parsing.
+        if ent is not None:
+            _tier_cache_set(uid, ent[2], etag=etag)
+        return
+    tier = normalize_subscription_tier(row.get(TIER_COLUMN)) if row else SubscriptionTier.FREE
+    _tier_cache_set(uid, tier, etag=new_etag)
+
+
+def invalidate_tier_cache(user_id: Optional[str] = None) -> None:
+    """Evict a cached tier (or every cached tier when ``user_id`` is None).
+
+    Call this when a tier may have changed outside :func:`set_subscription_tier_for_user`
+    (e.g. store webhooks / manual DB edits) so the next lookup goes to Supabase.
+    A single uid is also removed from the Redis L2; a full clear only affects
+    this process (L2 entries then expire on their own TTL).
+    """
+    with _tier_cache_lock:
+        if user_id is None:
+            _tier_cache.clear()
+            return
+        uid = str(user_id or "").strip()
+        if uid:
+            _tier_cache.pop(uid, None)
+    if uid:
+        l2_delete_soon(_tier_l2_key(uid))
 
 
 def _ensure_supabase_config() -> None:
@@ -111,33 +252,131 @@ def _sb_headers() -> Dict[str, str]:
     return _sb_headers_shared()
 
 
-async def _fetch_profile_row(user_id: str) -> Optional[Dict[str, Any]]:
+# PostgREST returns a bare JSON object (not a 1-element array) with this Accept,
+# and 406 when no row matches.
+_PGRST_SINGLE_OBJECT_ACCEPT = "application/vnd.pgrst.object+json"
+
+
+# Built once (the service_role key is fixed per process) and shared read-only;
+# sb_request copies the mapping before adding anything to it.
+_single_row_headers: Optional[Mapping[str, str]] = None
+
+
+def _sb_single_row_headers() -> Mapping[str, str]:
+    global _single_row_headers
+    h = _single_row_headers
+    if h is None:
+        h = MappingProxyType({**_sb_headers(), "Accept": _PGRST_SINGLE_OBJECT_ACCEPT})
+        _single_row_headers = h
+    return h
+
+
+# Narrow projection for tier lookups. If the tier column is missing in some env
+# (schema drift), fall back to select=id and probe the column again after
+# TIER_COLUMN_REPROBE_SECONDS (a migration may add it without a restart):
+# select=* would not contain the column either, so the row only tells us the
+# profile exists and the caller falls back to the default tier.
+TIER_COLUMN_REPROBE_SECONDS = 300.0
+_select_tier_column_only = True
+_tier_column_reprobe_at = 0.0
+
+
+def _tier_column_selectable() -> bool:
+    global _select_tier_column_only
+    if not _select_tier_column_only and time.monotonic() >= _tier_column_reprobe_at:
+        _select_tier_column_only = True
+    return _select_tier_column_only
+
+
+def _mark_tier_column_missing() -> None:
+    global _select_tier_column_only, _tier_column_reprobe_at
+    _select_tier_column_only = False
+    _tier_column_reprobe_at = time.monotonic() + TIER_COLUMN_REPROBE_SECONDS
+    logger.warning(
+        "profiles.%s is not selectable; falling back to select=id for tier lookups (re-probe in %ss)",
+        TIER_COLUMN,
+        TIER_COLUMN_REPROBE_SECONDS,
+    )
+
+
+def _is_missing_column_error(resp: httpx.Response) -> bool:
+    """True only for PostgreSQL undefined_column (42703) on the tier column.
+
+    Other 400s (e.g. PGRST100 filter parse errors, whose message also says
+    "column N") must not switch the projection.
+    """
+    if resp.status_code != 400:
+        return False
+    try:
+        body = _resp_json(resp)
+    except Exception:
+        return False
+    if not isinstance(body, dict) or str(body.get("code") or "") != "42703":
+        return False
+    return TIER_COLUMN in str(body.get("message") or "")
+
+
+class _ProfileFetchError(Exception):
+    """The profile lookup failed (network / HTTP error / bad body), as opposed to no row."""
+
+    def __init__(self, reason: str, *, status: Optional[int] = None) -> None:
+        super().__init__(reason)
+        self.status = status
+
+
+# Returned in place of the row when If-None-Match matched (304 Not Modified).
+_NOT_MODIFIED: Any = object()
+
+# (row | None | _NOT_MODIFIED, response ETag or None)
+_ProfileFetch = Tuple[Any, Optional[str]]
+
+
+async def _fetch_profile_row(user_id: str, *, if_none_match: Optional[str] = None) -> _ProfileFetch:
     """Fetch a single profile row for the given user id.
 
-    Returns dict row or None.
+    Returns (row, etag): row is a dict, None when the row does not exist, or
+    _NOT_MODIFIED when ``if_none_match`` still matches (304).
+    Raises _ProfileFetchError when Supabase could not be queried.
     """
     _ensure_supabase_config()
     uid = str(user_id or "").strip()
     if not uid:
-        return None
+        return None, None
 
     params = {
-        # Keep '*' to be schema-tolerant (column might not exist in some envs).
-        "select": "*",
+        "select": TIER_COLUMN if _tier_column_selectable() else "id",
         "id": f"eq.{uid}",
-        "limit": "1",
     }
+    headers: Mapping[str, str] = _sb_single_row_headers()
+    if if_none_match:
+        headers = {**headers, "If-None-Match": if_none_match}
 
     try:
         resp = await _sb_get_shared(
             f"/rest/v1/{PROFILES_TABLE}",
             params=params,
-            headers=_sb_headers(),
+            headers=headers,
             timeout=5.0,
         )
+        if params["select"] != "id" and _is_missing_column_error(resp):
+            _mark_tier_column_missing()
+            params["select"] = "id"
+            resp = await _sb_get_shared(
+                f"/rest/v1/{PROFILES_TABLE}",
+                params=params,
+                headers=headers,
+                timeout=5.0,
+            )
     except Exception as exc:
         logger.warning("Supabase profile fetch failed (network): %s", exc)
-        return None
+        raise _ProfileFetchError("network") from exc
+
+    if resp.status_code == 304:
+        return _NOT_MODIFIED, if_none_match
+
+    if resp.status_code == 406:
+        # No profile row (single-object Accept).
+        return None, None
 
     if resp.status_code >= 300:
         logger.warning(
@@ -145,22 +384,207 @@ async def _fetch_profile_row(user_id: str) -> Optional[Dict[str, Any]]:
             resp.status_code,
             resp.text[:800],
         )
-        return None
+        raise _ProfileFetchError(f"status={resp.status_code}", status=resp.status_code)
 
     try:
-        rows = resp.json()
-    except Exception:
+        row = _resp_json(resp)
+    except Exception as exc:
         logger.warning("Supabase profile fetch returned non-JSON")
+        raise _ProfileFetchError("non-JSON body") from exc
+
+    etag = resp.headers.get("etag")
+    if isinstance(row, dict):
+        return row, etag
+
+    # Tolerate proxies that drop the Accept header and return the array form.
+    if isinstance(row, list) and row and isinstance(row[0], dict):
+        return row[0], etag
+
+    return None, etag
+
+
+# Max ids per `id=in.(...)` query (keeps the request URL well under proxy limits).
+_BATCH_FETCH_CHUNK = 100
+
+
+async def _fetch_profile_tier_rows(user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Fetch ``id`` + tier for several users with ``id=in.(...)`` queries (chunked).
+
+    Returns {uid: row} keyed by the canonical (lowercase) UUID; ids without a
+    profile row are absent.
+    Raises _ProfileFetchError when Supabase could not be queried.
+    """
+    _ensure_supabase_config()
+    out: Dict[str, Dict[str, Any]] = {}
+    for i in range(0, len(user_ids), _BATCH_FETCH_CHUNK):
+        chunk = user_ids[i : i + _BATCH_FETCH_CHUNK]
+        params = {
+            "select": f"id,{TIER_COLUMN}" if _tier_column_selectable() else "id",
+            "id": "in.(" + ",".join(f'"{uid}"' for uid in chunk) + ")",
+        }
+        try:
+            resp = await _sb_get_shared(
+                f"/rest/v1/{PROFILES_TABLE}",
+                params=params,
+                headers=_sb_headers(),
+                timeout=5.0,
+            )
+            if params["select"] != "id" and _is_missing_column_error(resp):
+                _mark_tier_column_missing()
+                params["select"] = "id"
+                resp = await _sb_get_shared(
+                    f"/rest/v1/{PROFILES_TABLE}",
+                    params=params,
+                    headers=_sb_headers(),
+                    timeout=5.0,
+                )
+        except Exception as exc:
+            logger.warning("Supabase profile batch fetch failed (network): %s", exc)
+            raise _ProfileFetchError("network") from exc
+
+        if resp.status_code >= 300:
+            logger.warning(
+                "Supabase profile batch fetch failed: status=%s body=%s",
+                resp.status_code,
+                resp.text[:800],
+            )
+            raise _ProfileFetchError(f"status={resp.status_code}", status=resp.status_code)
+
+        try:
+            rows = _resp_json(resp)
+        except Exception as exc:
+            logger.warning("Supabase profile batch fetch returned non-JSON")
+            raise _ProfileFetchError("non-JSON body") from exc
+
+        if isinstance(rows, list):
+            for row in rows:
+                if isinstance(row, dict) and row.get("id") is not None:
+                    rid = str(row["id"])
+                    out[_canonical_uuid(rid) or rid] = row
+    return out
+
+
+# Micro-batching: cold fetches queued in the same event-loop tick (e.g. a cron
+# fan-out gathering per-user jobs, or get_subscription_tiers_for_users) are
+# flushed together as one `id=in.(...)` query. A lone uid keeps the single-row
+# request so its ETag is recorded for later revalidation; non-UUID ids and the
+# ids of a batch Supabase rejects (4xx) also fall back to single-row requests.
+_ProfileBatch = Tuple[asyncio.AbstractEventLoop, Dict[str, "asyncio.Future[_ProfileFetch]"]]
+_profile_batch: Optional[_ProfileBatch] = None
+# Strong refs to running batch tasks (the event loop only keeps weak ones).
+_profile_batch_tasks: "set[asyncio.Task[None]]" = set()
+
+
+def _enqueue_profile_fetch(uid: str) -> "asyncio.Future[_ProfileFetch]":
+    global _profile_batch
+    loop = asyncio.get_running_loop()
+    batch = _profile_batch
+    if batch is None or batch[0] is not loop:
+        batch = (loop, {})
+        _profile_batch = batch
+        loop.call_soon(_flush_profile_batch, batch)
+    fut = batch[1].get(uid)
+    if fut is None:
+        fut = loop.create_future()
+        batch[1][uid] = fut
+    return fut
+
+
+def _flush_profile_batch(batch: _ProfileBatch) -> None:
+    global _profile_batch
+    if _profile_batch is batch:
+        _profile_batch = None
+    loop, futures = batch
+    task = loop.create_task(_run_profile_batch(futures))
+    _profile_batch_tasks.add(task)
+    task.add_done_callback(_profile_batch_tasks.discard)
+
+
+def _canonical_uuid(uid: str) -> Optional[str]:
+    """Lowercase hyphenated form (what PostgREST returns for uuid columns), or None."""
+    try:
+        return str(uuid.UUID(uid))
+    except ValueError:
         return None
 
-    if isinstance(rows, list) and rows:
-        row0 = rows[0]
-        return row0 if isinstance(row0, dict) else None
 
-    if isinstance(rows, dict):
-        return rows
+def _settle(fut: "asyncio.Future[_ProfileFetch]", result: Any) -> None:
+    if fut.done():
+        return
+    if isinstance(result, asyncio.CancelledError):
+        fut.cancel()
+    elif isinstance(result, BaseException):
+        fut.set_exception(result)
+    else:
+        fut.set_result(result)
+
+
+async def _run_profile_batch(futures: Dict[str, "asyncio.Future[_ProfileFetch]"]) -> None:
+    # Only UUIDs go into the shared in.() list: anything else (22P02 / filter parse
+    # error) would fail the lookups of every unrelated request in the batch.
+    # Results are matched on the canonical form, so an uppercase / unhyphenated
+    # uid still finds the row PostgREST returns in lowercase.
+    canonical: Dict[str, str] = {}
+    batched: List[str] = []
+    singles: List[str] = []
+    for uid in futures:
+        key = _canonical_uuid(uid)
+        if key is None:
+            singles.append(uid)
+        else:
+            canonical[uid] = key
+            batched.append(uid)
+    if len(batched) == 1:
+        singles = list(futures)
+        batched = []
+    try:
+        if batched:
+            try:
+                rows = await _fetch_profile_tier_rows(list(dict.fromkeys(canonical[uid] for uid in batched)))
+            except _ProfileFetchError as exc:
+                if exc.status is not None and 400 <= exc.status < 500:
+                    # Rejected request, not an outage: retry one by one so only
+                    # the offending uid fails.
+                    singles.extend(batched)
+                else:
+                    for uid in batched:
+                        _settle(futures[uid], exc)
+            else:
+                for uid in batched:
+                    _settle(futures[uid], (rows.get(canonical[uid]), None))
+        if singles:
+            results = await asyncio.gather(*(_fetch_profile_row(uid) for uid in singles), return_exceptions=True)
+            for uid, result in zip(singles, results):
+                _settle(futures[uid], result)
+    except asyncio.CancelledError:
+        for fut in futures.values():
+            fut.cancel()
+        raise
+    except Exception as exc:
+        for fut in futures.values():
+            _settle(fut, exc)
+
+
+# Cold-cache lookups for the same uid share one in-flight profile fetch, so a burst
+# of requests (e.g. QnA list/unread fan-out) makes a single Supabase round-trip.
+_profile_fetch_inflight: Dict[str, "asyncio.Future[_ProfileFetch]"] = {}
 
-    return None
+
+async def _fetch_profile_row_coalesced(uid: str) -> _ProfileFetch:
+    fut = _profile_fetch_inflight.get(uid)
+    if fut is None or fut.get_loop() is not asyncio.get_running_loop():
+        fut = _enqueue_profile_fetch(uid)
+        _profile_fetch_inflight[uid] = fut
+
+        def _done(f: "asyncio.Future[Any]", uid: str = uid) -> None:
+            if _profile_fetch_inflight.get(uid) is f:
+                del _profile_fetch_inflight[uid]
+            if not f.cancelled():
+                f.exception()  # mark retrieved even if every awaiter was cancelled
+
+        fut.add_done_callback(_done)
+    # shield: a cancelled caller must not cancel the fetch the others are awaiting
+    return await asyncio.shield(fut)
 
 
 async def get_subscription_tier_for_user(user_id: str, *, default: SubscriptionTier = SubscriptionTier.FREE) -> SubscriptionTier:
@@ -168,28 +592,64 @@ async def get_subscription_tier_for_user(user_id: str, *, default: SubscriptionT
 
     - Reads `public.profiles.subscription_tier`.
     - Unknown/missing → default (FREE).
+    - Lookup failures → default, cached only for TIER_CACHE_NEGATIVE_TTL_SECONDS.
 
     This is intentionally fail-closed.
     """
+    # Fast path: callers almost always pass a clean uid string, so probe the
+    # cache before any normalization.
+    if type(user_id) is str and user_id:
+        cached = _tier_cache_lookup(user_id)
+        if cached is not None:
+            return cached
+
     uid = str(user_id or "").strip()
     if not uid:
         return default
 
-    cached = _tier_cache_get(uid)
-    if cached is not None:
-        return cached
+    if uid != user_id:
+        cached = _tier_cache_lookup(uid)
+        if cached is not None:
+            return cached
+
+    if l2_enabled():
+        shared = await _tier_l2_get(uid)
+        if shared is not None:
+            _tier_cache_set(uid, shared, share=False)
+            return shared
 
-    row = await _fetch_profile_row(uid)
+    try:
+        row, etag = await _fetch_profile_row_coalesced(uid)
+    except _ProfileFetchError:
+        _tier_cache_set(uid, default, ttl=TIER_CACHE_NEGATIVE_TTL_SECONDS)
+        return default
     if not row:
         _tier_cache_set(uid, default)
         return default
 
     raw = row.get(TIER_COLUMN)
     tier = normalize_subscription_tier(raw, default=default)
-    _tier_cache_set(uid, tier)
+    _tier_cache_set(uid, tier, etag=etag)
     return tier
 
 
+async def get_subscription_tiers_for_users(
+    user_ids: Iterable[str],
+    *,
+    default: SubscriptionTier = SubscriptionTier.FREE,
+) -> Dict[str, SubscriptionTier]:
+    """Bulk variant of :func:`get_subscription_tier_for_user`.
+
+    Every id goes through the single-user path (L1 / Redis L2 / negative cache),
+    and the cold misses are micro-batched into one PostgREST ``id=in.(...)``
+    query (chunked) instead of one request per user.
+    Returns {user_id: tier} for every non-empty id. Fail-closed like the single lookup.
+    """
+    uids = list(dict.fromkeys(uid for uid in (str(raw or "").strip() for raw in user_ids) if uid))
+    tiers = await asyncio.gather(*(get_subscription_tier_for_user(uid, default=default) for uid in uids))
+    return dict(zip(uids, tiers))
+
+
 async def get_subscription_tier_from_access_token(
     access_token: str,
     *,
@@ -204,6 +664,20 @@ async def get_subscription_tier_from_access_token(
     if not tok:
         return default
 
+    # Warm path: the token was verified recently (here or by the auth middleware),
+    # so skip the /auth/v1/user round-trip and go straight to the profile lookup.
+    cached_uid = lookup_cached_user_id(tok)
+    if cached_uid:
+        return await get_subscription_tier_for_user(cached_uid, default=default)
+
+    # Share the middleware's token cache path: concurrent requests with the same
+    # token make one /auth/v1/user call, and rejected tokens are negatively cached.
+    if token_verification_enabled():
+        uid = await resolve_user_id_verified_cached(tok)
+        if not uid:
+            return default
+        return await get_subscription_tier_for_user(uid, default=default)
+
     try:
         resp = await _sb_get_shared(
             "/auth/v1/user",
@@ -223,7 +697,7 @@ async def get_subscription_tier_from_access_token(
         return default
 
     try:
-        data = resp.json()
+        data = _resp_json(resp)
     except Exception:
         return default
 
@@ -231,6 +705,7 @@ async def get_subscription_tier_from_access_token(
     if not uid:
         return default
 
+    remember_verified_user_id(tok, uid)
     return await get_subscription_tier_for_user(uid, default=default)
 
 
@@ -277,10 +752,12 @@ async def _patch_profile_row(user_id: str, patch: Dict[str, Any]) -> Optional[Di
         )
         return None
 
+    if not resp.content:
+        # Some PostgREST configs may return empty body.
+        return {}
     try:
-        data = resp.json()
+        data = _resp_json(resp)
     except Exception:
-        # Some PostgREST configs may return empty body.
         return {}
 
     if isinstance(data, list) and data:
@@ -316,6 +793,8 @@ async def set_subscription_tier_for_user(
     # PATCH profiles where id == user_id
     updated = await _patch_profile_row(uid, {TIER_COLUMN: t.value})
     if updated is None:
+        # DB 側の状態が不明なので、古いキャッシュを返し続けないよう破棄する。
+        invalidate_tier_cache(uid)
         raise RuntimeError(
             "Failed to update subscription tier in Supabase. "
             "Ensure public.profiles has column 'subscription_tier' and SUPABASE_URL / SUPABASE_SERVICE_ROLE_KEY are set."
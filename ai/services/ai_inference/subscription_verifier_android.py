@@ -8,9 +8,10 @@ import time
 from typing import Any, Dict, Optional
 from urllib.parse import quote
 
-import httpx
 import jwt
 
+# Shared HTTP client (connection pooled)
+from supabase_client import get_async_client
 from subscription_bootstrap_store import resolve_plan_code_for_purchase
 from subscription_projection import (
     VerifiedPurchase,
@@ -117,15 +118,16 @@ async def _get_google_access_token() -> str:
         algorithm="RS256",
     )
 
-    async with httpx.AsyncClient(timeout=12.0) as client:
-        resp = await client.post(
-            token_uri,
-            data={
-                "grant_type": "urn:ietf:params:oauth:grant-type:jwt-bearer",
-                "assertion": assertion,
-            },
-            headers={"Content-Type": "application/x-www-form-urlencoded"},
-        )
+    client = get_async_client()
+    resp = await client.post(
+        token_uri,
+        data={
+            "grant_type": "urn:ietf:params:oauth:grant-type:jwt-bearer",
+            "assertion": assertion,
+        },
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+        timeout=12.0,
+    )
 
     if resp.status_code >= 300:
         raise AndroidVerificationConfigError(
@@ -220,15 +222,16 @@ async def acknowledge_android_subscription(*, purchase_token: str, product_id: s
         f"applications/{quote(package_name, safe='')}/purchases/subscriptions/"
         f"{quote(product_id, safe='')}/tokens/{quote(purchase_token, safe='')}:acknowledge"
     )
-    async with httpx.AsyncClient(timeout=12.0) as client:
-        resp = await client.post(
-            url,
-            headers={
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json",
-            },
-            json={},
-        )
+    client = get_async_client()
+    resp = await client.post(
+        url,
+        headers={
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json",
+        },
+        json={},
+        timeout=12.0,
+    )
     if resp.status_code >= 300:
         logger.warning(
             "Failed to acknowledge Android subscription: status=%s body=%s",
@@ -249,14 +252,15 @@ async def verify_android_subscription(*, purchase_token: str, product_id: Option
         f"applications/{quote(package_name, safe='')}/purchases/subscriptionsv2/tokens/{quote(token, safe='')}"
     )
 
-    async with httpx.AsyncClient(timeout=12.0) as client:
-        resp = await client.get(
-            url,
-            headers={
-                "Authorization": f"Bearer {access_token}",
-                "Accept": "application/json",
-            },
-        )
+    client = get_async_client()
+    resp = await client.get(
+        url,
+        headers={
+            "Authorization": f"Bearer {access_token}",
+            "Accept": "application/json",
+        },
+        timeout=12.0,
+    )
 
     if resp.status_code >= 300:
         raise AndroidVerificationError(
@@ -9,9 +9,10 @@ import time
 from typing import Any, Dict, Optional
 from urllib.parse import quote
 
-import httpx
 import jwt
 
+# Shared HTTP client (connection pooled)
+from supabase_client import get_async_client
 from subscription_bootstrap_store import resolve_plan_code_by_product_id
 from subscription_projection import (
     VerifiedPurchase,
@@ -163,14 +164,15 @@ async def _apple_get(path: str) -> Dict[str, Any]:
 
     last_error: Optional[str] = None
     for base in bases:
-        async with httpx.AsyncClient(timeout=12.0) as client:
-            resp = await client.get(
-                f"{base}{path}",
-                headers={
-                    "Authorization": f"Bearer {bearer}",
-                    "Accept": "application/json",
-                },
-            )
+        client = get_async_client()
+        resp = await client.get(
+            f"{base}{path}",
+            headers={
+                "Authorization": f"Bearer {bearer}",
+                "Accept": "application/json",
+            },
+            timeout=12.0,
+        )
         if resp.status_code < 300:
             data = resp.json()
             if isinstance(data, dict):
@@ -12,9 +12,12 @@
   - Authorization: Bearer <access_token>
   - apikey: SUPABASE_ANON_KEY（無ければ SUPABASE_SERVICE_ROLE_KEY を利用）
 - キャッシュ:
-  - key は access_token の sha256（トークン自体をメモリに保持しない）
+  - key は access_token の blake2b-128 ダイジェスト（トークン自体をメモリに保持しない）
   - 正常系/異常系それぞれ TTL を設定可能
-  - LRU で上限を超えたら古いものから破棄
+  - セグメント化 LRU（2Q 系）で上限を超えたら古いものから破棄。新規エントリは
+    probation 側に入り、2 回目のヒットで protected 側へ昇格する。使い捨てトークン
+    （期限切れ / bot など）が大量に来ても probation だけが入れ替わり、常連ユーザーの
+    エントリは押し出されない。
 
 ENV
 - ACTIVE_USERS_MIDDLEWARE_VERIFY_WITH_SUPABASE (default: true)
@@ -22,23 +25,36 @@ ENV
 - ACTIVE_USERS_MIDDLEWARE_AUTH_NEGATIVE_TTL_SECONDS (default: 10)
 - ACTIVE_USERS_MIDDLEWARE_AUTH_CACHE_MAX_SIZE (default: 2048)
 - ACTIVE_USERS_MIDDLEWARE_AUTH_TIMEOUT_SECONDS (default: 3.0)
+- COCOLON_REDIS_URL（任意）: 設定時は検証成功した user_id を Redis にも共有（redis_cache 参照）
 
 注意
 - キャッシュはプロセス内のみ（複数インスタンス/複数ワーカー間では共有されません）。
+
+並行性
+- キャッシュを触るのはイベントループ上のコルーチン（middleware / subscription_store）だけで、
+  スレッドプールからは呼ばれない。_cache_get / _cache_set の中に await は無いので
+  他のコルーチンに割り込まれず、ロックは不要。スレッドから呼ぶ用途が出たら lock を戻すこと。
 """
 
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import logging
 import os
-import threading
 import time
 from collections import OrderedDict
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
 
 import httpx
 
+try:  # optional: parses resp.content bytes directly, faster than stdlib json
+    import orjson as _orjson
+except ImportError:  # pragma: no cover - fall back to httpx's stdlib json
+    _orjson = None
+
+from redis_cache import l2_enabled, l2_get, l2_set_soon
+
 # Shared HTTP client (connection pooled)
 from supabase_client import get_async_client
 
@@ -85,50 +101,61 @@ _NEG_TTL = max(0, _env_int("ACTIVE_USERS_MIDDLEWARE_AUTH_NEGATIVE_TTL_SECONDS",
 _MAX_SIZE = max(64, _env_int("ACTIVE_USERS_MIDDLEWARE_AUTH_CACHE_MAX_SIZE", 2048))
 _TIMEOUT = max(0.5, _env_float("ACTIVE_USERS_MIDDLEWARE_AUTH_TIMEOUT_SECONDS", 3.0))
 
-# LRU cache: key -> (user_id_or_none, expires_at)
-_LOCK = threading.Lock()
-_CACHE: "OrderedDict[str, Tuple[Optional[str], float]]" = OrderedDict()
+# Segmented LRU: key -> (user_id_or_none, expires_at)  ※ expires_at は time.monotonic() 基準
+# ロックは持たない（冒頭「並行性」参照）。合計で _MAX_SIZE 件まで。
+_PROBATION_MAX = max(1, _MAX_SIZE // 5)
+_PROTECTED_MAX = _MAX_SIZE - _PROBATION_MAX
+_PROBATION: "OrderedDict[bytes, Tuple[Optional[str], float]]" = OrderedDict()
+_PROTECTED: "OrderedDict[bytes, Tuple[Optional[str], float]]" = OrderedDict()
 
 # Sentinel to distinguish cache-miss from a cached negative (None)
 _MISS = object()
 
 
-def _digest_token(token: str) -> str:
-    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+def _digest_token(token: str) -> bytes:
+    # プロセス内の dict キー用途なので暗号学的な強度は不要。blake2b(128bit) は sha256 より速く、
+    # hex にせず bytes のまま持つことでキーのメモリも半分で済む。
+    return hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
 
 
-def _cache_get(key: str, now_ts: float):
-    with _LOCK:
-        ent = _CACHE.get(key)
-        if ent is None:
-            return _MISS
-        user_id, expires_at = ent
-        if expires_at <= now_ts:
-            try:
-                del _CACHE[key]
-            except Exception:
-                pass
+def _trim_probation() -> None:
+    while len(_PROBATION) > _PROBATION_MAX:
+        _PROBATION.popitem(last=False)
+
+
+def _cache_get(key: bytes, now_ts: float):
+    ent = _PROTECTED.get(key)
+    if ent is not None:
+        if ent[1] <= now_ts:
+            del _PROTECTED[key]
             return _MISS
-        try:
-            _CACHE.move_to_end(key)
-        except Exception:
-            pass
-        return user_id
-
-
-def _cache_set(key: str, user_id: Optional[str], expires_at: float) -> None:
-    with _LOCK:
-        _CACHE[key] = (user_id, expires_at)
-        try:
-            _CACHE.move_to_end(key)
-        except Exception:
-            pass
-        # Evict LRU
-        while len(_CACHE) > _MAX_SIZE:
-            try:
-                _CACHE.popitem(last=False)
-            except Exception:
-                break
+        _PROTECTED.move_to_end(key)
+        return ent[0]
+
+    ent = _PROBATION.get(key)
+    if ent is None:
+        return _MISS
+    del _PROBATION[key]
+    if ent[1] <= now_ts:
+        return _MISS
+
+    # 2 回目のヒット: protected へ昇格。あふれた protected の最古は probation に戻す。
+    _PROTECTED[key] = ent
+    if len(_PROTECTED) > _PROTECTED_MAX:
+        old_key, old_ent = _PROTECTED.popitem(last=False)
+        _PROBATION[old_key] = old_ent
+        _trim_probation()
+    return ent[0]
+
+
+def _cache_set(key: bytes, user_id: Optional[str], expires_at: float) -> None:
+    if key in _PROTECTED:
+        _PROTECTED[key] = (user_id, expires_at)
+        _PROTECTED.move_to_end(key)
+        return
+    _PROBATION[key] = (user_id, expires_at)
+    _PROBATION.move_to_end(key)
+    _trim_probation()
 
 
 async def _verify_with_supabase(access_token: str) -> Optional[str]:
@@ -142,7 +169,7 @@ async def _verify_with_supabase(access_token: str) -> Optional[str]:
     }
 
     try:
-        client = await get_async_client()
+        client = get_async_client()
         resp = await client.get(url, headers=headers, timeout=_TIMEOUT)
     except Exception as exc:
         logger.debug("Supabase auth verify request failed: %s", exc)
@@ -152,10 +179,15 @@ async def _verify_with_supabase(access_token: str) -> Optional[str]:
         # Invalid / expired / revoked token
         return None
 
+    body = resp.content
+    if not body:
+        return None
     try:
-        data = resp.json()
+        data = _orjson.loads(body) if _orjson is not None else resp.json()
     except Exception:
         return None
+    if not isinstance(data, dict):
+        return None
 
     uid = data.get("id")
     if not uid:
@@ -164,6 +196,10 @@ async def _verify_with_supabase(access_token: str) -> Optional[str]:
     return str(uid)
 
 
+# token digest -> 検証中の Task（同一トークンの同時リクエストを 1 回の問い合わせにまとめる）
+_verify_inflight: Dict[bytes, "asyncio.Task[Optional[str]]"] = {}
+
+
 async def resolve_user_id_verified_cached(access_token: str) -> Optional[str]:
     """Resolve user_id from a Supabase access token (verified + cached).
 
@@ -178,7 +214,7 @@ async def resolve_user_id_verified_cached(access_token: str) -> Optional[str]:
     if not _VERIFY_ENABLED:
         return None
 
-    now_ts = time.time()
+    now_ts = time.monotonic()
     key = _digest_token(tok)
 
     cached = _cache_get(key, now_ts)
@@ -186,9 +222,68 @@ async def resolve_user_id_verified_cached(access_token: str) -> Optional[str]:
         # NOTE: cached can be None (negative cache), so we return it.
         return cached
 
+    # 同じトークンで同時に来たリクエストは 1 回の /auth/v1/user を共有する
+    task = _verify_inflight.get(key)
+    if task is None or task.get_loop() is not asyncio.get_running_loop():
+        task = asyncio.ensure_future(_verify_and_cache(tok, key, now_ts))
+        _verify_inflight[key] = task
+
+        def _done(t: "asyncio.Task[Optional[str]]", key: bytes = key) -> None:
+            if _verify_inflight.get(key) is t:
+                del _verify_inflight[key]
+
+        task.add_done_callback(_done)
+    return await asyncio.shield(task)
+
+
+def _l2_key(key: bytes) -> str:
+    return "auth:" + key.hex()
+
+
+async def _verify_and_cache(tok: str, key: bytes, now_ts: float) -> Optional[str]:
+    # 他ワーカーが検証済みなら Redis(L2) から拾う（検証成功のみ共有。失敗は各プロセスで判断）
+    if l2_enabled():
+        shared = await l2_get(_l2_key(key))
+        if shared:
+            _cache_set(key, shared, now_ts + float(_CACHE_TTL))
+            return shared
+
     uid = await _verify_with_supabase(tok)
 
     ttl = _CACHE_TTL if uid else _NEG_TTL
     expires_at = now_ts + float(ttl)
     _cache_set(key, uid, expires_at)
+    if uid:
+        l2_set_soon(_l2_key(key), ttl, uid)
     return uid
+
+
+def token_verification_enabled() -> bool:
+    """True if resolve_user_id_verified_cached can actually verify tokens."""
+    return bool(_VERIFY_ENABLED and _SUPABASE_URL and _SUPABASE_API_KEY)
+
+
+def lookup_cached_user_id(access_token: str) -> Optional[str]:
+    """Return a positively cached user_id for the token without any network call.
+
+    Cache misses and negative entries both return None, so callers fall back to
+    their own verification path.
+    """
+    tok = str(access_token or "").strip()
+    if not tok or _CACHE_TTL <= 0:
+        return None
+    cached = _cache_get(_digest_token(tok), time.monotonic())
+    if cached is _MISS:
+        return None
+    return cached
+
+
+def remember_verified_user_id(access_token: str, user_id: str) -> None:
+    """Store a user_id that the caller already verified via /auth/v1/user."""
+    tok = str(access_token or "").strip()
+    uid = str(user_id or "").strip()
+    if not tok or not uid or _CACHE_TTL <= 0:
+        return
+    key = _digest_token(tok)
+    _cache_set(key, uid, time.monotonic() + float(_CACHE_TTL))
+    l2_set_soon(_l2_key(key), _CACHE_TTL, uid)
@@ -10,7 +10,8 @@ Why this exists
     due to repeated TLS handshakes and TCP setup.
 
 What this module provides
-  - A single, lazily-initialized ``httpx.AsyncClient`` (connection pooled)
+  - A single, lazily-initialized ``httpx.AsyncClient`` (connection pooled;
+    opt-in HTTP/2 with ``SUPABASE_HTTP2=1`` when the ``h2`` package is installed)
   - Small helpers for Supabase PostgREST + RPC calls using service_role
   - Ability to override headers/timeout per request when needed (e.g. /auth/v1/user)
 
@@ -26,11 +27,24 @@ from __future__ import annotations
 import asyncio
 import logging
 import os
+import ssl
+import threading
 import time
-from typing import Any, Dict, Optional
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
 
 import httpx
 
+try:  # optional: faster JSON encoding for request bodies
+    import orjson as _orjson
+except ImportError:  # pragma: no cover - orjson 未導入環境では httpx の json= を使う
+    _orjson = None
+
+try:  # optional: httpx needs h2 for HTTP/2
+    import h2 as _h2  # noqa: F401
+except ImportError:  # pragma: no cover - h2 未導入環境では HTTP/1.1 のまま
+    _h2 = None
+
 from request_metrics import record_supabase_call
 
 logger = logging.getLogger("supabase_client")
@@ -41,16 +55,41 @@ SUPABASE_URL = os.getenv("SUPABASE_URL", "").rstrip("/")
 SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY", "")
 
 
+# Config comes from env at import time and never changes afterwards, so one
+# successful check is enough for the rest of the process.
+_config_ok = False
+
+
 def ensure_supabase_config() -> None:
+    global _config_ok
+    if _config_ok:
+        return
     if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
         raise RuntimeError(
             "Supabase configuration missing: SUPABASE_URL or SUPABASE_SERVICE_ROLE_KEY"
         )
+    _config_ok = True
 
 
 # --- Client singleton ---
 _client: Optional[httpx.AsyncClient] = None
-_client_lock = asyncio.Lock()
+# threading.Lock rather than asyncio.Lock: it is never held across an await and
+# does not bind to whichever event loop first touched the module.
+_client_lock = threading.Lock()
+
+# Built once per process: loading the CA bundle is the expensive part of
+# creating an AsyncClient, and the client can be re-created after
+# ``aclose_async_client`` (tests, reloads).
+_ssl_context: Optional[ssl.SSLContext] = None
+
+
+def _get_ssl_context() -> ssl.SSLContext:
+    global _ssl_context
+    if _ssl_context is None:
+        # httpx's own default trust store: certifi, plus SSL_CERT_FILE / SSL_CERT_DIR
+        # (ssl.create_default_context() would use only the system CAs)
+        _ssl_context = httpx.create_ssl_context()
+    return _ssl_context
 
 
 def _build_limits() -> httpx.Limits:
@@ -73,6 +112,14 @@ def _build_timeout() -> httpx.Timeout:
     return httpx.Timeout(t)
 
 
+def _http2_enabled() -> bool:
+    # PostgREST speaks HTTP/2, so concurrent calls can share one connection.
+    # Opt-in (SUPABASE_HTTP2=1): h2 is not a project dependency, and the same
+    # client also serves third-party hosts (Google / Apple receipt verification).
+    flag = (os.getenv("SUPABASE_HTTP2", "0") or "0").strip().lower()
+    return _h2 is not None and flag in {"1", "true", "yes", "on"}
+
+
 def _build_retry_count() -> int:
     try:
         retry_count = int(os.getenv("SUPABASE_HTTP_RETRY_COUNT", "1") or "1")
@@ -99,18 +146,25 @@ def _retry_delay_seconds(attempt_index: int) -> float:
     return min(4.0, base * (2 ** exp))
 
 
-async def get_async_client() -> httpx.AsyncClient:
-    """Return a shared AsyncClient (connection pooled)."""
+def get_async_client() -> httpx.AsyncClient:
+    """Return a shared AsyncClient (connection pooled).
+
+    Synchronous: building the client does no I/O, so callers on the hot path
+    skip an await once it exists.
+    """
 
     global _client
-    if _client is not None:
-        return _client
+    client = _client
+    if client is not None:
+        return client
 
-    async with _client_lock:
+    with _client_lock:
         if _client is None:
             _client = httpx.AsyncClient(
                 timeout=_build_timeout(),
                 limits=_build_limits(),
+                verify=_get_ssl_context(),
+                http2=_http2_enabled(),
             )
         return _client
 
@@ -129,14 +183,29 @@ async def aclose_async_client() -> None:
 
 # --- Headers helpers ---
 
+# The service_role key is process-constant, so the base header sets are built
+# once and shared as read-only views. Keyed on the key itself so a changed
+# (e.g. monkeypatched) key still produces fresh headers.
+_sr_headers_key: Optional[str] = None
+_sr_headers: Mapping[str, str] = MappingProxyType({})
+_sr_headers_json: Mapping[str, str] = MappingProxyType({})
+
+
+def _service_role_base_headers() -> Tuple[Mapping[str, str], Mapping[str, str]]:
+    global _sr_headers_key, _sr_headers, _sr_headers_json
+    ensure_supabase_config()
+    key = SUPABASE_SERVICE_ROLE_KEY
+    if _sr_headers_key != key:
+        base = {"apikey": key, "Authorization": f"Bearer {key}"}
+        _sr_headers = MappingProxyType(base)
+        _sr_headers_json = MappingProxyType({**base, "Content-Type": "application/json"})
+        _sr_headers_key = key
+    return _sr_headers, _sr_headers_json
+
 
 def sb_service_role_headers(*, prefer: Optional[str] = None) -> Dict[str, str]:
     """Headers for Supabase service_role requests (non-JSON)."""
-    ensure_supabase_config()
-    h = {
-        "apikey": SUPABASE_SERVICE_ROLE_KEY,
-        "Authorization": f"Bearer {SUPABASE_SERVICE_ROLE_KEY}",
-    }
+    h = dict(_service_role_base_headers()[0])
     if prefer:
         h["Prefer"] = prefer
     return h
@@ -144,8 +213,9 @@ def sb_service_role_headers(*, prefer: Optional[str] = None) -> Dict[str, str]:
 
 def sb_service_role_headers_json(*, prefer: Optional[str] = None) -> Dict[str, str]:
     """Headers for Supabase service_role requests (JSON)."""
-    h = sb_service_role_headers(prefer=prefer)
-    h["Content-Type"] = "application/json"
+    h = dict(_service_role_base_headers()[1])
+    if prefer:
+        h["Prefer"] = prefer
     return h
 
 
@@ -159,6 +229,25 @@ def sb_auth_headers(access_token: str) -> Dict[str, str]:
     }
 
 
+def _encode_json_body(payload: Any) -> Optional[bytes]:
+    """orjson-encoded request body, or None to let httpx encode ``json=``.
+
+    Returns None when orjson is missing or rejects the payload (e.g. Decimal),
+    so those bodies still go through httpx's stdlib encoder.
+    """
+    if _orjson is None or payload is None:
+        return None
+    try:
+        return _orjson.dumps(payload, option=_orjson.OPT_NON_STR_KEYS)
+    except TypeError:
+        return None
+
+
+def _has_header(headers: Mapping[str, str], name: str) -> bool:
+    lname = name.lower()
+    return any(k.lower() == lname for k in headers)
+
+
 def _merge_prefer(headers: Dict[str, str], prefer: Optional[str]) -> Dict[str, str]:
     if not prefer:
         return headers
@@ -166,6 +255,9 @@ def _merge_prefer(headers: Dict[str, str], prefer: Optional[str]) -> Dict[str, s
     if not p0:
         headers["Prefer"] = prefer
         return headers
+    if p0 == prefer:
+        # Common no-op (e.g. count=exact passed both ways); skip the split/dedupe.
+        return headers
     # Avoid duplicate prefer tokens.
     parts = [x.strip() for x in (p0.split(",") + prefer.split(",")) if x.strip()]
     # Preserve order while deduping.
@@ -205,10 +297,22 @@ async def sb_request(
         p = "/" + p
     url = f"{SUPABASE_URL}{p}"
 
-    h = dict(headers) if headers else sb_service_role_headers_json()
-    h = _merge_prefer(h, prefer)
-
-    client = await get_async_client()
+    h: Mapping[str, str]
+    if headers:
+        h = _merge_prefer(dict(headers), prefer)
+    elif prefer:
+        h = sb_service_role_headers_json(prefer=prefer)
+    else:
+        # Shared read-only mapping; httpx copies it into its own Headers.
+        h = _service_role_base_headers()[1]
+
+    content = _encode_json_body(json)
+    if content is not None:
+        json = None
+        if not _has_header(h, "Content-Type"):
+            h = {**h, "Content-Type": "application/json"}
+
+    client = get_async_client()
     method_upper = str(method or "GET").upper()
     retry_count = _build_retry_count()
 
@@ -220,6 +324,7 @@ async def sb_request(
                 url=url,
                 headers=h,
                 params=params,
+                content=content,
                 json=json,
                 timeout=timeout,
             )
@@ -361,17 +466,11 @@ async def sb_post_rpc(
 
 
 def _parse_content_range_total(content_range: str) -> Optional[int]:
-    # Format: "0-0/123" or "*/123" etc.
-    if not content_range:
-        return None
-    if "/" not in content_range:
-        return None
-    tail = content_range.split("/")[-1].strip()
-    if tail.isdigit():
-        return int(tail)
+    # Format: "0-0/123" or "*/123" etc. ("0-0/*" when the total is unknown)
     try:
-        return int(tail)
-    except Exception:
+        _head, sep, tail = content_range.rpartition("/")
+        return int(tail) if sep else None
+    except (ValueError, AttributeError):
         return None
 
 
@@ -391,17 +490,25 @@ async def sb_count(
     )
 
     if resp.status_code >= 300:
-        logger.error("Supabase count failed: %s %s", resp.status_code, resp.text[:800])
+        # Slice the bytes before decoding so a large error body is not decoded whole.
+        logger.error(
+            "Supabase count failed: %s %s",
+            resp.status_code,
+            resp.content[:800].decode("utf-8", "replace"),
+        )
         return 0
 
-    cr = resp.headers.get("content-range") or resp.headers.get("Content-Range") or ""
-    total = _parse_content_range_total(cr)
+    # httpx.Headers lookups are case-insensitive.
+    total = _parse_content_range_total(resp.headers.get("content-range") or "")
     if total is not None:
-        return int(total)
+        return total
 
     # Fallback: count JSON rows (best-effort)
+    body = resp.content
+    if not body or body == b"[]":
+        return 0
     try:
-        data = resp.json()
+        data = _orjson.loads(body) if _orjson is not None else resp.json()
         return len(data) if isinstance(data, list) else 0
     except Exception:
         return 0
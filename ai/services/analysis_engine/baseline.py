@@ -1,9 +1,28 @@
 
 from __future__ import annotations
 from typing import List, Dict, Any, Optional
+import math
 import statistics
 from .models import WeeklySnapshot, BaselineProfile
 
+def _agg_scalar(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"mu": 0.0, "sigma": 0.0, "n": 0}
+    if len(values)==1:
+        return {"mu": float(values[0]), "sigma": 0.0, "n": 1}
+    # Welford, plain floats (statistics.mean/pstdev go through exact Fractions).
+    # Unlike sum/sum-of-squares it keeps sigma exactly 0.0 for constant input,
+    # which _z_value relies on to take its zero-variance branch.
+    mu = 0.0
+    m2 = 0.0
+    n = 0
+    for v in values:
+        n += 1
+        d = v - mu
+        mu += d / n
+        m2 += d * (v - mu)
+    return {"mu": mu, "sigma": math.sqrt(max(0.0, m2 / n)), "n": n}
+
 def build_baseline(user_id: str, weeks: List[WeeklySnapshot], window_weeks:int=3, window_months:int=2) -> BaselineProfile:
     # Use last W weeks
     W = min(window_weeks, len(weeks))
@@ -15,32 +34,42 @@ def build_baseline(user_id: str, weeks: List[WeeklySnapshot], window_weeks:int=3
         "data_density": float(statistics.median([w.n_events for w in sub])) if sub else 0.0,
         "last_period": sub[-1].period if sub else None
     }
-    def _agg_scalar(values: List[float]) -> Dict[str, float]:
-        if not values:
-            return {"mu": 0.0, "sigma": 0.0, "n": 0}
-        if len(values)==1:
-            return {"mu": float(values[0]), "sigma": 0.0, "n": 1}
-        return {"mu": float(statistics.mean(values)), "sigma": float(statistics.pstdev(values)), "n": len(values)}
-    # alternation
-    metrics["alternation"] = _agg_scalar([w.alternation_rate for w in sub if w.alternation_rate is not None])
-    # intensity std
-    metrics["intensity_std"] = _agg_scalar([w.intensity.get("std") for w in sub if w.intensity and w.intensity.get("std") is not None])
-    # entropy & gini
-    metrics["entropy"] = _agg_scalar([w.entropy for w in sub if w.entropy is not None])
-    metrics["gini_simpson"] = _agg_scalar([w.gini_simpson for w in sub if w.gini_simpson is not None])
-    # motifs (per name)
-    all_names = set()
+    # one pass over the window, then aggregate each metric
+    alt: List[float] = []
+    istd: List[float] = []
+    ent: List[float] = []
+    gs: List[float] = []
+    cx: List[Any] = []
+    cy: List[Any] = []
+    motif_rows: List[Dict[str, int]] = []
+    motif_names: Dict[str, None] = {}
     for w in sub:
-        for name in (w.motif_counts or {}).keys():
-            all_names.add(name)
-    motif_metrics = {}
-    for name in all_names:
-        motif_metrics[name] = _agg_scalar([w.motif_counts.get(name,0) for w in sub])
-    metrics["motif"] = motif_metrics
+        if w.alternation_rate is not None:
+            alt.append(w.alternation_rate)
+        std = w.intensity.get("std") if w.intensity else None
+        if std is not None:
+            istd.append(std)
+        if w.entropy is not None:
+            ent.append(w.entropy)
+        if w.gini_simpson is not None:
+            gs.append(w.gini_simpson)
+        mc = w.motif_counts or {}
+        motif_rows.append(mc)
+        motif_names.update(dict.fromkeys(mc))
+        c2 = w.center2d
+        cx.append(c2.get("x"))
+        cy.append(c2.get("y"))
+    metrics["alternation"] = _agg_scalar(alt)
+    metrics["intensity_std"] = _agg_scalar(istd)
+    # entropy & gini
+    metrics["entropy"] = _agg_scalar(ent)
+    metrics["gini_simpson"] = _agg_scalar(gs)
+    # motifs (per name; weeks without the motif count as 0)
+    metrics["motif"] = {name: _agg_scalar([mc.get(name, 0) for mc in motif_rows]) for name in motif_names}
     # center2d
     metrics["center2d"] = {
-        "x": _agg_scalar([w.center2d.get("x") for w in sub]),
-        "y": _agg_scalar([w.center2d.get("y") for w in sub]),
+        "x": _agg_scalar(cx),
+        "y": _agg_scalar(cy),
         "n": len(sub)
     }
     return BaselineProfile(
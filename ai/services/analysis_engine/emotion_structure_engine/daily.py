@@ -1,9 +1,8 @@
 
 from __future__ import annotations
 from typing import List, Dict, Optional
-from collections import defaultdict
-from datetime import datetime
-from ..models import EmotionEntry, Narrative, LABELS
+from collections import Counter
+from ..models import EmotionEntry, Narrative, LABELS, LABEL_JA, _parse_ts
 
 # DailyReport (MyNews) — soft, readable, and no numeric exposure.
 # Policy:
@@ -13,15 +12,23 @@ from ..models import EmotionEntry, Narrative, LABELS
 # - Tone: softer than Weekly/Monthly. Easy to read in the morning.
 
 def _label_ja(l: str) -> str:
-    return {"joy":"喜び","sadness":"悲しみ","anxiety":"不安","anger":"怒り","peace":"平穏"}.get(l,l)
+    return LABEL_JA.get(l, l)
 
 def _top2_labels(entries: List[EmotionEntry]) -> List[str]:
     # intensity-weighted top labels
-    counter = defaultdict(int)
+    counter: Dict[str, int] = {}
     for e in entries:
-        counter[e.label] += int(e.intensity or 0)
-    sorted_labels = sorted(counter.items(), key=lambda kv: kv[1], reverse=True)
-    return [k for k,_ in sorted_labels[:2] if k in LABELS]
+        counter[e.label] = counter.get(e.label, 0) + int(e.intensity or 0)
+    # single-pass top 2; ties keep first-seen order (same as a stable sort)
+    first = second = None
+    w1 = w2 = 0
+    for k, w in counter.items():
+        if first is None or w > w1:
+            second, w2 = first, w1
+            first, w1 = k, w
+        elif second is None or w > w2:
+            second, w2 = k, w
+    return [k for k in (first, second) if k is not None and k in LABELS]
 
 def _timeline_block(hour: int) -> str:
     # Simple blocks: morning [5-11], afternoon [12-17], night [18-4]
@@ -36,19 +43,17 @@ def _timeline_summary(entries: List[EmotionEntry]) -> List[str]:
     # For each block, find the modal label among entries in that time block
     blocks = {"morning": [], "afternoon": [], "night": []}
     for e in entries:
-        try:
-            dt = datetime.fromisoformat(e.timestamp)
-            blk = _timeline_block(dt.hour)
-            blocks[blk].append(e.label)
-        except Exception:
+        dt = _parse_ts(e.timestamp)
+        if dt is None:
             # If timestamp parse fails, ignore for timeline
             continue
+        blocks[_timeline_block(dt.hour)].append(e.label)
     out = []
     for blk, labels in blocks.items():
         if not labels:
             continue
-        # simple mode; fallback to first if ambiguous
-        label = max(set(labels), key=labels.count)
+        # simple mode; ties go to the label seen first
+        label = Counter(labels).most_common(1)[0][0]
         jp = _label_ja(label)
         jp_blk = {"morning":"朝", "afternoon":"昼", "night":"夜"}[blk]
         out.append(f"{jp_blk}は「{jp}」が多く見られました")
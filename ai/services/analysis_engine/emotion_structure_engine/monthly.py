@@ -1,7 +1,7 @@
 from __future__ import annotations
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import math
-from ..models import WeeklySnapshot, MonthlyReport, Narrative, LABELS
+from ..models import WeeklySnapshot, MonthlyReport, Narrative, LABELS, LABEL_JA
 from .weekly import aggregate_time_bucket_rows
 
 
@@ -17,26 +17,25 @@ def _attach_monthly_time_bucket_aliases(report: MonthlyReport, time_buckets: Lis
         pass
 
     def _to_dict_with_aliases() -> Dict[str, Any]:
-        base = {}
         try:
-            from dataclasses import asdict
-            base = asdict(report)
+            # serialises weeks once (no asdict pass over the nested snapshots)
+            base = MonthlyReport.to_dict(report)
         except Exception:
             try:
                 base = dict(vars(report))
             except Exception:
                 base = {}
 
-        weeks = []
-        for w in getattr(report, "weeks", []) or []:
-            try:
-                weeks.append(w.to_dict())
-            except Exception:
+            weeks = []
+            for w in getattr(report, "weeks", []) or []:
                 try:
-                    weeks.append(dict(vars(w)))
+                    weeks.append(w.to_dict())
                 except Exception:
-                    weeks.append({})
-        base["weeks"] = weeks
+                    try:
+                        weeks.append(dict(vars(w)))
+                    except Exception:
+                        weeks.append({})
+            base["weeks"] = weeks
         base["time_buckets"] = time_buckets
         base["timeBuckets"] = time_buckets
         return base
@@ -88,13 +87,18 @@ def _extract_week_time_buckets(week: WeeklySnapshot) -> List[Dict[str, Any]]:
 
 
 
-def _cosine_distance(vec_a: Dict[str, float], vec_b: Dict[str, float]) -> float:
-    dot = sum(vec_a.get(l, 0.0) * vec_b.get(l, 0.0) for l in LABELS)
-    na = math.sqrt(sum(vec_a.get(l, 0.0) ** 2 for l in LABELS))
-    nb = math.sqrt(sum(vec_b.get(l, 0.0) ** 2 for l in LABELS))
+def _share_vector(share: Dict[str, float]) -> Tuple[Tuple[float, ...], float]:
+    # LABELS-ordered share values and their norm
+    vec = tuple(share.get(l, 0.0) for l in LABELS)
+    return vec, math.sqrt(sum(v * v for v in vec))
+
+
+def _cosine_distance(a: Tuple[Tuple[float, ...], float], b: Tuple[Tuple[float, ...], float]) -> float:
+    vec_a, na = a
+    vec_b, nb = b
     if na == 0 or nb == 0:
         return 0.0
-    cos = dot / (na * nb)
+    cos = sum(x * y for x, y in zip(vec_a, vec_b)) / (na * nb)
     cos = max(min(cos, 1.0), -1.0)
     return 1.0 - cos
 
@@ -113,9 +117,8 @@ def assemble_monthly(weeks: List[WeeklySnapshot], period: str) -> MonthlyReport:
     for name in sorted(name_set):
         motif_trend.append({"name": name, "wk_counts": [w.motif_counts.get(name, 0) for w in weeks]})
 
-    distances = []
-    for i in range(max(0, len(weeks) - 1)):
-        distances.append(_cosine_distance(weeks[i].share, weeks[i + 1].share))
+    share_vecs = [_share_vector(w.share) for w in weeks]
+    distances = [_cosine_distance(a, b) for a, b in zip(share_vecs, share_vecs[1:])]
     center_shift = {"distances": distances, "metric": "cosine"}
 
     # Standard monthly time buckets = aggregate all weekly time buckets into one monthly view.
@@ -136,7 +139,7 @@ def assemble_monthly(weeks: List[WeeklySnapshot], period: str) -> MonthlyReport:
 
 
 def _label_ja(l: str) -> str:
-    return {"joy": "喜び", "sadness": "悲しみ", "anxiety": "不安", "anger": "怒り", "peace": "平穏"}.get(l, l)
+    return LABEL_JA.get(l, l)
 
 
 
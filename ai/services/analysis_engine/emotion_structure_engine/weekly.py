@@ -1,8 +1,8 @@
 from __future__ import annotations
 from typing import List, Dict, Any, Optional, Tuple, Iterable
-import math, statistics, collections
+import math, re, statistics, collections
 from datetime import datetime, timezone, timedelta
-from ..models import EmotionEntry, WeeklySnapshot, Narrative, LABELS, BaselineProfile
+from ..models import EmotionEntry, WeeklySnapshot, Narrative, LABELS, LABEL_JA, BaselineProfile
 
 # Geometry for 2D center (regular pentagon)
 DEG = math.pi / 180.0
@@ -14,6 +14,8 @@ POS_DEG = {
     "anxiety": 162,
 }
 POS = {k: (math.cos(v*DEG), math.sin(v*DEG)) for k, v in POS_DEG.items()}
+# (label, x, y) in LABELS order, so _center2d does one lookup per label
+_POS_ROWS = tuple((l, POS[l][0], POS[l][1]) for l in LABELS)
 
 MOTIF_DICT = {
     ("sadness","peace","joy"): "sadness-peace-joy",
@@ -26,7 +28,10 @@ MOTIF_DICT = {
     ("peace","anxiety","peace"): "peace-anxiety-peace",
 }
 
-STOPWORDS = set(["する","ある","こと","それ","これ","あれ","今日","昨日","です","ます","でした","すること"])
+STOPWORDS = frozenset(["する","ある","こと","それ","これ","あれ","今日","昨日","です","ます","でした","すること"])
+
+# memo tokenizer: split by spaces and punctuation (compiled once)
+_TOKEN_SPLIT = re.compile(r"[\s、。．,.!！?？;；:\-\(\)\[\]「」『』\n\t]+")
 
 # NOTE:
 # time bucket labels are intentionally aligned with the MyWeb API layer.
@@ -105,26 +110,23 @@ def _gini_simpson(share: Dict[str, float]) -> float:
 
 
 def _center2d(share: Dict[str, float]) -> Dict[str, float]:
-    x = sum(share[l] * POS[l][0] for l in LABELS)
-    y = sum(share[l] * POS[l][1] for l in LABELS)
+    x = y = 0.0
+    for l, px, py in _POS_ROWS:
+        p = share[l]
+        x += p * px
+        y += p * py
     return {"x": x, "y": y}
 
 
 def _keywords_from_memo(entries: List[EmotionEntry], top_k: int = 5) -> List[str]:
     # simple fallback tokenizer: split by spaces and punctuation
     # For Japanese, this is a naive approach; acceptable as "任意" keywords
-    import re
-
-    bag = collections.Counter()
-    for e in entries:
-        if not e.memo:
-            continue
-        tokens = re.split(r"[\s、。．,.!！?？;；:\-\(\)\[\]「」『』\n\t]+", e.memo)
-        for t in tokens:
-            t = t.strip()
-            if not t or t in STOPWORDS or len(t) < 2:
-                continue
-            bag[t] += 1
+    # "\n" is itself a separator, so joining the memos and splitting once gives
+    # the same tokens (in the same order) as splitting each memo.
+    joined = "\n".join(e.memo for e in entries if e.memo)
+    bag = collections.Counter(
+        t for t in (t.strip() for t in _TOKEN_SPLIT.split(joined)) if len(t) >= 2 and t not in STOPWORDS
+    )
     return [w for w, _ in bag.most_common(top_k)]
 
 
@@ -257,7 +259,6 @@ def build_weekly_features(entries: List[EmotionEntry], period: str) -> WeeklySna
     counts = {l: 0 for l in LABELS}
     wcounts = {l: 0 for l in LABELS}
     daily_buckets: Dict[str, Dict[str, int]] = {}
-    intensities: List[int] = []
     motifs = []
     motif_counts: Dict[str, int] = {}
     N = len(entries)
@@ -283,27 +284,38 @@ def build_weekly_features(entries: List[EmotionEntry], period: str) -> WeeklySna
             time_buckets=time_buckets,
         )
 
-    # aggregate
-    for e in entries:
-        counts[e.label] += 1
-        wcounts[e.label] += e.intensity
-        intensities.append(e.intensity)
-        if e.date not in daily_buckets:
-            daily_buckets[e.date] = {l: 0 for l in LABELS}
-        daily_buckets[e.date][e.label] += e.intensity
-
-    # alternation & run lengths
+    # aggregate, alternation & run lengths in one pass
     changes = 0
     runs = []
-    run_len = 1
-    for i in range(1, N):
-        prev, cur = entries[i - 1], entries[i]
-        if (cur.label != prev.label) or (cur.intensity != prev.intensity):
+    run_len = 0
+    prev_label = prev_intensity = None
+    i_sum = i_sq = 0
+    # struct-of-arrays: read each attribute once here; the loops below (and the
+    # motif trigram zip) only walk these local lists
+    labels = [e.label for e in entries]
+    intens = [e.intensity for e in entries]
+    dates = [e.date for e in entries]
+    intensity_min = intensity_max = intens[0]
+    for label, inten, date in zip(labels, intens, dates):
+        counts[label] += 1
+        wcounts[label] += inten
+        i_sum += inten
+        i_sq += inten * inten
+        if inten < intensity_min:
+            intensity_min = inten
+        elif inten > intensity_max:
+            intensity_max = inten
+        day = daily_buckets.get(date)
+        if day is None:
+            day = daily_buckets[date] = {l: 0 for l in LABELS}
+        day[label] += inten
+        if run_len and (label != prev_label or inten != prev_intensity):
             changes += 1
             runs.append(run_len)
             run_len = 1
         else:
             run_len += 1
+        prev_label, prev_intensity = label, inten
     runs.append(run_len)
     alternation_rate = changes / (N - 1) if N > 1 else 0.0
     run_stats = {
@@ -312,14 +324,11 @@ def build_weekly_features(entries: List[EmotionEntry], period: str) -> WeeklySna
         "min": min(runs) if runs else 0,
     }
 
-    # intensity stats
-    intensity_std = float(statistics.pstdev(intensities)) if len(intensities) > 1 else 0.0
-    intensity_min = min(intensities) if intensities else 0
-    intensity_max = max(intensities) if intensities else 0
+    # intensity stats (population std from the running sums)
+    intensity_std = math.sqrt(max(0.0, (N * i_sq - i_sum * i_sum) / (N * N))) if N > 1 else 0.0
 
-    # motifs sliding window length=3
-    for t in range(0, N - 2):
-        tri = (entries[t].label, entries[t + 1].label, entries[t + 2].label)
+    # motifs sliding window length=3 (zip yields the trigram tuples directly)
+    for t, tri in enumerate(zip(labels, labels[1:], labels[2:])):
         name = MOTIF_DICT.get(tri)
         if name:
             motifs.append({
@@ -335,8 +344,9 @@ def build_weekly_features(entries: List[EmotionEntry], period: str) -> WeeklySna
     center = _center2d(share)
     daily_share = []
     for d, wc in sorted(daily_buckets.items()):
+        # each day's bucket is already keyed in LABELS order, so iterate it directly
         total = sum(wc.values())
-        ds = {l: (wc[l] / total if total > 0 else 0.0) for l in LABELS}
+        ds = {l: v / total for l, v in wc.items()} if total > 0 else dict.fromkeys(wc, 0.0)
         daily_share.append({"date": d, "share": ds})
 
     keywords = _keywords_from_memo(entries, top_k=5)
@@ -363,36 +373,48 @@ def build_weekly_features(entries: List[EmotionEntry], period: str) -> WeeklySna
 
 # --------------- Narrator (weekly) ---------------
 
-def _axis_explicit_text_for_alternation(z: Optional[float]) -> Tuple[str, str]:
-    if z is None:
-        return ("insufficient", "比較には十分な観測データがありませんでした。")
-    if z > 1.0:
-        return ("ok", "これまでの傾向と比べて、感情の切り替わりがやや多めでした。")
-    if z < -1.0:
-        return ("ok", "これまでの傾向と比べて、感情の切り替わりは落ち着いていました。")
-    return ("ok", "最近の週と比べて、切り替わりに大きな差は見られませんでした。")
+_AXIS_INSUFFICIENT = ("insufficient", "比較には十分な観測データがありませんでした。")
+
+# axis -> (z is None, z > 1, z < -1, otherwise); precomputed (status, text) pairs
+_AXIS_TEXT: Dict[str, Tuple[Tuple[str, str], ...]] = {
+    "alternation": (
+        _AXIS_INSUFFICIENT,
+        ("ok", "これまでの傾向と比べて、感情の切り替わりがやや多めでした。"),
+        ("ok", "これまでの傾向と比べて、感情の切り替わりは落ち着いていました。"),
+        ("ok", "最近の週と比べて、切り替わりに大きな差は見られませんでした。"),
+    ),
+    "intensity_std": (
+        _AXIS_INSUFFICIENT,
+        ("ok", "最近の週と比べて、感情の強弱の振れ幅がやや大きめでした。"),
+        ("ok", "最近の週と比べて、感情の強弱の振れ幅は小さめでした。"),
+        ("ok", "最近の週と比べて、感情の強弱に大きな変化は見られませんでした。"),
+    ),
+    "diversity": (
+        _AXIS_INSUFFICIENT,
+        ("ok", "過去と比べて、感情の種類にやや偏りが見られます。"),
+        ("ok", "過去と比べて、感情の分布はまとまりやすく見えます。"),
+        ("ok", "過去と比べて、分布の偏りに大きな変化は見られませんでした。"),
+    ),
+}
 
 
-def _axis_explicit_text_for_intensity(z: Optional[float]) -> Tuple[str, str]:
+def _z_bucket(z: Optional[float]) -> int:
     if z is None:
-        return ("insufficient", "比較には十分な観測データがありませんでした。")
+        return 0
     if z > 1.0:
-        return ("ok", "最近の週と比べて、感情の強弱の振れ幅がやや大きめでした。")
+        return 1
     if z < -1.0:
-        return ("ok", "最近の週と比べて、感情の強弱の振れ幅は小さめでした。")
-    return ("ok", "最近の週と比べて、感情の強弱に大きな変化は見られませんでした。")
+        return 2
+    return 3
 
 
-def _axis_explicit_text_for_diversity(z_entropy: Optional[float], z_gini: Optional[float]) -> Tuple[str, str]:
-    # Prefer entropy; fall back to gini
-    z = z_entropy if z_entropy is not None else z_gini
-    if z is None:
-        return ("insufficient", "比較には十分な観測データがありませんでした。")
-    if z > 1.0:
-        return ("ok", "過去と比べて、感情の種類にやや偏りが見られます。")
-    if z < -1.0:
-        return ("ok", "過去と比べて、感情の分布はまとまりやすく見えます。")
-    return ("ok", "過去と比べて、分布の偏りに大きな変化は見られませんでした。")
+# readable terms for the motifs narrate_weekly calls out by name
+_MOTIF_TERM = {
+    "sadness-peace-joy": "補正ループ（悲しみ→平穏→喜び）",
+    "anxiety-peace-joy": "補正ループ（不安→平穏→喜び）",
+    "joy-peace-joy": "往復の短いリズム（喜び→平穏→喜び）",
+    "peace-joy-peace": "往復の短いリズム（平穏→喜び→平穏）",
+}
 
 
 def _motif_text(snapshot: WeeklySnapshot) -> Tuple[str, str]:
@@ -408,24 +430,16 @@ def _motif_text(snapshot: WeeklySnapshot) -> Tuple[str, str]:
     if name is None:
         name = max(snapshot.motif_counts.items(), key=lambda kv: kv[1])[0]
     count = snapshot.motif_counts[name]
-    readable = name.replace("-", "→")
-    if readable == "sadness→peace→joy":
-        term = "補正ループ（悲しみ→平穏→喜び）"
-    elif readable == "anxiety→peace→joy":
-        term = "補正ループ（不安→平穏→喜び）"
-    elif readable == "joy→peace→joy":
-        term = "往復の短いリズム（喜び→平穏→喜び）"
-    elif readable == "peace→joy→peace":
-        term = "往復の短いリズム（平穏→喜び→平穏）"
-    else:
-        term = f"モチーフ（{readable}）"
+    term = _MOTIF_TERM.get(name)
+    if term is None:
+        term = f"モチーフ（{name.replace('-', '→')}）"
     return ("ok", f"{term}が{count}回観測されました。これまでと同様の構造が見られます。")
 
 
 def _top2_labels_text(share: Dict[str, float]) -> str:
     ordered = sorted(share.items(), key=lambda kv: kv[1], reverse=True)
     top = [k for k, v in ordered if v > 0][:2]
-    name_map = {"joy": "喜び", "sadness": "悲しみ", "anxiety": "不安", "anger": "怒り", "peace": "平穏"}
+    name_map = LABEL_JA
     if len(top) >= 2:
         return f"{name_map[top[0]]}/{name_map[top[1]]} が中心に観測された。"
     if len(top) == 1:
@@ -460,12 +474,13 @@ def narrate_weekly(snapshot: WeeklySnapshot, baseline: Optional[BaselineProfile]
         z_gini = _z_value(snapshot.gini_simpson, gin_m.get("mu") if gin_m else None, gin_m.get("sigma") if gin_m else None) if gin_m else None
 
     items = []
-    st, txt = _axis_explicit_text_for_alternation(z_alt)
-    items.append({"key": "alternation", "status": st, "text": txt})
-    st, txt = _axis_explicit_text_for_intensity(z_int)
-    items.append({"key": "intensity_std", "status": st, "text": txt})
-    st, txt = _axis_explicit_text_for_diversity(z_ent, z_gini)
-    items.append({"key": "diversity", "status": st, "text": txt})
+    for key, z in (
+        ("alternation", z_alt),
+        ("intensity_std", z_int),
+        ("diversity", z_ent if z_ent is not None else z_gini),  # prefer entropy; fall back to gini
+    ):
+        st, txt = _AXIS_TEXT[key][_z_bucket(z)]
+        items.append({"key": key, "status": st, "text": txt})
     st, txt = _motif_text(snapshot)
     items.append({"key": "motif", "status": st, "text": txt})
 
@@ -1,9 +1,23 @@
 from __future__ import annotations
-from dataclasses import dataclass, field, asdict
+from copy import deepcopy
+from dataclasses import dataclass, field, fields, asdict
 from typing import List, Dict, Optional, Any
+from datetime import datetime
+from functools import lru_cache
 import math
 
 LABELS = ["joy", "sadness", "anxiety", "anger", "peace"]
+LABEL_JA = {"joy": "喜び", "sadness": "悲しみ", "anxiety": "不安", "anger": "怒り", "peace": "平穏"}
+
+
+@lru_cache(maxsize=4096)
+def _parse_ts(ts: str) -> Optional[datetime]:
+    # EmotionEntry.timestamp is immutable in practice and re-read by several
+    # narrators, so parse each distinct string once. Returns None if unparsable.
+    try:
+        return datetime.fromisoformat(ts)
+    except (TypeError, ValueError):
+        return None
 
 
 def _with_time_bucket_aliases(d: Dict[str, Any]) -> Dict[str, Any]:
@@ -59,11 +73,18 @@ class MonthlyReport:
     time_buckets: List[Dict[str, Any]] = field(default_factory=list)
 
     def to_dict(self):
-        d = asdict(self)
-        d["weeks"] = [w.to_dict() for w in self.weeks]
+        # asdict() would deep-convert every WeeklySnapshot only for "weeks" to be
+        # replaced below, so copy the other fields directly and serialise weeks once.
+        d = {
+            name: [w.to_dict() for w in self.weeks] if name == "weeks" else deepcopy(getattr(self, name))
+            for name in _MONTHLY_REPORT_FIELDS
+        }
         return _with_time_bucket_aliases(d)
 
 
+_MONTHLY_REPORT_FIELDS = tuple(f.name for f in fields(MonthlyReport))
+
+
 @dataclass
 class BaselineMetric:
     mu: float
@@ -5,6 +5,12 @@ import json, os
 from collections import Counter
 from datetime import datetime
 
+try:  # optional: orjson parses bytes directly and is several times faster
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
 STRENGTH_SCORE = {'weak':1.0,'medium':2.0,'strong':3.0}
 
 def weight_from_strength(v):
@@ -25,24 +31,24 @@ DATA_OUT = os.path.join(ROOT, "data", "processed", "features.json")
 TEMPLATE = os.path.join(os.path.dirname(__file__), "templates", "summary.txt")
 SUMMARY_OUT = os.path.join(ROOT, "data", "processed", "summary.txt")
 
+# hour -> bucket (0-5 night, 6-11 morning, 12-17 afternoon, 18-23 evening)
+_BUCKET_BY_HOUR = ("night",) * 6 + ("morning",) * 6 + ("afternoon",) * 6 + ("evening",) * 6
+
 def time_bucket(ts):
     try:
         dt = datetime.fromisoformat(ts)
     except Exception:
         dt = datetime.fromisoformat(ts.replace(" ", "T"))
-    h = dt.hour
-    if 0 <= h < 6:   return "night"
-    if 6 <= h < 12:  return "morning"
-    if 12 <= h < 18: return "afternoon"
-    return "evening"
+    return _BUCKET_BY_HOUR[dt.hour]
 
 def load_logs(path):
     logs = []
-    with open(path, "r", encoding="utf-8") as f:
+    # bytes + 1 MiB buffer: both parsers accept UTF-8 bytes, so skip the decode step
+    with open(path, "rb", buffering=1 << 20) as f:
         for line in f:
             if not line.strip(): continue
             try:
-                logs.append(json.loads(line))
+                logs.append(_loads(line))
             except Exception:
                 pass
     return logs
@@ -59,8 +65,9 @@ def aggregate(logs):
         ts = r.get("ts","1970-01-01T00:00:00")
         try: tb[time_bucket(ts)] += 1
         except: pass
-        for w in (r.get("keywords") or []):
-            kw[str(w)] += 1
+        kws = r.get("keywords")
+        if kws:
+            kw.update(map(str, kws))  # Counter.update counts iterables in C
     total = sum(emo.values()) or 1
     ratios = {k: round(v/total, 4) for k,v in emo.items()}
     time_bias = [k for k,_ in tb.most_common(2)]
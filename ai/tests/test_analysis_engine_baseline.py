@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import math
+import statistics
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+for candidate in (ROOT, ROOT / "services", ROOT / "services" / "ai_inference"):
+    path_str = str(candidate)
+    if path_str not in sys.path:
+        sys.path.insert(0, path_str)
+
+from analysis_engine.baseline import _agg_scalar
+from analysis_engine.emotion_structure_engine.weekly import _z_value
+
+
+def test_agg_scalar_constant_input_has_zero_sigma():
+    for v in (0.7, 0.1, 1.0 / 3.0, 123.456):
+        for n in (2, 3, 7):
+            agg = _agg_scalar([v] * n)
+            assert agg["sigma"] == 0.0
+            assert agg["mu"] == v
+            assert agg["n"] == n
+
+    # a flat baseline must take the zero-variance (pct change) branch, not divide by ~1e-8
+    agg = _agg_scalar([0.7] * 3)
+    assert math.isclose(_z_value(0.8, agg["mu"], agg["sigma"]), (0.8 - 0.7) / (0.7 * 0.20))
+
+
+def test_agg_scalar_matches_statistics():
+    values = [0.12, 0.5, 0.33, 0.91, 0.07]
+    agg = _agg_scalar(values)
+    assert math.isclose(agg["mu"], statistics.mean(values), rel_tol=1e-12)
+    assert math.isclose(agg["sigma"], statistics.pstdev(values), rel_tol=1e-12)
+    assert _agg_scalar([]) == {"mu": 0.0, "sigma": 0.0, "n": 0}
+    assert _agg_scalar([0.4]) == {"mu": 0.4, "sigma": 0.0, "n": 1}
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+for candidate in (ROOT, ROOT / "services", ROOT / "services" / "ai_inference"):
+    path_str = str(candidate)
+    if path_str not in sys.path:
+        sys.path.insert(0, path_str)
+
+import observability as obs
+
+
+def test_hash_key_is_stable_16_hex_within_process():
+    k1 = obs._hash_key("cron_batch_failed")
+    assert k1 == obs._hash_key("cron_batch_failed")
+    assert len(k1) == 16
+    int(k1, 16)
+    assert obs._hash_key("") == obs._hash_key(None)  # type: ignore[arg-type]
+    assert k1 != obs._hash_key("cron_batch_errors")
+
+
+def test_send_slack_webhook_reuses_shared_client(monkeypatch):
+    import asyncio
+
+    created = []
+
+    class _Resp:
+        status_code = 200
+
+    class _FakeClient:
+        def __init__(self, *args, **kwargs):
+            created.append(self)
+            self.posts = []
+
+        async def post(self, url, **kwargs):
+            self.posts.append((url, kwargs))
+            return _Resp()
+
+        async def aclose(self):
+            pass
+
+    monkeypatch.setattr(obs, "SLACK_NOTIFY_ENABLED", True)
+    monkeypatch.setattr(obs, "SLACK_WEBHOOK_URL", "https://hooks.slack.test/x")
+    monkeypatch.setattr(obs, "SLACK_RATE_LIMIT_SECONDS", 0.0)
+    monkeypatch.setattr(obs, "_slack_client", None)
+    monkeypatch.setattr(obs.httpx, "AsyncClient", _FakeClient)
+
+    async def _run():
+        r1 = await obs.send_slack_webhook(text="a")
+        r2 = await obs.send_slack_webhook(text="b", title="t")
+        await obs.aclose_slack_client()
+        return r1, r2
+
+    r1, r2 = asyncio.run(_run())
+    assert r1.sent and r2.sent
+    assert len(created) == 1
+    assert len(created[0].posts) == 2
+    assert obs._slack_client is None
+    _, kwargs = created[0].posts[1]
+    assert kwargs["headers"]["content-type"].startswith("application/json")
+    assert json.loads(kwargs["content"]) == {"text": "*t*\nb"}
+
+
+def test_build_slack_body_is_valid_json():
+    body = obs._build_slack_body('改行\n"quote"')
+    assert json.loads(body.decode("utf-8")) == {"text": '改行\n"quote"'}
+
+
+def test_compact_kv_single_line_and_skips_none():
+    out = obs._compact_kv({"a": "x\ny\rz", "b": None, "c": 3})
+    assert out == "a=x y z c=3"
+
+
+def test_env_bool_parses_flags_uniformly(monkeypatch):
+    monkeypatch.delenv("OBS_TEST_FLAG", raising=False)
+    assert obs._env_bool("OBS_TEST_FLAG", True) is True
+    assert obs._env_bool("OBS_TEST_FLAG", False) is False
+    for raw in ("1", "true", " YES ", "on"):
+        monkeypatch.setenv("OBS_TEST_FLAG", raw)
+        assert obs._env_bool("OBS_TEST_FLAG", False) is True
+    for raw in ("0", "false", "no", "off", "y"):
+        monkeypatch.setenv("OBS_TEST_FLAG", raw)
+        assert obs._env_bool("OBS_TEST_FLAG", True) is False
+    monkeypatch.setenv("OBS_TEST_FLAG", "  ")
+    assert obs._env_bool("OBS_TEST_FLAG", True) is True
+
+
+def test_rate_limit_allow_blocks_repeat_within_window(monkeypatch):
+    monkeypatch.setattr(obs, "SLACK_RATE_LIMIT_SECONDS", 60.0)
+    monkeypatch.setattr(obs, "_last_sent_at", {})
+    assert obs._rate_limit_allow("k") is True
+    assert obs._rate_limit_allow("k") is False
+    assert obs._rate_limit_allow("other") is True
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+for candidate in (ROOT, ROOT / "services", ROOT / "services" / "ai_inference"):
+    path_str = str(candidate)
+    if path_str not in sys.path:
+        sys.path.insert(0, path_str)
+
+import prompt_templates as pt
+import self_structure_section_text_templates as sst
+
+
+def test_list_prompt_templates_is_sorted_and_mutation_safe():
+    first = pt.list_prompt_templates()
+    assert [item["template_id"] for item in first] == sorted(pt._TEMPLATES)
+
+    first[0]["description"] = "mutated"
+    first[0]["optional_vars"].append("mutated")
+
+    second = pt.list_prompt_templates()
+    assert second[0]["description"] != "mutated"
+    assert "mutated" not in second[0]["optional_vars"]
+
+
+def test_list_myprofile_section_text_templates_is_sorted_and_mutation_safe():
+    first = sst.list_myprofile_section_text_templates()
+    assert [item["template_id"] for item in first] == sorted(sst._TEMPLATE_INFOS)
+
+    first[0]["description"] = "mutated"
+    assert sst.list_myprofile_section_text_templates()[0]["description"] != "mutated"
+
+
+def test_safe_format_literal_fast_path_matches_format_semantics():
+    assert sst.safe_format("固定文", unused="x") == "固定文"
+    assert sst.safe_format("") == ""
+    assert sst.safe_format(None) == ""  # type: ignore[arg-type]
+    assert sst.safe_format("{a}-{b}", a=1, b=2) == "1-2"
+    assert sst.safe_format("{missing}") == "{missing}"
+    assert sst.safe_format("a}}b") == "a}b"
+
+
+def test_render_prompt_template_cleans_vars():
+    out = pt.render_prompt_template(" myprofile_qna_v1 ", {"question": "  なぜ？ "}, target="")
+    assert out == "【MyProfile 一問一答】\n【対象】self\n【質問】\nなぜ？"
+
+    report = pt.render_prompt_template("myprofile_monthly_report_v1", {"range_label": 0, "prev_report_text": " 前回 "})
+    assert "期間: （期間ラベル未指定）" in report
+    assert "<<PREVIOUS_REPORT_START>>\n前回\n<<PREVIOUS_REPORT_END>>" in report
+
+
+def test_render_prompt_template_validates_required_vars():
+    import pytest
+
+    with pytest.raises(pt.TemplateError, match="template_vars.question is required"):
+        pt.render_prompt_template("myprofile_qna_v1", {})
+    with pytest.raises(pt.TemplateError, match="template_vars.question is required"):
+        pt.render_prompt_template("myprofile_qna_v1", {"question": "  "})
+    with pytest.raises(pt.TemplateError, match="Unknown template_id"):
+        pt.render_prompt_template("nope", {})
+    assert pt._REQUIRED_VARS["myprofile_qna_v1"] == frozenset({"question"})
+
+
+def test_get_myprofile_section_phrases_merges_variant_over_default():
+    default = sst.get_myprofile_section_phrases("")
+    gentle = sst.get_myprofile_section_phrases("myprofile_sections_ja_gentle_v1")
+    unknown = sst.get_myprofile_section_phrases("does_not_exist")
+
+    assert gentle["sec6_title"] != default["sec6_title"]
+    assert gentle["sec1_title"] == default["sec1_title"]
+    assert unknown == default
+    assert isinstance(default["sec1_no_data_lines"], tuple)
+
+    default["report_title"] = "mutated"
+    assert sst.get_myprofile_section_phrases("")["report_title"] != "mutated"
+
+
+def test_every_registered_prompt_template_has_a_renderer():
+    assert set(pt._RENDERERS) == set(pt._TEMPLATES)
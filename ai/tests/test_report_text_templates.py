@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+for candidate in (ROOT, ROOT / "services", ROOT / "services" / "ai_inference"):
+    path_str = str(candidate)
+    if path_str not in sys.path:
+        sys.path.insert(0, path_str)
+
+import report_text_templates as rtt
+
+
+def test_parse_iso_to_dt_utc_handles_z_offsets_and_naive_values():
+    assert rtt._parse_iso_to_dt_utc("2026-01-01T00:00:00Z") == datetime(2026, 1, 1, tzinfo=timezone.utc)
+    assert rtt._parse_iso_to_dt_utc("2026-01-01T09:00:00+09:00") == datetime(2026, 1, 1, tzinfo=timezone.utc)
+    assert rtt._parse_iso_to_dt_utc(" 2026-01-01T00:00:00 ") == datetime(2026, 1, 1, tzinfo=timezone.utc)
+    assert rtt._parse_iso_to_dt_utc("") is None
+    assert rtt._parse_iso_to_dt_utc("not-a-date") is None
+
+
+def test_format_range_jst_is_memoized_and_clearable():
+    rtt.clear_report_text_caches()
+    line = rtt._format_range_jst("2026-01-31T15:00:00Z", "2026-02-28T14:59:59.999Z")
+    assert line == "対象期間（JST）: 2026/2/1 00:00 〜 2026/2/28 23:59"
+    assert rtt._format_range_jst("2026-01-31T15:00:00Z", "2026-02-28T14:59:59.999Z") is line
+    assert rtt._format_range_jst.cache_info().hits == 1
+    rtt.clear_report_text_caches()
+    assert rtt._format_range_jst.cache_info().currsize == 0
+
+
+def test_list_report_text_templates_sorted_and_mutation_safe():
+    items = rtt.list_report_text_templates()
+    assert [x["template_id"] for x in items] == sorted(rtt._TEMPLATES)
+    items[0]["required_vars"].append("mutated")
+    assert "mutated" not in rtt.list_report_text_templates()[0]["required_vars"]
+
+
+def test_render_myweb_report_text_lists_totals_and_dominant_label():
+    metrics = {"totals": {"joy": 3, "anxiety": 5}}
+    full = rtt.render_myweb_report_text(
+        "myweb_report_text_ja_v1",
+        report_type="weekly",
+        title="週報",
+        period_start_iso="2026-01-04T15:00:00Z",
+        period_end_iso="2026-01-11T14:59:59.999Z",
+        metrics=metrics,
+        astor_text="補足",
+    )
+    assert full == (
+        "週報\n\n"
+        "対象期間（JST）: 2026/1/5 00:00 〜 2026/1/11 23:59\n\n"
+        "【感情の重み付け合計】\n- 喜び: 3\n- 悲しみ: 0\n- 不安: 5\n- 怒り: 0\n- 平穏: 0\n\n"
+        "中心に出ている傾向: 不安\n\n"
+        "【ASTOR 構造洞察（補足）】\n補足"
+    )
+
+    compact = rtt.render_myweb_report_text(
+        "myweb_report_text_ja_compact_v1",
+        report_type="weekly",
+        title="",
+        period_start_iso="",
+        period_end_iso="",
+        metrics=metrics,
+        astor_text="a\nb",
+    )
+    assert compact == "傾向: 不安 / 合計: 喜び3 悲しみ0 不安5 怒り0 平穏0\nASTOR: a b"
+
+
+def test_dominant_label_coerces_non_int_totals_and_skips_bad_values():
+    assert rtt._dominant_label({"totals": {"joy": "2", "sadness": 1.9, "anxiety": "x"}}) == "喜び"
+    assert rtt._dominant_label({"totals": {"joy": None, "anger": 0}}) == "—"
+    assert rtt._dominant_label({"dominantKey": "calm"}) == "平穏"
+
+
+def test_apply_myprofile_report_text_template_wrap_strips_duplicate_header():
+    raw = "【自己構造分析レポート（月次）】\n\n\n本文1\n\n本文2"
+    out = rtt.apply_myprofile_report_text_template(
+        "myprofile_report_text_wrap_ja_v1", raw_text=raw, title="月次", range_label="1月"
+    )
+    assert out == "【自己構造分析レポート（月次）】\n月次\n期間: 1月\n\n本文1\n\n本文2"
+
+    only_header = rtt.apply_myprofile_report_text_template("myprofile_report_text_wrap_ja_v1", raw_text="【自己構造分析レポート】")
+    assert only_header == "【自己構造分析レポート】"
+
+
+def test_render_myweb_report_text_v1_omits_empty_blocks():
+    out = rtt.render_myweb_report_text(
+        "myweb_report_text_ja_v1",
+        report_type="daily",
+        title="",
+        period_start_iso="",
+        period_end_iso="",
+        metrics={},
+    )
+    assert out == (
+        "【感情の重み付け合計】\n- 喜び: 0\n- 悲しみ: 0\n- 不安: 0\n- 怒り: 0\n- 平穏: 0\n\n"
+        "中心に出ている傾向: —"
+    )
+
+
+def test_compact_astor_line_truncates_long_text():
+    out = rtt.render_myweb_report_text(
+        "myweb_report_text_ja_compact_v1",
+        report_type="daily",
+        title="",
+        period_start_iso="",
+        period_end_iso="",
+        metrics={},
+        astor_text="\n" + "あ\n" * 100,
+    )
+    astor_line = out.splitlines()[-1]
+    assert astor_line == "ASTOR: " + ("あ " * 60)[:120] + "…"
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+for candidate in (ROOT, ROOT / "services", ROOT / "services" / "ai_inference"):
+    path_str = str(candidate)
+    if path_str not in sys.path:
+        sys.path.insert(0, path_str)
+
+import structure_dict as sd
+
+
+def test_is_definition_query_ja_and_en_patterns():
+    def q(text: str, lang: str) -> bool:
+        stripped = text.strip()
+        return sd._is_definition_query(stripped, stripped.lower(), lang)
+
+    assert q("罪悪感とは？", "ja")
+    assert q(" 自己否定ってなんですか ", "ja")
+    assert not q("今日はつかれた", "ja")
+    assert q("What is guilt?", "en")
+    assert q("please EXPLAIN this", "en")
+    assert not q("explain", "en")
+
+
+def test_find_matching_entries_matches_jp_and_en_terms(monkeypatch):
+    entries = {
+        "罪悪感": {"term_jp": "罪悪感", "term_en": "Guilt"},
+        "悪感": {"term_jp": "悪感", "term_en": ""},
+        "自己否定": {"term_en": "Self-denial"},
+    }
+    monkeypatch.setattr(sd, "_STRUCTURE_CACHE", entries)
+    monkeypatch.setattr(sd, "_TERM_INDEX", None)
+
+    assert list(sd._find_matching_entries("罪悪感とは？", "罪悪感とは？", "ja")) == ["罪悪感", "悪感"]
+    assert list(sd._find_matching_entries("What is Self-denial", "what is self-denial", "en")) == ["自己否定"]
+    assert sd._find_matching_entries("なにもない", "なにもない", "ja") == {}
+
+
+def test_build_structure_answer_uses_loaded_dictionary():
+    sd._STRUCTURE_CACHE = None
+    answer = sd.build_structure_answer("罪悪感とは？", "ja")
+    assert answer is not None and answer.startswith("構造語：罪悪感（Guilt）")
+
+
+def test_load_structure_dict_parses_once_under_concurrent_cold_start(monkeypatch):
+    import threading
+
+    calls = []
+    barrier = threading.Barrier(4)
+
+    def fake_read():
+        calls.append(1)
+        return {"罪悪感": {"term_jp": "罪悪感"}}
+
+    monkeypatch.setattr(sd, "_STRUCTURE_CACHE", None)
+    monkeypatch.setattr(sd, "_TERM_INDEX", None)
+    monkeypatch.setattr(sd, "_read_structure_entries", fake_read)
+
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(sd.load_structure_dict())
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert sd._TERM_INDEX is not None and sd._TERM_INDEX[0] is results[0]
+
+
+def test_malformed_entry_is_skipped_and_dictionary_stays_cached(monkeypatch):
+    calls = []
+
+    def fake_read():
+        calls.append(1)
+        return {"壊れた": "not an object", "罪悪感": {"term_jp": "罪悪感", "term_en": "Guilt"}, "null": None}
+
+    monkeypatch.setattr(sd, "_STRUCTURE_CACHE", None)
+    monkeypatch.setattr(sd, "_TERM_INDEX", None)
+    monkeypatch.setattr(sd, "_read_structure_entries", fake_read)
+
+    first = sd.load_structure_dict()
+    assert sd.load_structure_dict() is first
+    assert len(calls) == 1
+    assert [t[0] for t in sd._TERM_INDEX[1]] == ["罪悪感"]
+    assert list(sd._find_matching_entries("壊れた罪悪感とは？", "壊れた罪悪感とは？", "ja")) == ["罪悪感"]
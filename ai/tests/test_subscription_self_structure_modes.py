@@ -27,3 +27,19 @@ def test_self_structure_modes_keep_plus_and_premium_depth():
     assert is_self_structure_mode_allowed("plus", "standard") is True
     assert is_self_structure_mode_allowed("plus", "deep") is False
     assert is_self_structure_mode_allowed("premium", "deep") is True
+
+
+def test_normalizers_accept_enums_aliases_and_padded_strings():
+    from subscription import normalize_myprofile_mode, normalize_subscription_tier
+
+    assert normalize_subscription_tier(SubscriptionTier.PLUS) is SubscriptionTier.PLUS
+    assert normalize_subscription_tier("premium") is SubscriptionTier.PREMIUM
+    assert normalize_subscription_tier(" PLUS ") is SubscriptionTier.PLUS
+    assert normalize_subscription_tier("プレミアム") is SubscriptionTier.PREMIUM
+    assert normalize_subscription_tier("unknown") is SubscriptionTier.FREE
+    assert normalize_subscription_tier("") is SubscriptionTier.FREE
+
+    assert normalize_myprofile_mode(MyProfileMode.DEEP) is MyProfileMode.STRUCTURAL
+    assert normalize_myprofile_mode("deep") is MyProfileMode.STRUCTURAL
+    assert normalize_myprofile_mode(" Standard ") is MyProfileMode.STANDARD
+    assert normalize_myprofile_mode(None) is MyProfileMode.LIGHT
@@ -0,0 +1,494 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+for candidate in (ROOT, ROOT / "services", ROOT / "services" / "ai_inference"):
+    path_str = str(candidate)
+    if path_str not in sys.path:
+        sys.path.insert(0, path_str)
+
+import subscription_store as ss
+from subscription import SubscriptionTier
+
+UA = "00000000-0000-4000-8000-000000000010"
+UB = "00000000-0000-4000-8000-000000000011"
+M1 = "00000000-0000-4000-8000-000000000101"
+M2 = "00000000-0000-4000-8000-000000000102"
+M3 = "00000000-0000-4000-8000-000000000103"
+M4 = "00000000-0000-4000-8000-000000000104"
+N1 = "00000000-0000-4000-8000-000000000201"
+N2 = "00000000-0000-4000-8000-000000000202"
+
+
+def _install_fake_fetch(monkeypatch, rows):
+    calls = []
+
+    async def fake_fetch(user_id: str, *, if_none_match=None):
+        calls.append(user_id)
+        return rows.get(user_id), None
+
+    monkeypatch.setattr(ss, "_fetch_profile_row", fake_fetch)
+    ss.invalidate_tier_cache()
+    return calls
+
+
+def test_tier_lookup_is_cached_until_invalidated(monkeypatch):
+    rows = {"u1": {"id": "u1", "subscription_tier": "plus"}}
+    calls = _install_fake_fetch(monkeypatch, rows)
+
+    async def _run():
+        first = await ss.get_subscription_tier_for_user("u1")
+        second = await ss.get_subscription_tier_for_user(" u1 ")
+        rows["u1"]["subscription_tier"] = "premium"
+        ss.invalidate_tier_cache("u1")
+        third = await ss.get_subscription_tier_for_user("u1")
+        return first, second, third
+
+    first, second, third = asyncio.run(_run())
+    assert first is SubscriptionTier.PLUS
+    assert second is SubscriptionTier.PLUS
+    assert third is SubscriptionTier.PREMIUM
+    assert calls == ["u1", "u1"]
+
+
+def test_tier_from_access_token_skips_auth_lookup_when_token_is_cached(monkeypatch):
+    import supabase_auth_token_cache as tc
+
+    rows = {"u2": {"id": "u2", "subscription_tier": "premium"}}
+    _install_fake_fetch(monkeypatch, rows)
+    monkeypatch.setattr(ss, "_ensure_supabase_config", lambda: None)
+    monkeypatch.setattr(tc, "_PROBATION", tc.OrderedDict())
+    monkeypatch.setattr(tc, "_PROTECTED", tc.OrderedDict())
+    monkeypatch.setattr(tc, "_CACHE_TTL", 60)
+
+    import httpx
+
+    auth_calls = []
+
+    async def fake_sb_get(path, **kwargs):
+        auth_calls.append(path)
+        return httpx.Response(200, json={"id": "u2"})
+
+    monkeypatch.setattr(ss, "_sb_get_shared", fake_sb_get)
+    monkeypatch.setattr(ss, "_sb_auth_headers_shared", lambda tok: {})
+
+    async def _run():
+        first = await ss.get_subscription_tier_from_access_token("tok-1")
+        second = await ss.get_subscription_tier_from_access_token("tok-1")
+        return first, second
+
+    assert asyncio.run(_run()) == (SubscriptionTier.PREMIUM, SubscriptionTier.PREMIUM)
+    assert auth_calls == ["/auth/v1/user"]
+
+
+def test_fetch_profile_row_selects_tier_column_and_falls_back_once(monkeypatch):
+    import httpx
+
+    seen_selects = []
+
+    async def fake_sb_get(path, *, params=None, headers=None, **kwargs):
+        seen_selects.append(params["select"])
+        assert headers["Accept"] == "application/vnd.pgrst.object+json"
+        if params["select"] == "id":
+            return httpx.Response(200, json={"id": "u3"})
+        return httpx.Response(400, json={"code": "42703", "message": "column profiles.subscription_tier does not exist"})
+
+    monkeypatch.setattr(ss, "_ensure_supabase_config", lambda: None)
+    monkeypatch.setattr(ss, "_sb_headers", lambda: {})
+    monkeypatch.setattr(ss, "_sb_get_shared", fake_sb_get)
+    monkeypatch.setattr(ss, "_select_tier_column_only", True)
+    monkeypatch.setattr(ss, "_tier_column_reprobe_at", 0.0)
+
+    async def _run():
+        first = await ss._fetch_profile_row("u3")
+        second = await ss._fetch_profile_row("u3")
+        return first, second
+
+    first, second = asyncio.run(_run())
+    assert first == second == ({"id": "u3"}, None)
+    assert seen_selects == ["subscription_tier", "id", "id"]
+
+
+def test_filter_parse_error_does_not_switch_tier_projection(monkeypatch):
+    import httpx
+
+    seen_selects = []
+
+    async def fake_sb_get(path, *, params=None, **kwargs):
+        seen_selects.append(params["select"])
+        return httpx.Response(
+            400,
+            json={
+                "code": "PGRST100",
+                "message": '"failed to parse filter (eq.bad"uid)" (line 1, column 12)',
+            },
+        )
+
+    monkeypatch.setattr(ss, "_ensure_supabase_config", lambda: None)
+    monkeypatch.setattr(ss, "_sb_headers", lambda: {})
+    monkeypatch.setattr(ss, "_sb_get_shared", fake_sb_get)
+    monkeypatch.setattr(ss, "_select_tier_column_only", True)
+    monkeypatch.setattr(ss, "_tier_column_reprobe_at", 0.0)
+
+    import pytest
+
+    with pytest.raises(ss._ProfileFetchError):
+        asyncio.run(ss._fetch_profile_row('bad"uid'))
+    assert ss._select_tier_column_only is True
+    assert seen_selects == ["subscription_tier"]
+
+
+def test_missing_tier_column_is_reprobed_after_ttl(monkeypatch):
+    monkeypatch.setattr(ss, "_select_tier_column_only", True)
+    monkeypatch.setattr(ss, "_tier_column_reprobe_at", 0.0)
+    monkeypatch.setattr(ss, "TIER_COLUMN_REPROBE_SECONDS", 60.0)
+
+    ss._mark_tier_column_missing()
+    assert ss._tier_column_selectable() is False
+    monkeypatch.setattr(ss, "_tier_column_reprobe_at", ss.time.monotonic() - 1)
+    assert ss._tier_column_selectable() is True
+
+
+def test_fetch_profile_row_treats_406_as_missing_row(monkeypatch):
+    import httpx
+
+    async def fake_sb_get(path, **kwargs):
+        return httpx.Response(406, json={"code": "PGRST116"})
+
+    monkeypatch.setattr(ss, "_ensure_supabase_config", lambda: None)
+    monkeypatch.setattr(ss, "_sb_headers", lambda: {})
+    monkeypatch.setattr(ss, "_sb_get_shared", fake_sb_get)
+
+    assert asyncio.run(ss._fetch_profile_row("missing")) == (None, None)
+
+
+def test_resp_json_parses_body_and_raises_on_empty():
+    import httpx
+    import pytest
+
+    assert ss._resp_json(httpx.Response(200, json={"id": "u1"})) == {"id": "u1"}
+    with pytest.raises(ValueError):
+        ss._resp_json(httpx.Response(200, content=b""))
+
+
+def test_concurrent_cold_lookups_share_one_profile_fetch(monkeypatch):
+    monkeypatch.setattr(ss, "_tier_cache", ss.OrderedDict())
+    calls = []
+
+    async def fake_fetch(uid):
+        calls.append(uid)
+        await asyncio.sleep(0.01)
+        return {"id": uid, "subscription_tier": "plus"}, None
+
+    monkeypatch.setattr(ss, "_fetch_profile_row", fake_fetch)
+
+    async def _run():
+        return await asyncio.gather(*(ss.get_subscription_tier_for_user("u9") for _ in range(5)))
+
+    assert asyncio.run(_run()) == [SubscriptionTier.PLUS] * 5
+    assert calls == ["u9"]
+    assert ss._profile_fetch_inflight == {}
+
+
+def test_tier_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(ss, "_tier_cache", ss.OrderedDict())
+    monkeypatch.setattr(ss, "TIER_CACHE_MAX_ITEMS", 2)
+
+    ss._tier_cache_set("a", SubscriptionTier.PLUS)
+    ss._tier_cache_set("b", SubscriptionTier.FREE)
+    assert ss._tier_cache_get("a") is SubscriptionTier.PLUS  # "a" is now most recent
+    ss._tier_cache_set("c", SubscriptionTier.PREMIUM)
+
+    assert list(ss._tier_cache) == ["a", "c"]
+    assert ss._tier_cache_get("b") is None
+
+
+def test_bulk_tier_lookup_uses_one_in_query_for_uncached_users(monkeypatch):
+    import httpx
+
+    monkeypatch.setattr(ss, "_tier_cache", ss.OrderedDict())
+    monkeypatch.setattr(ss, "_ensure_supabase_config", lambda: None)
+    monkeypatch.setattr(ss, "_sb_headers", lambda: {})
+    ss._tier_cache_set("cached", SubscriptionTier.PREMIUM)
+    seen = []
+
+    async def fake_sb_get(path, *, params=None, **kwargs):
+        seen.append(params)
+        return httpx.Response(200, json=[{"id": UA, "subscription_tier": "plus"}])
+
+    monkeypatch.setattr(ss, "_sb_get_shared", fake_sb_get)
+
+    out = asyncio.run(ss.get_subscription_tiers_for_users(["cached", UA, UB, UA, ""]))
+
+    assert out == {"cached": SubscriptionTier.PREMIUM, UA: SubscriptionTier.PLUS, UB: SubscriptionTier.FREE}
+    assert seen == [{"select": "id,subscription_tier", "id": f'in.("{UA}","{UB}")'}]
+    assert ss._tier_cache_get(UB) is SubscriptionTier.FREE
+
+
+def test_failed_profile_fetch_is_negative_cached_briefly(monkeypatch):
+    import httpx
+
+    monkeypatch.setattr(ss, "_tier_cache", ss.OrderedDict())
+    monkeypatch.setattr(ss, "_ensure_supabase_config", lambda: None)
+    monkeypatch.setattr(ss, "_sb_headers", lambda: {})
+    monkeypatch.setattr(ss, "TIER_CACHE_NEGATIVE_TTL_SECONDS", 5)
+
+    async def fake_sb_get(path, **kwargs):
+        return httpx.Response(503, text="unavailable")
+
+    monkeypatch.setattr(ss, "_sb_get_shared", fake_sb_get)
+
+    assert asyncio.run(ss.get_subscription_tier_for_user("down")) is SubscriptionTier.FREE
+    fresh_until, stale_until, tier, _etag = ss._tier_cache["down"]
+    assert tier is SubscriptionTier.FREE
+    assert fresh_until - ss.time.monotonic() <= 5
+    assert stale_until == fresh_until
+
+
+def test_stale_tier_is_served_while_refreshing_in_background(monkeypatch):
+    rows = {"u5": {"id": "u5", "subscription_tier": "premium"}}
+    calls = _install_fake_fetch(monkeypatch, rows)
+    monkeypatch.setattr(ss, "TIER_CACHE_STALE_SECONDS", 300)
+
+    now = ss.time.monotonic()
+    ss._tier_cache["u5"] = (now - 1, now + 100, SubscriptionTier.PLUS, None)
+
+    async def _run():
+        stale = await ss.get_subscription_tier_for_user("u5")
+        await asyncio.sleep(0)
+        await asyncio.gather(*ss._tier_refresh_tasks)
+        return stale
+
+    assert asyncio.run(_run()) is SubscriptionTier.PLUS
+    assert calls == ["u5"]
+    assert ss._tier_cache_get("u5") is SubscriptionTier.PREMIUM
+
+
+def test_tier_from_access_token_delegates_to_shared_token_verification(monkeypatch):
+    rows = {"u6": {"id": "u6", "subscription_tier": "plus"}}
+    _install_fake_fetch(monkeypatch, rows)
+    monkeypatch.setattr(ss, "_ensure_supabase_config", lambda: None)
+    monkeypatch.setattr(ss, "lookup_cached_user_id", lambda tok: None)
+    monkeypatch.setattr(ss, "token_verification_enabled", lambda: True)
+    verified = []
+
+    async def fake_resolve(tok):
+        verified.append(tok)
+        return "u6" if tok == "good" else None
+
+    async def fail_sb_get(*args, **kwargs):
+        raise AssertionError("should not call /auth/v1/user directly")
+
+    monkeypatch.setattr(ss, "resolve_user_id_verified_cached", fake_resolve)
+    monkeypatch.setattr(ss, "_sb_get_shared", fail_sb_get)
+
+    assert asyncio.run(ss.get_subscription_tier_from_access_token("good")) is SubscriptionTier.PLUS
+    assert asyncio.run(ss.get_subscription_tier_from_access_token("bad")) is SubscriptionTier.FREE
+    assert verified == ["good", "bad"]
+
+
+def test_tier_lookup_normalizes_uid_before_cache_probe_on_miss(monkeypatch):
+    calls = _install_fake_fetch(monkeypatch, {"u7": {"id": "u7", "subscription_tier": "plus"}})
+
+    async def _run():
+        first = await ss.get_subscription_tier_for_user(" u7 ")
+        second = await ss.get_subscription_tier_for_user("u7")
+        third = await ss.get_subscription_tier_for_user(" u7")
+        return first, second, third
+
+    assert asyncio.run(_run()) == (SubscriptionTier.PLUS,) * 3
+    assert calls == ["u7"]
+
+
+def test_refresh_sends_if_none_match_and_extends_entry_on_304(monkeypatch):
+    import httpx
+
+    monkeypatch.setattr(ss, "_tier_cache", ss.OrderedDict())
+    monkeypatch.setattr(ss, "_ensure_supabase_config", lambda: None)
+    monkeypatch.setattr(ss, "_sb_headers", lambda: {})
+    monkeypatch.setattr(ss, "_single_row_headers", None)
+    sent_etags = []
+
+    async def fake_sb_get(path, *, headers=None, **kwargs):
+        sent_etags.append(headers.get("If-None-Match"))
+        if headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, json={"subscription_tier": "plus"}, headers={"ETag": '"v1"'})
+
+    monkeypatch.setattr(ss, "_sb_get_shared", fake_sb_get)
+
+    async def _run():
+        first = await ss.get_subscription_tier_for_user("u8")
+        fresh_until, stale_until, tier, etag = ss._tier_cache["u8"]
+        ss._tier_cache["u8"] = (ss.time.monotonic() - 1, stale_until, tier, etag)
+        stale = await ss.get_subscription_tier_for_user("u8")
+        await asyncio.gather(*ss._tier_refresh_tasks)
+        return first, stale
+
+    assert asyncio.run(_run()) == (SubscriptionTier.PLUS, SubscriptionTier.PLUS)
+    assert sent_etags == [None, '"v1"']
+    fresh_until, _stale, tier, etag = ss._tier_cache["u8"]
+    assert tier is SubscriptionTier.PLUS and etag == '"v1"'
+    assert fresh_until > ss.time.monotonic()
+
+
+def test_l1_miss_is_served_from_redis_l2_without_supabase(monkeypatch):
+    calls = _install_fake_fetch(monkeypatch, {"u10": {"id": "u10", "subscription_tier": "free"}})
+    shared = {"tier:u10": "premium"}
+    writes = []
+
+    async def fake_l2_get(key):
+        return shared.get(key)
+
+    monkeypatch.setattr(ss, "l2_enabled", lambda: True)
+    monkeypatch.setattr(ss, "l2_get", fake_l2_get)
+    monkeypatch.setattr(ss, "l2_set_soon", lambda key, ttl, value: writes.append((key, value)))
+
+    assert asyncio.run(ss.get_subscription_tier_for_user("u10")) is SubscriptionTier.PREMIUM
+    assert calls == []
+    assert writes == []  # populated from L2: not written back
+
+    shared.clear()
+    ss.invalidate_tier_cache("u10")
+    assert asyncio.run(ss.get_subscription_tier_for_user("u10")) is SubscriptionTier.FREE
+    assert calls == ["u10"]
+    assert writes == [("tier:u10", "free")]
+
+
+def test_long_lived_task_sees_invalidation_from_another_task(monkeypatch):
+    rows = {"u11": {"id": "u11", "subscription_tier": "plus"}}
+    calls = _install_fake_fetch(monkeypatch, rows)
+
+    async def _invalidate_elsewhere():
+        rows["u11"]["subscription_tier"] = "free"
+        ss.invalidate_tier_cache("u11")
+
+    async def _worker():
+        first = await ss.get_subscription_tier_for_user("u11")
+        # e.g. a store webhook handled by another request / task
+        await asyncio.create_task(_invalidate_elsewhere())
+        second = await ss.get_subscription_tier_for_user("u11")
+        return first, second
+
+    assert asyncio.run(_worker()) == (SubscriptionTier.PLUS, SubscriptionTier.FREE)
+    assert calls == ["u11", "u11"]
+
+
+def test_concurrent_single_lookups_are_micro_batched_into_one_in_query(monkeypatch):
+    import httpx
+
+    monkeypatch.setattr(ss, "_tier_cache", ss.OrderedDict())
+    monkeypatch.setattr(ss, "_ensure_supabase_config", lambda: None)
+    monkeypatch.setattr(ss, "_sb_headers", lambda: {})
+    seen = []
+
+    async def fake_sb_get(path, *, params=None, **kwargs):
+        seen.append(params)
+        return httpx.Response(200, json=[{"id": M1, "subscription_tier": "premium"}, {"id": M2, "subscription_tier": "plus"}])
+
+    async def fake_l2_get(key):
+        return "plus" if key == f"tier:{M4}" else None
+
+    monkeypatch.setattr(ss, "_sb_get_shared", fake_sb_get)
+    monkeypatch.setattr(ss, "l2_enabled", lambda: True)
+    monkeypatch.setattr(ss, "l2_get", fake_l2_get)
+    monkeypatch.setattr(ss, "l2_set_soon", lambda key, ttl, value: None)
+
+    async def _run():
+        return await asyncio.gather(*(ss.get_subscription_tier_for_user(uid) for uid in (M1, M2, M3, M1, M4)))
+
+    assert asyncio.run(_run()) == [
+        SubscriptionTier.PREMIUM,
+        SubscriptionTier.PLUS,
+        SubscriptionTier.FREE,
+        SubscriptionTier.PREMIUM,
+        SubscriptionTier.PLUS,
+    ]
+    assert seen == [{"select": "id,subscription_tier", "id": f'in.("{M1}","{M2}","{M3}")'}]  # M4 came from L2
+    assert ss._profile_fetch_inflight == {} and ss._profile_batch is None
+
+
+def test_rejected_batch_falls_back_to_single_lookups_for_co_batched_users(monkeypatch):
+    import httpx
+
+    monkeypatch.setattr(ss, "_tier_cache", ss.OrderedDict())
+    monkeypatch.setattr(ss, "_ensure_supabase_config", lambda: None)
+    monkeypatch.setattr(ss, "_sb_headers", lambda: {})
+    monkeypatch.setattr(ss, "TIER_CACHE_NEGATIVE_TTL_SECONDS", 5)
+    tiers = {N1: "premium", N2: "plus"}
+    seen = []
+
+    async def fake_sb_get(path, *, params=None, **kwargs):
+        seen.append(params["id"])
+        if params["id"].startswith("in."):
+            return httpx.Response(400, json={"code": "22P02", "message": "invalid input syntax for type uuid"})
+        uid = params["id"][len("eq."):]
+        if uid not in tiers:
+            return httpx.Response(400, json={"code": "22P02", "message": "invalid input syntax for type uuid"})
+        return httpx.Response(200, json={"subscription_tier": tiers[uid]})
+
+    monkeypatch.setattr(ss, "_sb_get_shared", fake_sb_get)
+
+    out = asyncio.run(ss.get_subscription_tiers_for_users([N1, N2, "not-a-uuid"]))
+    assert out == {N1: SubscriptionTier.PREMIUM, N2: SubscriptionTier.PLUS, "not-a-uuid": SubscriptionTier.FREE}
+    # the non-UUID never joins the shared in.() list
+    assert seen[0] == f'in.("{N1}","{N2}")'
+    assert sorted(seen[1:]) == sorted([f"eq.{N1}", f"eq.{N2}", "eq.not-a-uuid"])
+    for uid in (N1, N2):
+        fresh_until, stale_until, _tier, _etag = ss._tier_cache[uid]
+        assert fresh_until - ss.time.monotonic() > 5  # real tier, normal TTL
+    fresh_until, _stale_until, _tier, _etag = ss._tier_cache["not-a-uuid"]
+    assert fresh_until - ss.time.monotonic() <= 5  # only the bad uid is negative cached
+
+
+def test_batch_outage_negative_caches_every_waiting_user(monkeypatch):
+    import httpx
+
+    monkeypatch.setattr(ss, "_tier_cache", ss.OrderedDict())
+    monkeypatch.setattr(ss, "_ensure_supabase_config", lambda: None)
+    monkeypatch.setattr(ss, "_sb_headers", lambda: {})
+    monkeypatch.setattr(ss, "TIER_CACHE_NEGATIVE_TTL_SECONDS", 5)
+
+    async def fake_sb_get(path, **kwargs):
+        return httpx.Response(503, text="unavailable")
+
+    monkeypatch.setattr(ss, "_sb_get_shared", fake_sb_get)
+
+    out = asyncio.run(ss.get_subscription_tiers_for_users([N1, N2]))
+    assert out == {N1: SubscriptionTier.FREE, N2: SubscriptionTier.FREE}
+    for uid in (N1, N2):
+        fresh_until, stale_until, _tier, _etag = ss._tier_cache[uid]
+        assert fresh_until - ss.time.monotonic() <= 5 and stale_until == fresh_until
+
+
+def test_stale_window_is_off_by_default(monkeypatch):
+    monkeypatch.setattr(ss, "_tier_cache", ss.OrderedDict())
+    assert ss.TIER_CACHE_STALE_SECONDS == 0
+
+    ss._tier_cache_set("d1", SubscriptionTier.PREMIUM, share=False)
+    fresh_until, stale_until, _tier, _etag = ss._tier_cache["d1"]
+    assert stale_until == fresh_until  # a downgrade is not masked past the TTL
+
+
+def test_batched_lookup_matches_uppercase_uid_to_canonical_row_id(monkeypatch):
+    import httpx
+
+    monkeypatch.setattr(ss, "_tier_cache", ss.OrderedDict())
+    monkeypatch.setattr(ss, "_ensure_supabase_config", lambda: None)
+    monkeypatch.setattr(ss, "_sb_headers", lambda: {})
+    upper = "ABCDEF00-0000-4000-8000-000000000301"
+    lower = upper.lower()
+    seen = []
+
+    async def fake_sb_get(path, *, params=None, **kwargs):
+        seen.append(params["id"])
+        return httpx.Response(200, json=[{"id": lower, "subscription_tier": "premium"}, {"id": N1, "subscription_tier": "plus"}])
+
+    monkeypatch.setattr(ss, "_sb_get_shared", fake_sb_get)
+
+    out = asyncio.run(ss.get_subscription_tiers_for_users([upper, N1, lower]))
+    assert out == {upper: SubscriptionTier.PREMIUM, N1: SubscriptionTier.PLUS, lower: SubscriptionTier.PREMIUM}
+    assert seen == [f'in.("{lower}","{N1}")']
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+for candidate in (ROOT, ROOT / "services", ROOT / "services" / "ai_inference"):
+    path_str = str(candidate)
+    if path_str not in sys.path:
+        sys.path.insert(0, path_str)
+
+import supabase_auth_token_cache as tc
+
+
+def test_concurrent_verifications_for_same_token_share_one_request(monkeypatch):
+    monkeypatch.setattr(tc, "_PROBATION", tc.OrderedDict())
+    monkeypatch.setattr(tc, "_PROTECTED", tc.OrderedDict())
+    monkeypatch.setattr(tc, "_VERIFY_ENABLED", True)
+    calls = []
+
+    async def fake_verify(tok):
+        calls.append(tok)
+        await asyncio.sleep(0.01)
+        return "user-1"
+
+    monkeypatch.setattr(tc, "_verify_with_supabase", fake_verify)
+
+    async def _run():
+        return await asyncio.gather(*(tc.resolve_user_id_verified_cached("tok") for _ in range(5)))
+
+    assert asyncio.run(_run()) == ["user-1"] * 5
+    assert calls == ["tok"]
+    assert tc._verify_inflight == {}
+    assert tc.lookup_cached_user_id("tok") == "user-1"
+
+
+def test_cache_keeps_repeat_tokens_through_a_scan_of_one_shot_tokens(monkeypatch):
+    monkeypatch.setattr(tc, "_PROBATION", tc.OrderedDict())
+    monkeypatch.setattr(tc, "_PROTECTED", tc.OrderedDict())
+    monkeypatch.setattr(tc, "_PROBATION_MAX", 2)
+    monkeypatch.setattr(tc, "_PROTECTED_MAX", 2)
+
+    tc._cache_set(b"hot", "u-hot", expires_at=100.0)
+    assert tc._cache_get(b"hot", now_ts=1.0) == "u-hot"  # second touch: promoted
+
+    for i in range(10):
+        tc._cache_set(b"scan%d" % i, None, expires_at=100.0)
+
+    assert tc._cache_get(b"hot", now_ts=1.0) == "u-hot"
+    assert list(tc._PROBATION) == [b"scan8", b"scan9"]
+    assert tc._cache_get(b"scan0", now_ts=1.0) is tc._MISS
+    assert tc._cache_get(b"hot", now_ts=101.0) is tc._MISS  # expired
+    assert not tc._PROTECTED
+
+
+def test_verify_with_supabase_parses_user_and_rejects_empty_body(monkeypatch):
+    import httpx
+
+    responses = [httpx.Response(200, json={"id": "user-9"}), httpx.Response(200, content=b""), httpx.Response(200, json=[1])]
+
+    class _Client:
+        async def get(self, url, **kwargs):
+            return responses.pop(0)
+
+    def fake_client():
+        return _Client()
+
+    monkeypatch.setattr(tc, "_SUPABASE_URL", "https://example.supabase.co")
+    monkeypatch.setattr(tc, "_SUPABASE_API_KEY", "anon")
+    monkeypatch.setattr(tc, "get_async_client", fake_client)
+
+    async def _run():
+        return [await tc._verify_with_supabase("tok") for _ in range(3)]
+
+    assert asyncio.run(_run()) == ["user-9", None, None]
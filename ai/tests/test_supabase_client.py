@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+for candidate in (ROOT, ROOT / "services", ROOT / "services" / "ai_inference"):
+    path_str = str(candidate)
+    if path_str not in sys.path:
+        sys.path.insert(0, path_str)
+
+import httpx
+
+import supabase_client as sc
+
+
+def _configure(monkeypatch, key: str = "srk") -> None:
+    monkeypatch.setattr(sc, "SUPABASE_URL", "https://example.supabase.co")
+    monkeypatch.setattr(sc, "SUPABASE_SERVICE_ROLE_KEY", key)
+
+
+def test_service_role_headers_are_built_once_and_returned_as_copies(monkeypatch):
+    _configure(monkeypatch)
+    first = sc.sb_service_role_headers_json()
+    assert first == {"apikey": "srk", "Authorization": "Bearer srk", "Content-Type": "application/json"}
+    first["Prefer"] = "mutated"
+    assert "Prefer" not in sc.sb_service_role_headers_json()
+    assert sc.sb_service_role_headers(prefer="count=exact") == {
+        "apikey": "srk",
+        "Authorization": "Bearer srk",
+        "Prefer": "count=exact",
+    }
+    base = sc._service_role_base_headers()[1]
+    assert sc._service_role_base_headers()[1] is base
+
+    _configure(monkeypatch, key="rotated")
+    assert sc.sb_service_role_headers_json()["Authorization"] == "Bearer rotated"
+
+
+def test_sb_request_sends_shared_headers_and_merges_prefer(monkeypatch):
+    _configure(monkeypatch)
+    sent = []
+
+    class FakeClient:
+        async def request(self, *, method, url, headers, **kwargs):
+            sent.append((method, url, dict(headers)))
+            return httpx.Response(200)
+
+    def fake_get_async_client():
+        return FakeClient()
+
+    monkeypatch.setattr(sc, "get_async_client", fake_get_async_client)
+
+    async def _run():
+        await sc.sb_get("rest/v1/profiles")
+        await sc.sb_get("/rest/v1/profiles", prefer="count=exact")
+        await sc.sb_get("/rest/v1/profiles", headers={"Prefer": "count=exact"}, prefer="count=exact,return=minimal")
+
+    asyncio.run(_run())
+    assert sent[0][1] == "https://example.supabase.co/rest/v1/profiles"
+    assert "Prefer" not in sent[0][2] and sent[0][2]["Authorization"] == "Bearer srk"
+    assert sent[1][2]["Prefer"] == "count=exact"
+    assert sent[2][2] == {"Prefer": "count=exact,return=minimal"}
+    assert "Prefer" not in sc._service_role_base_headers()[1]
+
+
+def test_ensure_supabase_config_latches_after_first_success(monkeypatch):
+    import pytest
+
+    monkeypatch.setattr(sc, "_config_ok", False)
+    monkeypatch.setattr(sc, "SUPABASE_URL", "")
+    with pytest.raises(RuntimeError, match="Supabase configuration missing"):
+        sc.ensure_supabase_config()
+    assert sc._config_ok is False
+
+    _configure(monkeypatch)
+    sc.ensure_supabase_config()
+    assert sc._config_ok is True
+
+
+def test_parse_content_range_total():
+    assert sc._parse_content_range_total("0-99/12345") == 12345
+    assert sc._parse_content_range_total("*/7") == 7
+    assert sc._parse_content_range_total("0-0/ 3 ") == 3
+    assert sc._parse_content_range_total("0-0/*") is None
+    assert sc._parse_content_range_total("123") is None
+    assert sc._parse_content_range_total("") is None
+    assert sc._parse_content_range_total(None) is None  # type: ignore[arg-type]
+
+
+def test_sb_request_encodes_json_body_once_with_content_type(monkeypatch):
+    import json as stdlib_json
+    from decimal import Decimal
+
+    _configure(monkeypatch)
+    sent = []
+
+    class FakeClient:
+        async def request(self, *, method, url, headers, content=None, json=None, **kwargs):
+            sent.append((dict(headers), content, json))
+            return httpx.Response(200)
+
+    monkeypatch.setattr(sc, "get_async_client", lambda: FakeClient())
+
+    async def _run():
+        await sc.sb_post("/rest/v1/rpc/fn", json={"p_user": "u1", "n": 1, 2: "非ASCII"})
+        await sc.sb_post("/rest/v1/rpc/fn", json={"p": 1}, headers={"apikey": "k"})
+        await sc.sb_post("/rest/v1/rpc/fn", json={"d": Decimal("1.5")})
+
+    asyncio.run(_run())
+    headers, content, body = sent[0]
+    if sc._orjson is None:
+        assert content is None and body == {"p_user": "u1", "n": 1, 2: "非ASCII"}
+        return
+    assert body is None
+    assert stdlib_json.loads(content) == {"p_user": "u1", "n": 1, "2": "非ASCII"}
+    assert headers["Content-Type"] == "application/json"
+    assert sent[1][0] == {"apikey": "k", "Content-Type": "application/json"}
+    assert sent[2][1] is None and sent[2][2] == {"d": Decimal("1.5")}
+
+
+def test_merge_prefer_dedupes_tokens_and_keeps_identical_value():
+    h = {"Prefer": "count=exact"}
+    assert sc._merge_prefer(h, "count=exact") is h and h["Prefer"] == "count=exact"
+    assert sc._merge_prefer({"Prefer": "count=exact"}, "return=minimal, count=exact")["Prefer"] == "count=exact,return=minimal"
+    assert sc._merge_prefer({}, "count=exact") == {"Prefer": "count=exact"}
+    assert sc._merge_prefer({"Prefer": "a"}, None) == {"Prefer": "a"}
+
+
+def test_sb_count_prefers_content_range_and_falls_back_to_rows(monkeypatch):
+    responses = [
+        httpx.Response(200, headers={"Content-Range": "0-1/42"}, json=[{}, {}]),
+        httpx.Response(206, json=[{"id": 1}, {"id": 2}, {"id": 3}]),
+        httpx.Response(200, content=b"[]"),
+        httpx.Response(200, content=b"not json"),
+        httpx.Response(500, content=b"boom" * 1000),
+    ]
+
+    async def fake_sb_get(path, **kwargs):
+        assert kwargs["prefer"] == "count=exact"
+        return responses.pop(0)
+
+    monkeypatch.setattr(sc, "sb_get", fake_sb_get)
+
+    async def _run():
+        return [await sc.sb_count("/rest/v1/t", params={}) for _ in range(5)]
+
+    assert asyncio.run(_run()) == [42, 3, 0, 0, 0]
+
+
+def test_ssl_context_uses_httpx_trust_store_and_is_built_once(monkeypatch):
+    seen = []
+    real = httpx.create_ssl_context
+
+    def fake_create_ssl_context(*args, **kwargs):
+        seen.append(kwargs)
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(sc, "_ssl_context", None)
+    monkeypatch.setattr(sc.httpx, "create_ssl_context", fake_create_ssl_context)
+    first = sc._get_ssl_context()
+    assert sc._get_ssl_context() is first
+    assert len(seen) == 1
+    # certifi / SSL_CERT_FILE bundle is loaded, not just whatever the host ships
+    assert first.cert_store_stats()["x509_ca"] > 0
+
+
+def test_http2_is_opt_in(monkeypatch):
+    monkeypatch.setattr(sc, "_h2", object())
+    monkeypatch.delenv("SUPABASE_HTTP2", raising=False)
+    assert sc._http2_enabled() is False
+    monkeypatch.setenv("SUPABASE_HTTP2", "1")
+    assert sc._http2_enabled() is True
+    monkeypatch.setattr(sc, "_h2", None)
+    assert sc._http2_enabled() is False
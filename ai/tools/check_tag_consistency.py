@@ -1,21 +1,29 @@
 #!/usr/bin/env python3
 # Simple scanner to find hard-coded 'CocolonAI' occurrences.
 import os
+from concurrent.futures import ThreadPoolExecutor
 target = "CocolonAI"
+needle = target.encode("ascii")
 exts = {".py",".ts",".tsx",".js",".json",".yaml",".yml",".md",".txt",".ini",".env"}
 root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-hits = []
-for dp, dn, fn in os.walk(root):
-    for f in fn:
-        if os.path.splitext(f)[1] in exts:
-            p = os.path.join(dp, f)
-            try:
-                with open(p,"r",encoding="utf-8") as fh:
-                    s=fh.read()
-                if target in s:
-                    hits.append(p)
-            except Exception:
-                pass
+
+def _contains_needle(p):
+    try:
+        # bytes search: no UTF-8 decode of every file just to look for an ASCII needle
+        with open(p,"rb") as fh:
+            return needle in fh.read()
+    except Exception:
+        return False
+
+paths = [
+    os.path.join(dp, f)
+    for dp, dn, fn in os.walk(root)
+    for f in fn
+    if os.path.splitext(f)[1] in exts
+]
+# reads are I/O-bound (the GIL is released during read), so overlap them
+with ThreadPoolExecutor(max_workers=min(32, 4 * (os.cpu_count() or 1))) as ex:
+    hits = [p for p, hit in zip(paths, ex.map(_contains_needle, paths)) if hit]
 print("Found hard-coded 'CocolonAI' in:")
 for h in hits:
     print(" -", h)
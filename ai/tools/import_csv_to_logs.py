@@ -13,6 +13,17 @@ Options:
 import csv, json, os, argparse, re
 from datetime import datetime
 
+try:  # optional: faster JSONL writing
+    import orjson
+
+    def _dumps_line(obj) -> bytes:
+        return orjson.dumps(obj) + b"\n"
+except ImportError:
+    def _dumps_line(obj) -> bytes:
+        return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+FLUSH_EVERY = 10_000  # rows buffered per write()
+
 def parse_ts(s: str) -> str:
     s = s.strip()
     if s.endswith("Z"):
@@ -23,7 +34,8 @@ def parse_ts(s: str) -> str:
     except Exception:
         raise ValueError(f"Invalid ISO timestamp: {s}")
 
-def split_keywords(s: str, sep_regex: str):
+def split_keywords(s: str, sep_regex):
+    # sep_regex: pattern string or a precompiled re.Pattern
     s = s.strip()
     if not s:
         return []
@@ -44,10 +56,12 @@ def main():
     ap.add_argument("--keywords-sep", default=r",|、|\s+")
     args = ap.parse_args()
 
+    sep_re = re.compile(args.keywords_sep)  # compiled once for all rows
     rows = 0
     added = 0
     os.makedirs(os.path.dirname(args.out), exist_ok=True)
-    with open(args.input, "r", encoding="utf-8-sig") as f, open(args.out, "a", encoding="utf-8") as w:
+    chunks = []
+    with open(args.input, "r", encoding="utf-8-sig") as f, open(args.out, "ab") as w:
         reader = csv.DictReader(f)
         for r in reader:
             rows += 1
@@ -71,7 +85,7 @@ def main():
                 except Exception:
                     print(f"[warn] row {rows}: strength not a number -> ignore")
             kw_raw = r.get(args.keywords_col, "")
-            keywords = split_keywords(kw_raw, args.keywords_sep) if kw_raw else []
+            keywords = split_keywords(kw_raw, sep_re) if kw_raw else []
             note = r.get(args.note_col, "")
 
             obj = {"uid": uid, "ts": ts_iso, "emotion": emo}
@@ -82,8 +96,12 @@ def main():
             if note:
                 obj["note"] = note
 
-            w.write(json.dumps(obj, ensure_ascii=False) + "\n")
+            chunks.append(_dumps_line(obj))
             added += 1
+            if len(chunks) >= FLUSH_EVERY:
+                w.write(b"".join(chunks))
+                chunks.clear()
+        w.write(b"".join(chunks))
 
     print(f"[done] read={rows}, appended={added}, out={args.out}")
 
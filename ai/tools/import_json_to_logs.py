@@ -10,6 +10,20 @@ Usage:
 import json, os, argparse
 from datetime import datetime
 
+try:  # optional: faster JSONL parsing / writing
+    import orjson
+    _loads = orjson.loads
+
+    def _dumps_line(obj) -> bytes:
+        return orjson.dumps(obj) + b"\n"
+except ImportError:
+    _loads = json.loads
+
+    def _dumps_line(obj) -> bytes:
+        return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+FLUSH_EVERY = 10_000  # rows buffered per write()
+
 def parse_ts(s: str) -> str:
     s = s.strip()
     if s.endswith("Z"):
@@ -61,7 +75,17 @@ def main():
 
     os.makedirs(os.path.dirname(args.out), exist_ok=True)
     appended = 0
-    with open(args.out, "a", encoding="utf-8") as w:
+    chunks = []
+
+    def emit(obj):
+        nonlocal appended
+        chunks.append(_dumps_line(obj))
+        appended += 1
+        if len(chunks) >= FLUSH_EVERY:
+            w.write(b"".join(chunks))
+            chunks.clear()
+
+    with open(args.out, "ab") as w:
         with open(args.input, "r", encoding="utf-8") as f:
             first = f.read(1)
             f.seek(0)
@@ -72,8 +96,7 @@ def main():
                     if obj is None:
                         print(f"[skip] idx {i}: {err}")
                         continue
-                    w.write(json.dumps(obj, ensure_ascii=False) + "\n")
-                    appended += 1
+                    emit(obj)
             else:
                 # JSONL
                 for i, line in enumerate(f, start=1):
@@ -81,7 +104,7 @@ def main():
                     if not line:
                         continue
                     try:
-                        e = json.loads(line)
+                        e = _loads(line)
                     except Exception:
                         print(f"[skip] line {i}: not valid JSON")
                         continue
@@ -89,8 +112,8 @@ def main():
                     if obj is None:
                         print(f"[skip] line {i}: {err}")
                         continue
-                    w.write(json.dumps(obj, ensure_ascii=False) + "\n")
-                    appended += 1
+                    emit(obj)
+        w.write(b"".join(chunks))
     print(f"[done] appended={appended}, out={args.out}")
 
 if __name__ == "__main__":
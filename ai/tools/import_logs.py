@@ -21,16 +21,37 @@ Usage examples:
     "note": "帰宅してから急に沈んだ" # 任意
   }
 """
-import os, sys, json, csv, argparse, re, datetime
+import os, sys, json, csv, argparse, re, datetime, itertools, collections, multiprocessing
 
 try:
     import yaml
 except Exception:
     yaml = None  # mapping未使用なら不要
 
+try:  # optional: orjson は bytes を直接返す（UTF-8、ensure_ascii 不要）
+    import orjson
+    _loads = orjson.loads
+
+    def _dumps_line(obj) -> bytes:
+        return orjson.dumps(obj) + b"\n"
+except ImportError:
+    _loads = json.loads
+
+    def _dumps_line(obj) -> bytes:
+        return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+try:  # optional: 巨大な JSON 配列をストリームで読む
+    import ijson
+except ImportError:
+    ijson = None
+
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 DEFAULT_OUT = os.path.join(ROOT, "data", "raw", "logs.jsonl")
 ERROR_LOG = os.path.join(ROOT, "data", "raw", "import_errors.log")
+FLUSH_BYTES = 1 << 16  # 出力はこのサイズごとにまとめて write()
+CSV_CHUNK_ROWS = 10_000  # CSV 並列変換の1チャンクあたりの行数
+CSV_INFLIGHT_PER_PROC = 2  # 並列変換で先読みするチャンク数（プロセスあたり）
+JSON_STREAM_MIN_BYTES = 16 << 20  # これ以上の JSON 配列は ijson で逐次パース
 
 def load_yaml(path):
     if path is None:
@@ -53,20 +74,13 @@ def detect_format(path):
 def parse_keywords(raw, delim_pattern):
     if raw is None:
         return []
-    parts = re.split(delim_pattern, str(raw))
-    out = [p.strip() for p in parts if p and p.strip()]
-    # 重複除去
-    seen = set()
-    uniq = []
-    for w in out:
-        if w not in seen:
-            seen.add(w)
-            uniq.append(w)
-    return uniq
+    # delim_pattern はコンパイル済み（import_csv で1回だけ compile）
+    parts = delim_pattern.split(str(raw))
+    # 空要素を除き、出現順を保って重複除去
+    return list(dict.fromkeys(filter(None, (p.strip() for p in parts))))
 
 def norm_strength(raw, scale):
-    if raw is None or str(raw).strip() == "":
-        return None
+    # float() 自体が前後の空白を許容し、None / 空文字 / 空白のみでは例外になるので事前チェック不要
     try:
         v = float(raw)
     except Exception:
@@ -105,57 +119,171 @@ def parse_ts(raw):
         except Exception:
             return None
 
-def write_error(msg):
-    os.makedirs(os.path.dirname(ERROR_LOG), exist_ok=True)
-    with open(ERROR_LOG, "a", encoding="utf-8") as f:
-        f.write(msg.rstrip() + "\n")
+class ErrorLog:
+    """ERROR_LOG への追記。最初のエラー時に1回だけ makedirs + open し、以降は同じハンドルに書く。"""
 
-def import_csv(src, out_path, cfg):
+    def __init__(self, path=None):
+        self.path = path or ERROR_LOG
+        self._f = None
+
+    def write(self, msg):
+        if self._f is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._f = open(self.path, "a", encoding="utf-8")
+        self._f.write(msg.rstrip() + "\n")
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _csv_row_as_dict(header, row):
+    # エラーログ用: csv.DictReader と同じ形（余り列は None キー、不足列は None）に戻す
+    d = dict(zip(header, row))
+    if len(row) > len(header):
+        d[None] = row[len(header):]
+    else:
+        for k in header[len(row):]:
+            d[k] = None
+    return d
+
+def _convert_csv_chunk(job):
+    """CSV 行チャンク → (JSONL bytes, ok件数, ng件数, エラーメッセージ)。ワーカープロセスでも親でも使う。"""
+    start, header, rows, cfg = job
     mapping = (cfg.get("mapping") or {})
-    kw_delim = cfg.get("keywords_delimiter", r"[,;、／/|]")
+    kw_re = re.compile(cfg.get("keywords_delimiter", r"[,;、／/|]"))
     scale = cfg.get("strength_scale", "0-1")
     emo_map = (cfg.get("emotion_map") or {})
     defaults = (cfg.get("defaults") or {})
-    cnt_in, cnt_ok, cnt_ng = 0, 0, 0
+    # 列名 → 位置はチャンクごとに1回だけ解決（同名列は DictReader 同様に後勝ち）
+    pos = {name: i for i, name in enumerate(header)}
+    i_ts = pos.get(mapping.get("timestamp", "ts"))
+    i_emo = pos.get(mapping.get("emotion", "emotion"))
+    i_str = pos.get(mapping.get("strength", "strength"))
+    i_kw = pos.get(mapping.get("keywords", "keywords"))
+    i_note = pos.get(mapping.get("note", "note"))
+    i_uid = pos.get(mapping.get("uid", "uid"))
 
-    with open(src, "r", encoding="utf-8") as f, open(out_path, "a", encoding="utf-8") as w:
-        reader = csv.DictReader(f)
-        for row in reader:
-            cnt_in += 1
-            ts = parse_ts(row.get(mapping.get("timestamp", "ts")))
-            emo = norm_emotion(row.get(mapping.get("emotion", "emotion")), emo_map) or defaults.get("emotion", "Unknown")
-            strength = norm_strength(row.get(mapping.get("strength", "strength")), scale)
-            keywords = parse_keywords(row.get(mapping.get("keywords", "keywords")), kw_delim)
-            note = row.get(mapping.get("note", "note"), "")
-            uid = row.get(mapping.get("uid", "uid"), "U1")
+    def col(row, i, default=None):
+        # 列自体が無ければ default、行が短い場合は DictReader と同じく None
+        if i is None:
+            return default
+        return row[i] if i < len(row) else None
 
-            if ts is None:
-                write_error(f"[{cnt_in}] invalid timestamp: {row}")
-                cnt_ng += 1
-                continue
-            r = {
-                "uid": uid,
-                "ts": ts,
-                "emotion": emo,
-                "strength": strength if strength is not None else 0.0,
-                "keywords": keywords,
-                "note": note
-            }
-            w.write(json.dumps(r, ensure_ascii=False) + "\n")
-            cnt_ok += 1
+    buf = bytearray()
+    ok, ng, errors = 0, 0, []
+    default_emo = defaults.get("emotion", "Unknown")
+    for n, row in enumerate(rows, start):
+        ts = parse_ts(col(row, i_ts))
+        if ts is None:
+            # 残りの列の正規化は不要（どれも副作用のない変換なので先に弾く）
+            errors.append(f"[{n}] invalid timestamp: {_csv_row_as_dict(header, row)}")
+            ng += 1
+            continue
+        buf += _dumps_line({
+            "uid": col(row, i_uid, "U1"),
+            "ts": ts,
+            "emotion": norm_emotion(col(row, i_emo), emo_map) or default_emo,
+            "strength": norm_strength(col(row, i_str), scale) or 0.0,  # None → 0.0（0.0 はそのまま）
+            "keywords": parse_keywords(col(row, i_kw), kw_re),
+            "note": col(row, i_note, ""),
+        })
+        ok += 1
+    return bytes(buf), ok, ng, errors
+
+def _iter_csv_chunks(reader, header, cfg):
+    rows_iter = filter(None, reader)  # 空行は DictReader と同様にスキップ
+    start = 1
+    while True:
+        rows = list(itertools.islice(rows_iter, CSV_CHUNK_ROWS))
+        if not rows:
+            return
+        yield start, header, rows, cfg
+        start += len(rows)
+
+def _imap_bounded(pool, func, jobs, window):
+    """pool.imap と同じく入力順に結果を返すが、先読みは window チャンクまで。
+
+    imap は入力イテレータを別スレッドで最後まで読み進めるため、巨大な CSV が
+    丸ごとメモリに載ってしまう。
+    """
+    pending = collections.deque()
+    for job in jobs:
+        pending.append(pool.apply_async(func, (job,)))
+        if len(pending) >= window:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+def import_csv(src, out_path, cfg):
+    cnt_in, cnt_ok, cnt_ng = 0, 0, 0
+    pool = None
+
+    with open(src, "r", encoding="utf-8") as f, open(out_path, "ab", buffering=1 << 20) as w, ErrorLog() as errlog:
+        # DictReader は行ごとに dict を作るので、csv.reader + 列位置で読む
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return cnt_in, cnt_ok, cnt_ng
+        chunks = _iter_csv_chunks(reader, header, cfg)
+        first = next(chunks, None)
+        if first is None:
+            return cnt_in, cnt_ok, cnt_ng
+        second = next(chunks, None)
+        if second is None:
+            # 1チャンクに収まる入力は fork コストの方が高いので単一プロセスで変換
+            results = [_convert_csv_chunk(first)]
+        else:
+            # 行変換は行をまたぐ状態を持たないのでチャンク単位で並列化。
+            # 結果は入力順に返すので出力ファイルの行順は保たれる
+            pool = multiprocessing.Pool()
+            window = (os.cpu_count() or 1) * CSV_INFLIGHT_PER_PROC
+            results = _imap_bounded(pool, _convert_csv_chunk, itertools.chain((first, second), chunks), window)
+        try:
+            for payload, ok, ng, errors in results:
+                w.write(payload)
+                cnt_in += ok + ng
+                cnt_ok += ok
+                cnt_ng += ng
+                if errors:
+                    errlog.write("\n".join(errors))
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
     return cnt_in, cnt_ok, cnt_ng
 
+def _iter_json_rows(f, size):
+    """JSON ファイル（bytes で open 済み）のレコードを順に返す。トップレベルが dict なら1件として扱う。"""
+    if ijson is not None and size >= JSON_STREAM_MIN_BYTES:
+        # 先頭の非空白バイトで配列か判定（配列なら全体をメモリに載せずに1件ずつ読む）
+        first = f.read(1)
+        while first and first.isspace():
+            first = f.read(1)
+        f.seek(0)
+        if first == b"[":
+            yield from ijson.items(f, "item", use_float=True)
+            return
+    data = _loads(f.read())
+    if isinstance(data, dict):
+        data = [data]
+    yield from data
+
 def import_json(src, out_path):
     cnt_in, cnt_ok, cnt_ng = 0, 0, 0
-    with open(src, "r", encoding="utf-8") as f, open(out_path, "a", encoding="utf-8") as w:
-        data = json.load(f)
-        if isinstance(data, dict):
-            data = [data]
-        for row in data:
+    buf = bytearray()
+    with open(src, "rb") as f, open(out_path, "ab", buffering=1 << 20) as w, ErrorLog() as errlog:
+        for row in _iter_json_rows(f, os.fstat(f.fileno()).st_size):
             cnt_in += 1
             ts = parse_ts(row.get("ts"))
             if ts is None:
-                write_error(f"[{cnt_in}] invalid timestamp: {row}")
+                errlog.write(f"[{cnt_in}] invalid timestamp: {row}")
                 cnt_ng += 1
                 continue
             emo = row.get("emotion", "Unknown")
@@ -164,27 +292,32 @@ def import_json(src, out_path):
             note = row.get("note", "")
             uid = row.get("uid", "U1")
             r = {"uid": uid, "ts": ts, "emotion": emo, "strength": strength, "keywords": keywords, "note": note}
-            w.write(json.dumps(r, ensure_ascii=False) + "\n")
+            buf += _dumps_line(r)
+            if len(buf) >= FLUSH_BYTES:
+                w.write(buf)
+                buf.clear()
             cnt_ok += 1
+        w.write(buf)
     return cnt_in, cnt_ok, cnt_ng
 
 def import_jsonl(src, out_path):
     cnt_in, cnt_ok, cnt_ng = 0, 0, 0
-    with open(src, "r", encoding="utf-8") as f, open(out_path, "a", encoding="utf-8") as w:
+    buf = bytearray()
+    with open(src, "r", encoding="utf-8") as f, open(out_path, "ab", buffering=1 << 20) as w, ErrorLog() as errlog:
         for line in f:
             line = line.strip()
             if not line:
                 continue
             cnt_in += 1
             try:
-                row = json.loads(line)
+                row = _loads(line)
             except Exception:
-                write_error(f"[{cnt_in}] invalid json line: {line[:120]} ...")
+                errlog.write(f"[{cnt_in}] invalid json line: {line[:120]} ...")
                 cnt_ng += 1
                 continue
             ts = parse_ts(row.get("ts"))
             if ts is None:
-                write_error(f"[{cnt_in}] invalid timestamp: {row}")
+                errlog.write(f"[{cnt_in}] invalid timestamp: {row}")
                 cnt_ng += 1
                 continue
             emo = row.get("emotion", "Unknown")
@@ -193,8 +326,12 @@ def import_jsonl(src, out_path):
             note = row.get("note", "")
             uid = row.get("uid", "U1")
             r = {"uid": uid, "ts": ts, "emotion": emo, "strength": strength, "keywords": keywords, "note": note}
-            w.write(json.dumps(r, ensure_ascii=False) + "\n")
+            buf += _dumps_line(r)
+            if len(buf) >= FLUSH_BYTES:
+                w.write(buf)
+                buf.clear()
             cnt_ok += 1
+        w.write(buf)
     return cnt_in, cnt_ok, cnt_ng
 
 def main():
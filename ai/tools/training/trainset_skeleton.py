@@ -2,6 +2,11 @@ from dataclasses import dataclass, asdict
 from typing import List, Dict, Any
 import json, time
 
+try:  # optional: orjson emits UTF-8 bytes directly
+    import orjson
+except ImportError:
+    orjson = None
+
 @dataclass
 class TrainSet:
     instruction: str
@@ -27,6 +32,9 @@ def make_trainset(instruction: str, features: Dict[str, Any], lang: str = 'ja',
     )
 
 def write_jsonl(path: str, rows: List[TrainSet]) -> None:
-    with open(path, 'w', encoding='utf-8') as f:
+    with open(path, 'wb') as f:
         for r in rows:
-            f.write(json.dumps(asdict(r), ensure_ascii=False) + "\n")
+            if orjson is not None:
+                f.write(orjson.dumps(asdict(r)) + b"\n")
+            else:
+                f.write((json.dumps(asdict(r), ensure_ascii=False) + "\n").encode('utf-8'))
@@ -7,10 +7,17 @@ Validate logs.jsonl format for CocolonAI pipeline.
 import os, json, argparse, datetime, re
 from collections import Counter
 
+try:  # optional: faster line parsing
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 DEFAULT_IN = os.path.join(ROOT, "data", "raw", "logs.jsonl")
 
-EMOTIONS = {"Sadness","Anxiety","Calm","Joy","Anger","Fear","Surprise","Disgust","Unknown"}
+EMOTIONS = frozenset({"Sadness","Anxiety","Calm","Joy","Anger","Fear","Surprise","Disgust","Unknown"})
+REQUIRED = ("uid","ts","emotion")
 
 def parse_ts(s):
     try:
@@ -32,29 +39,24 @@ def main():
     if not os.path.exists(args.src):
         raise SystemExit(f"not found: {args.src}")
 
-    with open(args.src, "r", encoding="utf-8") as f:
+    # bytes で読む: orjson / json.loads とも UTF-8 bytes をそのまま受け付ける
+    with open(args.src, "rb", buffering=1 << 20) as f:
         for line in f:
             line=line.strip()
             if not line: 
                 continue
             n += 1
             try:
-                row = json.loads(line)
+                row = _loads(line)
             except Exception:
-                print("[bad json]", line[:120], "...")
+                print("[bad json]", line[:120].decode("utf-8", "replace"), "...")
                 continue
-            ok = True
-            for k in ["uid","ts","emotion"]:
-                if k not in row:
-                    ok = False
-            if not ok:
+            if not all(k in row for k in REQUIRED):
                 missing += 1
             if not parse_ts(row.get("ts","")):
                 invalid_ts += 1
             emo = row.get("emotion","Unknown")
-            if emo not in EMOTIONS:
-                emo = "Unknown"
-            emo_counts[emo]+=1
+            emo_counts[emo if emo in EMOTIONS else "Unknown"] += 1
 
     print("Records:", n)
     print("Missing required keys:", missing)
@@ -8,10 +8,11 @@ Requirements:
 Usage:
   python training/train_lora.py --config configs/model_train.yaml
 """
-import os, json, argparse, yaml
-from datasets import Dataset
+import os, json, argparse, yaml, hashlib, shutil, tempfile
+from itertools import chain
+from datasets import load_dataset, load_from_disk
 from transformers import (AutoTokenizer, AutoModelForCausalLM, TrainingArguments, Trainer,
-                          DataCollatorForLanguageModeling)
+                          DataCollatorForLanguageModeling, default_data_collator)
 try:
     from peft import LoraConfig, get_peft_model, prepare_model_for_kbit_training
     from bitsandbytes.config import BitsAndBytesConfig
@@ -22,35 +23,84 @@ except Exception:
     get_peft_model = None
     prepare_model_for_kbit_training = None
     BitsAndBytesConfig = None
+try:
+    import torch
+    _HAS_CUDA = torch.cuda.is_available()
+except Exception:
+    _HAS_CUDA = False
+try:
+    import flash_attn  # noqa: F401
+    _HAS_FLASH_ATTN = True
+except Exception:
+    _HAS_FLASH_ATTN = False
+try:  # optional: JSONL 行のパースを高速化
+    import orjson
+except ImportError:
+    orjson = None
 
-PROMPT_FMT = (
-    "### Instruction\n{inst}\n\n"
-    "### Input\n{inp}\n\n"
-    "### Response\n{out}"
-)
+# 学習テキストの形式（build_text / build_texts）を変えたら上げる。トークナイズ済みキャッシュのキーに含める
+TEXT_FORMAT_VERSION = 1
 
 def read_yaml(path):
     with open(path, "r", encoding="utf-8") as f:
         return yaml.safe_load(f)
 
-def load_jsonl(path):
-    rows = []
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            line=line.strip()
-            if not line: continue
-            rows.append(json.loads(line))
-    return rows
-
 def build_text(ex):
     inst = ex.get("instruction","").strip()
+    # 学習テキストの形式は変えない（", " / ": " 区切り）。orjson は compact 形式しか出せないので使わない
     inp = json.dumps(ex.get("input",{}), ensure_ascii=False)
     out = ex.get("output","").strip()
-    return PROMPT_FMT.format(inst=inst, inp=inp, out=out)
+    return f"### Instruction\n{inst}\n\n### Input\n{inp}\n\n### Response\n{out}"
+
+def loads_row(line):
+    return orjson.loads(line) if orjson is not None else json.loads(line)
+
+def build_texts(batch):
+    # JSONL の生の行 → 学習テキスト（空行は捨てる）
+    return {"text": [build_text(loads_row(line)) for line in batch["text"] if line.strip()]}
 
 def tokenize_function(examples, tokenizer, max_len):
     return tokenizer(examples["text"], truncation=True, max_length=max_len, padding=False)
 
+def group_texts(examples, block_size, sep_id):
+    # packing: 全サンプルを（区切りトークン付きで）連結し block_size ごとに切る → padding が出ない
+    ids = list(chain.from_iterable(x + [sep_id] for x in examples["input_ids"]))
+    total = (len(ids) // block_size) * block_size
+    blocks = [ids[i:i + block_size] for i in range(0, total, block_size)]
+    return {
+        "input_ids": blocks,
+        "attention_mask": [[1] * block_size for _ in blocks],
+        "labels": [b[:] for b in blocks],
+    }
+
+def tokenizer_revision(tokenizer):
+    # 同じ base 名でもハブ側の更新で語彙が変わりうるので、commit hash と語彙数で区別する
+    commit = getattr(tokenizer, "_commit_hash", None) or tokenizer.init_kwargs.get("_commit_hash") or ""
+    return f"{type(tokenizer).__name__}:{commit}:{len(tokenizer)}"
+
+def tokenized_cache_path(out_dir, base, max_len, train_file, packing, tok_rev):
+    # 学習データ（mtime/サイズ）・テキスト形式・tokenizer・ベースモデル・max_len・packing が同じなら前回のトークナイズ結果を使い回す
+    st = os.stat(train_file)
+    raw = f"v{TEXT_FORMAT_VERSION}|{tok_rev}|{base}|{max_len}|{packing}|{os.path.abspath(train_file)}|{st.st_mtime_ns}|{st.st_size}"
+    key = hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(out_dir, "tok_cache", key)
+
+def save_dataset_atomic(ds, path):
+    # 途中で落ちても壊れたキャッシュを isdir で拾わないよう、一時ディレクトリに書いてから置き換える
+    parent = os.path.dirname(path)
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=os.path.basename(path) + ".tmp-", dir=parent)
+    try:
+        ds.save_to_disk(tmp)
+        os.replace(tmp, path)
+    except OSError:
+        # 並行実行の別プロセスが先に書き終えていたらそちらを使う
+        if not os.path.isdir(path):
+            raise
+    finally:
+        if os.path.isdir(tmp):
+            shutil.rmtree(tmp, ignore_errors=True)
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--config", default="configs/model_train.yaml")
@@ -62,13 +112,18 @@ def main():
     train_file = cfg.get("train_file", "data/train/{{AI_NAME}}_interpret_train.jsonl")
     out_dir = cfg.get("output_dir", "models/lora")
     dtype = cfg.get("dtype", "bfloat16")
+    packing = bool(cfg.get("packing", True))
 
     # Tokenizer & model
     tokenizer = AutoTokenizer.from_pretrained(base, use_fast=True)
     if tokenizer.pad_token is None:
         tokenizer.pad_token = tokenizer.eos_token
 
-    load_kwargs = {}
+    # flash-attn があれば FlashAttention-2（fp16/bf16 のみ対応）、なければ PyTorch の SDPA（どちらも fused kernel）
+    if _HAS_FLASH_ATTN and _HAS_CUDA and dtype in ("bfloat16", "float16"):
+        load_kwargs = {"attn_implementation": "flash_attention_2", "torch_dtype": getattr(torch, dtype)}
+    else:
+        load_kwargs = {"attn_implementation": "sdpa"}
     if _HAS_BNB:
         bnb_cfg = BitsAndBytesConfig(load_in_4bit=True, bnb_4bit_use_double_quant=True,
                                      bnb_4bit_quant_type="nf4", bnb_4bit_compute_dtype="bfloat16")
@@ -76,6 +131,9 @@ def main():
 
     model = AutoModelForCausalLM.from_pretrained(base, **load_kwargs)
     model.config.use_cache = False
+    # activation を保存せず再計算してメモリを節約（prepare_model_for_kbit_training も同様に有効化する）
+    model.gradient_checkpointing_enable()
+    model.enable_input_require_grads()  # PEFT + checkpointing で入力側に勾配を通すため
 
     if LoraConfig is not None:
         if prepare_model_for_kbit_training is not None:
@@ -90,10 +148,33 @@ def main():
         )
         model = get_peft_model(model, lora)
 
-    rows = load_jsonl(train_file)
-    ds = Dataset.from_dict({"text":[build_text(r) for r in rows]})
-    tokenized = ds.map(lambda e: tokenize_function(e, tokenizer, max_len), batched=True, remove_columns=["text"])
-    collator = DataCollatorForLanguageModeling(tokenizer=tokenizer, mlm=False)
+    cache_path = tokenized_cache_path(out_dir, base, max_len, train_file, packing, tokenizer_revision(tokenizer))
+    if os.path.isdir(cache_path):
+        tokenized = load_from_disk(cache_path)
+        print("[cache] tokenized dataset ->", cache_path)
+    else:
+        # Arrow の text ローダで行を読む（メモリマップ、Python のリストに全件載せない）。
+        # "json" ローダは行ごとに違う input のキーを struct に揃えて null を足してしまうので、
+        # JSON のパースは行ごとに build_texts で行う
+        raw = load_dataset("text", data_files=train_file, split="train")
+        # テキスト化/トークナイズは CPU 律速なのでプロセス並列（小さいデータでは fork しない）
+        num_proc = max(1, min(os.cpu_count() or 1, len(raw) // 1000))
+        num_proc = num_proc if num_proc > 1 else None
+        ds = raw.map(build_texts, batched=True, remove_columns=raw.column_names, num_proc=num_proc)
+        tokenized = ds.map(lambda e: tokenize_function(e, tokenizer, max_len), batched=True,
+                           remove_columns=["text"], num_proc=num_proc)
+        if packing:
+            packed = tokenized.map(lambda e: group_texts(e, max_len, tokenizer.eos_token_id), batched=True,
+                                   remove_columns=tokenized.column_names, num_proc=num_proc)
+            # 1ブロック分にも満たない小さなデータは packing せずそのまま使う
+            if len(packed) > 0:
+                tokenized = packed
+        save_dataset_atomic(tokenized, cache_path)
+    if "labels" in tokenized.column_names:
+        # packing 済み: 全ブロックが max_len 固定なので動的 padding 不要
+        collator = default_data_collator
+    else:
+        collator = DataCollatorForLanguageModeling(tokenizer=tokenizer, mlm=False)
 
     args_t = TrainingArguments(
         output_dir=out_dir,
@@ -109,7 +190,14 @@ def main():
         evaluation_strategy="no",
         bf16=(dtype=="bfloat16"),
         fp16=(dtype=="float16"),
-        report_to="none"
+        report_to="none",
+        gradient_checkpointing=True,
+        optim="adamw_torch_fused" if _HAS_CUDA else "adamw_torch",
+        torch_compile=bool(cfg.get("torch_compile", False)),
+        dataloader_num_workers=max(2, (os.cpu_count() or 2) // 2),
+        dataloader_pin_memory=_HAS_CUDA,
+        # packing 済みなら全サンプル同じ長さなので長さでまとめる意味がない
+        group_by_length="labels" not in tokenized.column_names,
     )
 
     trainer = Trainer(model=model, args=args_t, train_dataset=tokenized, data_collator=collator)
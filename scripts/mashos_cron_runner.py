@@ -10,6 +10,7 @@ mashos_cron_runner.py (Phase 4.5)
 特徴
 - offset/limit を使い、レスポンスの next_offset/done を見て最後まで回す
 - shard_total / shard_index に対応（並列Cronで分割したいとき用）
+- --all-shards（CRON_ALL_SHARDS=1）で、1つのランナーから全シャードを並行に回す
 - 失敗時は exit code != 0 にして監視しやすくする
 
 使い方（例）
@@ -19,7 +20,12 @@ mashos_cron_runner.py (Phase 4.5)
   # 2) 週次（シャード4分割の2番目）
   CRON_SHARD_TOTAL=4 CRON_SHARD_INDEX=1 python scripts/mashos_cron_runner.py myweb-weekly
 
+  # 2b) 週次（4分割を1プロセスで並行実行）
+  CRON_SHARD_TOTAL=4 python scripts/mashos_cron_runner.py myweb-weekly --all-shards
+
   # 3) 1日1回の「自動」モード（毎日0:00 JSTに実行するCronを1つだけ作る）
+  #    同じ日に再実行された場合、成功済みのジョブは CRON_STATE_FILE を見てスキップ
+  #    （--ignore-state / CRON_IGNORE_STATE=1 で無視。--force はサーバ側の再生成も強制し、スキップも無視）
   python scripts/mashos_cron_runner.py auto
 
 必要ENV
@@ -30,19 +36,32 @@ mashos_cron_runner.py (Phase 4.5)
 from __future__ import annotations
 
 import argparse
+import asyncio
 import json
 import os
 import sys
-import time
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional, Tuple
 
 import httpx
 
+try:  # optional: orjson でリクエスト/レスポンスの JSON を処理（なければ標準 json）
+    import orjson as _orjson
+except ImportError:  # pragma: no cover - orjson 未導入環境では標準 json
+    _orjson = None
+
+try:  # optional: httpx の HTTP/2 は h2 パッケージがあるときだけ有効
+    import h2 as _h2  # noqa: F401
+except ImportError:  # pragma: no cover - h2 未導入環境では HTTP/1.1 keep-alive のみ
+    _h2 = None
+
 
 JST = timezone(timedelta(hours=9))
 
+# auto モードで「今日すでに成功したジョブ」を記録するファイル（空文字で無効）
+STATE_FILE = os.getenv("CRON_STATE_FILE", "/tmp/mashos_cron_state.json")
+
 JOB_TO_ENDPOINT = {
     "myweb-daily": "/cron/myweb/daily",
     "myweb-weekly": "/cron/myweb/weekly",
@@ -65,6 +84,7 @@ class RunConfig:
     timeout_sec: float
     sleep_sec: float
     retries: int
+    all_shards: bool
 
 
 def _env_bool(name: str, default: bool) -> bool:
@@ -95,28 +115,70 @@ def _pick_jobs(job: str) -> List[str]:
     return jobs
 
 
-def _post_json(
-    client: httpx.Client,
+def _state_key(cfg: RunConfig, job: str) -> str:
+    shard = "all" if cfg.all_shards else str(cfg.shard_index)
+    return f"{job}:{shard}/{cfg.shard_total}"
+
+
+def _load_state(path: str) -> Dict[str, str]:
+    try:
+        with open(path, "rb") as f:
+            data = _loads(f.read())
+    except Exception:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _save_state(path: str, state: Dict[str, str]) -> None:
+    try:
+        with open(path, "wb") as f:
+            f.write(_dumps(state))
+    except OSError as e:
+        print(f"WARN: failed to write state file {path}: {e}", file=sys.stderr)
+
+
+def _make_client(cfg: RunConfig) -> httpx.AsyncClient:
+    # 全ジョブ・全ページ・全シャードで1つのクライアントを共有（同一ホストへの TLS/接続を使い回す）
+    return httpx.AsyncClient(
+        timeout=cfg.timeout_sec,
+        http2=_h2 is not None,
+        limits=httpx.Limits(max_keepalive_connections=8),
+        headers={"Content-Type": "application/json", "X-Cron-Token": cfg.token},
+    )
+
+
+def _dumps(payload: Dict[str, Any]) -> bytes:
+    if _orjson is not None:
+        return _orjson.dumps(payload)
+    return json.dumps(payload).encode("utf-8")
+
+
+def _loads(body: bytes) -> Any:
+    if _orjson is not None:
+        return _orjson.loads(body)
+    return json.loads(body)
+
+
+async def _post_json(
+    client: httpx.AsyncClient,
     url: str,
-    token: str,
     payload: Dict[str, Any],
     retries: int,
 ) -> Dict[str, Any]:
-    headers = {"Content-Type": "application/json", "X-Cron-Token": token}
-
     last_err: Optional[Exception] = None
     for i in range(retries + 1):
         try:
-            r = client.post(url, headers=headers, json=payload)
+            # Content-Type: application/json はクライアント共通ヘッダで付与済み
+            r = await client.post(url, content=_dumps(payload))
             if r.status_code >= 300:
                 # 返り値がjsonならdetail拾う
                 try:
-                    j = r.json()
+                    j = _loads(r.content)
                     detail = j.get("detail") if isinstance(j, dict) else None
                 except Exception:
                     detail = None
                 raise RuntimeError(f"HTTP {r.status_code} {detail or r.text[:300]}")
-            j = r.json()
+            j = _loads(r.content)
             if not isinstance(j, dict):
                 raise RuntimeError("Invalid JSON response (not an object)")
             return j
@@ -124,23 +186,18 @@ def _post_json(
             last_err = e
             # 最終試行でなければバックオフ
             if i < retries:
-                time.sleep(min(2 ** i, 10))
+                await asyncio.sleep(min(2 ** i, 10))
                 continue
             break
 
     raise RuntimeError(f"Request failed after retries: {last_err}")
 
 
-def _run_one_job(cfg: RunConfig, job: str) -> Tuple[int, int, int]:
-    endpoint = JOB_TO_ENDPOINT[job]
-    base = cfg.base_url.rstrip("/")
-    url = f"{base}{endpoint}"
-
-    print(f"\n=== RUN {job} => {url} ===")
-    print(
-        f"limit={cfg.limit} max_pages={cfg.max_pages} force={cfg.force} dry_run={cfg.dry_run} "
-        f"include_astor={cfg.include_astor} shard={cfg.shard_index}/{cfg.shard_total}"
-    )
+async def _run_shard(
+    cfg: RunConfig, url: str, shard_index: int, client: httpx.AsyncClient
+) -> Tuple[int, int, int]:
+    # シャード内のページングは順番に（サーバ側は offset 基準で進むため）
+    tag = f"[shard {shard_index}/{cfg.shard_total}]" if cfg.all_shards else ""
 
     processed_total = 0
     generated_total = 0
@@ -149,53 +206,79 @@ def _run_one_job(cfg: RunConfig, job: str) -> Tuple[int, int, int]:
     offset = 0
     page = 0
 
-    with httpx.Client(timeout=cfg.timeout_sec) as client:
-        while True:
-            page += 1
-            payload = {
-                "offset": offset,
-                "limit": cfg.limit,
-                "force": cfg.force,
-                "dry_run": cfg.dry_run,
-                "include_astor": cfg.include_astor,
-                "shard_total": cfg.shard_total,
-                "shard_index": cfg.shard_index,
-            }
-
-            j = _post_json(client, url, cfg.token, payload, retries=cfg.retries)
-
-            processed = int(j.get("processed") or 0)
-            generated = int(j.get("generated") or 0)
-            errors = int(j.get("errors") or 0)
-            done = bool(j.get("done"))
-            next_offset = j.get("next_offset")
-
-            processed_total += processed
-            generated_total += generated
-            errors_total += errors
-
-            print(
-                f"[page {page}] offset={offset} -> next_offset={next_offset} "
-                f"processed={processed} generated={generated} errors={errors} done={done}"
+    while True:
+        page += 1
+        payload = {
+            "offset": offset,
+            "limit": cfg.limit,
+            "force": cfg.force,
+            "dry_run": cfg.dry_run,
+            "include_astor": cfg.include_astor,
+            "shard_total": cfg.shard_total,
+            "shard_index": shard_index,
+        }
+
+        j = await _post_json(client, url, payload, retries=cfg.retries)
+
+        processed = int(j.get("processed") or 0)
+        generated = int(j.get("generated") or 0)
+        errors = int(j.get("errors") or 0)
+        done = bool(j.get("done"))
+        next_offset = j.get("next_offset")
+
+        processed_total += processed
+        generated_total += generated
+        errors_total += errors
+
+        print(
+            f"{tag}[page {page}] offset={offset} -> next_offset={next_offset} "
+            f"processed={processed} generated={generated} errors={errors} done={done}"
+        )
+
+        if done:
+            break
+
+        if next_offset is None:
+            # safety
+            raise RuntimeError("done=false but next_offset is null")
+
+        offset = int(next_offset)
+
+        if page >= cfg.max_pages:
+            raise RuntimeError(
+                f"Reached max_pages={cfg.max_pages} before done=true. "
+                f"Consider increasing CRON_MAX_PAGES or using sharding."
             )
 
-            if done:
-                break
+        if cfg.sleep_sec > 0:
+            await asyncio.sleep(cfg.sleep_sec)
 
-            if next_offset is None:
-                # safety
-                raise RuntimeError("done=false but next_offset is null")
+    return processed_total, generated_total, errors_total
+
+
+async def _run_one_job(cfg: RunConfig, job: str, client: httpx.AsyncClient) -> Tuple[int, int, int]:
+    endpoint = JOB_TO_ENDPOINT[job]
+    base = cfg.base_url.rstrip("/")
+    url = f"{base}{endpoint}"
 
-            offset = int(next_offset)
+    shard = f"all/{cfg.shard_total}" if cfg.all_shards else f"{cfg.shard_index}/{cfg.shard_total}"
+    print(f"\n=== RUN {job} => {url} ===")
+    print(
+        f"limit={cfg.limit} max_pages={cfg.max_pages} force={cfg.force} dry_run={cfg.dry_run} "
+        f"include_astor={cfg.include_astor} shard={shard}"
+    )
 
-            if page >= cfg.max_pages:
-                raise RuntimeError(
-                    f"Reached max_pages={cfg.max_pages} before done=true. "
-                    f"Consider increasing CRON_MAX_PAGES or using sharding."
-                )
+    if cfg.all_shards:
+        # シャード同士は独立しているので並行に回す（RTT 待ちを重ねる）
+        results = await asyncio.gather(
+            *(_run_shard(cfg, url, i, client) for i in range(cfg.shard_total))
+        )
+    else:
+        results = [await _run_shard(cfg, url, cfg.shard_index, client)]
 
-            if cfg.sleep_sec > 0:
-                time.sleep(cfg.sleep_sec)
+    processed_total = sum(r[0] for r in results)
+    generated_total = sum(r[1] for r in results)
+    errors_total = sum(r[2] for r in results)
 
     print(
         f"=== DONE {job}: processed_total={processed_total} generated_total={generated_total} errors_total={errors_total} ==="
@@ -203,6 +286,19 @@ def _run_one_job(cfg: RunConfig, job: str) -> Tuple[int, int, int]:
     return processed_total, generated_total, errors_total
 
 
+async def _run_jobs(cfg: RunConfig, jobs: List[str], state: Optional[Dict[str, str]] = None) -> int:
+    total_errors = 0
+    async with _make_client(cfg) as client:
+        for job in jobs:
+            _, _, e = await _run_one_job(cfg, job, client)
+            total_errors += e
+            if state is not None and e == 0:
+                # 成功したジョブだけ記録（同じ日に Cron が再実行されても二重に回さない）
+                state[_state_key(cfg, job)] = datetime.now(JST).date().isoformat()
+                _save_state(STATE_FILE, state)
+    return total_errors
+
+
 def main(argv: List[str]) -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument(
@@ -222,10 +318,22 @@ def main(argv: List[str]) -> int:
 
     parser.add_argument("--force", action="store_true", default=_env_bool("CRON_FORCE", False))
     parser.add_argument("--dry-run", action="store_true", default=_env_bool("CRON_DRY_RUN", False))
+    parser.add_argument(
+        "--ignore-state",
+        action="store_true",
+        default=_env_bool("CRON_IGNORE_STATE", False),
+        help="auto モードで CRON_STATE_FILE の「本日成功済み」スキップを無視する（サーバへは force を送らない）",
+    )
     parser.add_argument("--include-astor", action="store_true", default=_env_bool("CRON_INCLUDE_ASTOR", True))
 
     parser.add_argument("--shard-total", type=int, default=int(os.getenv("CRON_SHARD_TOTAL") or "1"))
     parser.add_argument("--shard-index", type=int, default=int(os.getenv("CRON_SHARD_INDEX") or "0"))
+    parser.add_argument(
+        "--all-shards",
+        action="store_true",
+        default=_env_bool("CRON_ALL_SHARDS", False),
+        help="このランナー1つで全シャード（0..shard_total-1）を並行実行する",
+    )
 
     args = parser.parse_args(argv)
 
@@ -252,6 +360,7 @@ def main(argv: List[str]) -> int:
         timeout_sec=max(5.0, float(args.timeout_sec)),
         sleep_sec=max(0.0, float(args.sleep_sec)),
         retries=max(0, int(args.retries)),
+        all_shards=bool(args.all_shards),
     )
 
     if cfg.shard_index >= cfg.shard_total:
@@ -260,10 +369,17 @@ def main(argv: List[str]) -> int:
 
     jobs = _pick_jobs(args.job)
 
-    total_errors = 0
-    for job in jobs:
-        _, _, e = _run_one_job(cfg, job)
-        total_errors += e
+    state: Optional[Dict[str, str]] = None
+    ignore_state = bool(args.ignore_state) or cfg.force
+    if args.job == "auto" and STATE_FILE and not ignore_state and not cfg.dry_run:
+        state = _load_state(STATE_FILE)
+        today = datetime.now(JST).date().isoformat()
+        done_today = [j for j in jobs if state.get(_state_key(cfg, j)) == today]
+        for j in done_today:
+            print(f"SKIP {j}: already succeeded today ({today} JST, state={STATE_FILE})")
+        jobs = [j for j in jobs if j not in done_today]
+
+    total_errors = asyncio.run(_run_jobs(cfg, jobs, state))
 
     # Cron監視で検知できるように：errorsが1件でもあれば非0で落とす
     if total_errors > 0: